@@ -0,0 +1,61 @@
+"""Replay an event storm against ActionExecutor with harmless commands
+
+Every event submits a Command action for one of --rules rules, as
+EventManager.check_event does once a rule's threshold is met. The
+report shows how long submit() held the caller and how many commands
+were actually run, suppressed, rate limited or dropped; the old code
+would have started one process per event.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_action_executor --events 100000 --command "sleep 0.05"
+"""
+import argparse
+import sys
+import time
+
+from src.event_manager.action_executor import DROP_POLICIES, ActionExecutor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--rules', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help='seconds the storm is spread over')
+    parser.add_argument('--command', default='exit 0' if sys.platform == 'win32' else 'true')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--queue', type=int, default=100)
+    parser.add_argument('--drop-policy', choices=DROP_POLICIES, default=DROP_POLICIES[0])
+    parser.add_argument('--rate', type=float, default=1.0)
+    parser.add_argument('--burst', type=int, default=5)
+    parser.add_argument('--cooldown', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    executor = ActionExecutor(args.workers, args.queue, args.drop_policy, args.rate,
+                              args.burst, args.cooldown)
+    interval = args.duration / args.events
+    blocked = 0.0
+    start = time.perf_counter()
+    for i in range(args.events):
+        target = start + i * interval
+        delay = target - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        submit_start = time.perf_counter()
+        executor.submit(f'rule{i % args.rules}', args.command)
+        blocked += time.perf_counter() - submit_start
+    storm = time.perf_counter() - start
+
+    executor.close()
+    stats = executor.stats()
+    durations = sorted(result.duration for result in executor.results)
+    print(f"{args.events} events over {storm:.1f}s, submit blocked {blocked * 1e6 / args.events:.1f} us/event")
+    print("  " + ", ".join(f"{key} {value}" for key, value in stats.items()))
+    if durations:
+        print(f"  command duration p50 {durations[len(durations) // 2] * 1000:.1f} ms, "
+              f"max {durations[-1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
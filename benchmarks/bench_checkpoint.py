@@ -0,0 +1,94 @@
+"""Time rule state snapshots, restores and journal writes
+
+An OccurrenceTracker is filled with --keys event keys holding a few
+occurrences each, plus a cursor per log, and RuleStateCheckpoint writes
+it to a temporary directory. The snapshot is then restored into a fresh
+tracker --repeat times, and --journal occurrences are recorded and
+flushed in blocks of --block, as the daemon's drain loop would.
+Journal writes are timed with and without fsync.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_checkpoint --keys 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.event_manager.checkpoint import RuleStateCheckpoint
+from src.event_manager.occurrence import OccurrenceTracker
+
+
+def filled_tracker(keys, per_key):
+    tracker = OccurrenceTracker(max_entries=keys * per_key * 2)
+    for i in range(keys):
+        tracker.record(f"Source{i % 500}_{i}", count=1 + i % per_key)
+    return tracker
+
+
+def journal(directory, tracker, args, fsync):
+    checkpoint = RuleStateCheckpoint(tracker, directory, journal_fsync=fsync)
+    checkpoint.restore()
+    event = SimpleNamespace(Host='localhost', LogType='System', RecordNumber=0,
+                            TimeGenerated=datetime.now())
+    start = time.perf_counter()
+    for i in range(args.journal):
+        tracker.record(f"Source{i % 500}_{i % args.keys}")
+        if i % args.block == args.block - 1:
+            event.RecordNumber = i
+            checkpoint.advance((event,))
+            checkpoint.flush()
+    checkpoint.flush()
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(checkpoint.journal_path)
+    checkpoint.close()
+    return elapsed, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=100000)
+    parser.add_argument('--per-key', type=int, default=3,
+                        help='most occurrences held per key')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--journal', type=int, default=100000,
+                        help='occurrences journaled')
+    parser.add_argument('--block', type=int, default=500,
+                        help='occurrences per journal write')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracker = filled_tracker(args.keys, args.per_key)
+        checkpoint = RuleStateCheckpoint(tracker, directory)
+        checkpoint.advance([SimpleNamespace(Host='localhost', LogType=log_type, RecordNumber=1,
+                                            TimeGenerated=datetime.now())
+                            for log_type in ('Application', 'Security', 'System')])
+        start = time.perf_counter()
+        checkpoint.save()
+        elapsed = time.perf_counter() - start
+        checkpoint.close()
+        size = os.path.getsize(checkpoint.snapshot_path)
+        print(f"snapshot: {len(tracker):,} keys, {tracker.total:,} occurrences, "
+              f"{size / (1 << 20):.1f} MiB written in {elapsed * 1000:.0f} ms")
+
+        timings = []
+        for _ in range(args.repeat):
+            restored = OccurrenceTracker(max_entries=tracker.max_entries)
+            start = time.perf_counter()
+            RuleStateCheckpoint(restored, directory).restore()
+            timings.append(time.perf_counter() - start)
+        assert len(restored) == len(tracker) and restored.total == tracker.total
+        print(f"restore:  best {min(timings) * 1000:.0f} ms, "
+              f"median {sorted(timings)[len(timings) // 2] * 1000:.0f} ms")
+
+        for fsync in (False, True):
+            elapsed, size = journal(directory, restored, args, fsync)
+            print(f"journal{' + fsync' if fsync else ''}: {args.journal / elapsed:,.0f} occurrences/s "
+                  f"in blocks of {args.block}, {size / args.journal:.1f} bytes each")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""Run the Collector over fake logs with injected latency and failures
+
+Every (host, log) is a MemoryEventSource fed by a producer thread and
+wrapped so each read sleeps for a random latency, and optionally fails
+for a while, as a remote host would. The merged stream is checked for
+order and the end-to-end delay from TimeGenerated to drain() reported.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_collector --hosts 4 --seconds 10 --rate 2000
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import datetime
+
+from src.collector.collector import Collector
+from src.event_viewer.event_source import EventRecord, EventSource, MemoryEventSource
+
+LOGS = ('Application', 'Security', 'System')
+
+
+class LatencyEventSource(EventSource):
+    """Wraps a source, sleeping before every call and failing while broken"""
+
+    def __init__(self, source, latency, rng, broken_until=0.0):
+        self.source = source
+        self.latency = latency
+        self.rng = rng
+        self.broken_until = broken_until
+
+    def _delay(self):
+        time.sleep(self.rng.uniform(0, self.latency))
+        if time.monotonic() < self.broken_until:
+            raise ConnectionError('host unreachable')
+
+    def record_range(self):
+        self._delay()
+        return self.source.record_range()
+
+    def read_from(self, record_number):
+        self._delay()
+        for batch in self.source.read_from(record_number):
+            yield batch
+            self._delay()
+
+
+def produce(logs, rate, seconds, stop):
+    rng = random.Random(2)
+    keys = list(logs)
+    interval = 1.0 / rate
+    start = time.monotonic()
+    produced = 0
+    while not stop.is_set() and time.monotonic() - start < seconds:
+        target = start + produced * interval
+        delay = target - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        logs[rng.choice(keys)].append(EventRecord('Bench', 1000 + produced % 50, 4,
+                                                  (f'event {produced}',), datetime.now()))
+        produced += 1
+    return produced
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--rate', type=float, default=2000.0, help='events per second across all logs')
+    parser.add_argument('--latency', type=float, default=0.05, help='max seconds per read call')
+    parser.add_argument('--broken', type=float, default=3.0,
+                        help='seconds the first host fails at startup')
+    parser.add_argument('--window', type=float, default=2.0)
+    parser.add_argument('--poll-interval', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    hosts = [f'host{i}' for i in range(args.hosts)]
+    logs = {(host, log_type): MemoryEventSource() for host in hosts for log_type in LOGS}
+    rng = random.Random(1)
+    broken_until = time.monotonic() + args.broken
+
+    def factory(host, log_type):
+        return LatencyEventSource(logs[(host, log_type)], args.latency, rng,
+                                  broken_until if host == hosts[0] else 0.0)
+
+    collector = Collector(factory, hosts, LOGS, poll_interval=args.poll_interval,
+                          reorder_window=args.window, backoff_initial=0.25, backoff_max=2.0)
+    collector.start()
+    # Let the readers place their cursors, or the first events count as backlog
+    time.sleep(2 * args.latency + 0.1)
+    stop = threading.Event()
+    result = {}
+    producer = threading.Thread(target=lambda: result.update(produced=produce(logs, args.rate, args.seconds, stop)))
+    producer.start()
+
+    merged, delays, inversions = 0, [], 0
+    last = None
+    deadline = time.monotonic() + args.seconds + args.window + 5 * args.poll_interval + 5
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        now = datetime.now()
+        for event in collector.drain():
+            merged += 1
+            delays.append((now - event.TimeGenerated).total_seconds())
+            if last is not None and event.TimeGenerated < last:
+                inversions += 1
+            last = event.TimeGenerated
+        if not producer.is_alive() and merged >= result.get('produced', -1):
+            break
+    stop.set()
+    producer.join()
+    collector.close()
+
+    delays.sort()
+    print(f"{result['produced']} produced, {merged} merged, {inversions} out of order")
+    if delays:
+        print(f"delay p50 {delays[len(delays) // 2]:.2f}s, p99 {delays[int(len(delays) * 0.99)]:.2f}s, "
+              f"max {delays[-1]:.2f}s")
+    for (host, log_type), stats in sorted(collector.stats().items()):
+        print(f"  {host}/{log_type}: {stats['events']} events, late {stats['late']}, "
+              f"failures {stats['failures']}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
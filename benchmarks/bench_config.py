@@ -0,0 +1,66 @@
+"""Time ConfigManager lookups, batched updates and change checks
+
+Compares update() of --keys keys (one write) with the same number of
+set() calls (one write each), cached dotted-key lookups with walking
+the dict, and check_for_changes() on an unchanged file with parsing it.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_config --keys 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import yaml
+
+from src.utils.config import YAML_LOADER, ConfigManager
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def walk(config, key):
+    value = config
+    for k in key.split('.'):
+        value = value.get(k) if isinstance(value, dict) else None
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        config = ConfigManager(os.path.join(directory, 'config.yaml'))
+        updates = {f'event_manager.setting_{i}': i for i in range(args.keys)}
+
+        one_by_one = timed(lambda: [config.set(key, value) for key, value in updates.items()], args.repeat)
+        batched = timed(lambda: config.update(updates), args.repeat)
+        print(f"{args.keys} keys: set() each {one_by_one * 1000:.2f} ms, "
+              f"update() {batched * 1000:.2f} ms ({one_by_one / batched:.1f}x)")
+
+        key = 'event_manager.history_retention'
+        lookups = 100000
+        cached = timed(lambda: config.get(key), lookups)
+        walked = timed(lambda: walk(config.config, key), lookups)
+        print(f"get('{key}'): cached {cached * 1e9:.0f} ns, walking the dict {walked * 1e9:.0f} ns")
+
+        def parse():
+            with open(config.config_file) as f:
+                yaml.load(f, Loader=YAML_LOADER)
+        checked = timed(config.check_for_changes, 10000)
+        parsed = timed(parse, args.repeat)
+        print(f"unchanged file: check_for_changes() {checked * 1e6:.1f} us, "
+              f"parsing it {parsed * 1e6:.0f} us")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
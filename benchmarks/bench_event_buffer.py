@@ -0,0 +1,100 @@
+"""Compare memory per event: record lists, row tuples and EventBuffer
+
+Events are held three ways, each measured with tracemalloc as the bytes
+still allocated once --events events have been added:
+
+    records    a list of the event records themselves, as the viewer
+               once kept them
+    tuples     a list of the row tuples EventTableModel held before
+               EventBuffer, still pointing at each record's own datetime
+               and strings
+    buffer     an EventBuffer with the same capacity
+
+Every record gets its own copies of its strings and insert tuple, as
+pywin32 hands them out, so pooling shows what it would on a real log.
+Real records also carry a SID and binary data, so the records figure is
+a lower bound. Each container is filled once more without tracing to
+time it.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_event_buffer --events 200000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from src.event_viewer.event_buffer import EventBuffer
+from src.event_viewer.event_source import EventRecord
+from src.utils.synthetic import SyntheticEvents
+
+
+def fresh(value):
+    # A new string object with the same text
+    return (value + '.')[:-1]
+
+
+def records(generator, count):
+    """Synthetic records whose strings belong to them alone"""
+    for event in generator.events(count):
+        yield EventRecord(fresh(event.SourceName), event.EventID, event.EventType,
+                          tuple(fresh(insert) for insert in event.StringInserts),
+                          event.TimeGenerated, event.RecordNumber, event.EventCategory,
+                          fresh(event.ComputerName))
+
+
+def row_tuple(event):
+    return (event.TimeGenerated, event.SourceName, event.EventID,
+            event.EventType, event.StringInserts, getattr(event, 'LogType', None),
+            1, event.TimeGenerated, None)
+
+
+def hold_records(events, count):
+    return list(events)
+
+
+def hold_tuples(events, count):
+    return [row_tuple(event) for event in events]
+
+
+def hold_buffer(events, count):
+    buffer = EventBuffer(count)
+    buffer.extend(events)
+    return buffer
+
+
+def measure(hold, args):
+    # The generator's own pools are allocated before tracing starts
+    generator = SyntheticEvents(distinct_messages=args.distinct_messages)
+    gc.collect()
+    tracemalloc.start()
+    held = hold(records(generator, args.events), args.events)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+
+    events = list(records(SyntheticEvents(distinct_messages=args.distinct_messages), args.events))
+    start = time.perf_counter()
+    held = hold(events, args.events)
+    elapsed = time.perf_counter() - start
+    del held
+    return size, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--distinct-messages', type=int, default=4096,
+                        help='distinct insert tuples in the synthetic log')
+    args = parser.parse_args(argv)
+
+    for name, hold in (('records', hold_records), ('tuples', hold_tuples), ('buffer', hold_buffer)):
+        size, elapsed = measure(hold, args)
+        print(f"{name:<8} {size / args.events:8.1f} bytes per event, "
+              f"{size / (1 << 20):8.1f} MiB, filled in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
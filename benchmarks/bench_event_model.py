@@ -0,0 +1,67 @@
+"""Render a large synthetic event list through EventTableModel
+
+Run from the repository root:
+
+    python -m benchmarks.bench_event_model --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication, QTableView
+from PyQt5.QtCore import Qt
+
+from src.event_viewer.event_model import EventTableModel, EventFilterProxyModel
+from src.utils.synthetic import SyntheticEvents
+
+
+def make_events(count, start_record=1):
+    return list(SyntheticEvents(first_record=start_record).events(count))
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<40} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--append', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    events = timed(f"generate {args.rows} events", lambda: make_events(args.rows))
+
+    model = EventTableModel(max_rows=args.rows)
+    proxy = EventFilterProxyModel()
+    proxy.setSourceModel(model)
+    view = QTableView()
+    view.setModel(proxy)
+    view.setSortingEnabled(True)
+    view.resize(1200, 800)
+    view.show()
+
+    timed("set_events (initial load)", lambda: model.set_events(events))
+    timed("sort by time, descending", lambda: view.sortByColumn(0, Qt.DescendingOrder))
+    timed("paint visible rows", lambda: (view.viewport().repaint(), app.processEvents()))
+    timed("resizeColumnsToContents", view.resizeColumnsToContents)
+
+    new_events = make_events(args.append, start_record=args.rows + 1)
+    timed(f"append_events ({args.append} new, evicting)", lambda: model.append_events(new_events))
+    timed("paint after append", lambda: (view.viewport().repaint(), app.processEvents()))
+    timed("sort by source", lambda: view.sortByColumn(1, Qt.AscendingOrder))
+    more_events = make_events(args.append, start_record=args.rows + args.append + 1)
+    timed(f"append_events ({args.append} new, source sort)", lambda: model.append_events(more_events))
+    timed("sort by time, descending", lambda: view.sortByColumn(0, Qt.DescendingOrder))
+    timed("filter on event type", lambda: proxy.set_type_filter('Error'))
+    print(f"rows in view after filter: {proxy.rowCount()}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
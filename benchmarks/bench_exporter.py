@@ -0,0 +1,89 @@
+"""Measure EventExporter throughput and memory on a large synthetic log
+
+Rows are generated lazily, so the growth in peak RSS is what the
+exporter itself holds. The old export built a list of rendered rows and
+a pandas DataFrame from it; --materialize reproduces the list half of
+that for comparison. Peak RSS is read with the resource module and is
+not reported where it is unavailable (Windows).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_exporter --events 5000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from src.event_viewer.exporter import EXPORT_FORMATS, EventExporter, ExportError, export_filename
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_rows(count):
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        if i % 3:
+            yield (start + timedelta(seconds=i), 'Security-Auditing', 4625, 16,
+                   ('logon failure', f'user{i % 5000}', f'10.0.{i % 256}.{i % 200}'))
+        else:
+            yield (start + timedelta(seconds=i), 'Service Control Manager', 7036, 4,
+                   ('svcdns', 'entered the running state'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--formats', nargs='*', default=['CSV', 'CSV (gzip)', 'JSON Lines (gzip)'],
+                        choices=list(EXPORT_FORMATS))
+    parser.add_argument('--materialize', action='store_true',
+                        help='also time building every row in memory first, like the old export')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.formats:
+            fmt, compression = EXPORT_FORMATS[name]
+            path = os.path.join(directory, export_filename('bench', fmt, compression))
+            before = peak_rss_mb()
+            start = time.perf_counter()
+            try:
+                count = EventExporter(fmt, compression).export(make_rows(args.events), path)
+            except ExportError as e:
+                print(f"{name}: skipped, {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(path) / (1 << 20)
+            line = (f"{name}: {count} events in {elapsed:.2f}s, {count / elapsed:,.0f} events/s, "
+                    f"{size:.1f} MB written")
+            if before is not None:
+                line += f", peak RSS {peak_rss_mb():.0f} MB (+{peak_rss_mb() - before:.0f} MB)"
+            print(line)
+            os.remove(path)
+
+        if args.materialize:
+            before = peak_rss_mb()
+            start = time.perf_counter()
+            data = [[row[0].strftime('%Y-%m-%d %H:%M:%S'), row[1], str(row[2]), str(row[3]), str(row[4])]
+                    for row in make_rows(args.events)]
+            elapsed = time.perf_counter() - start
+            line = f"materialized rows: {len(data)} in {elapsed:.2f}s"
+            if before is not None:
+                line += f", peak RSS {peak_rss_mb():.0f} MB (+{peak_rss_mb() - before:.0f} MB)"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
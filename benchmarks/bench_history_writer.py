@@ -0,0 +1,83 @@
+"""Compare HistoryWriter throughput with the old per-event pandas append
+
+The old EventManager.log_event built a one-row DataFrame and reopened
+the daily CSV for every triggered event; it is reproduced here as
+pandas_log_event. pandas is only needed for that baseline, which is
+skipped when it is not installed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_history_writer --rows 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from src.event_manager.history_writer import HistoryWriter
+
+
+def pandas_log_event(pd, directory, row):
+    timestamp, rule_name, event_time, source, event_id, event_type, message = row[:7]
+    data = {
+        'Timestamp': [timestamp.strftime('%Y-%m-%d %H:%M:%S')],
+        'Rule Name': [rule_name],
+        'Event Time': [event_time.strftime('%Y-%m-%d %H:%M:%S')],
+        'Source Name': [source],
+        'Event ID': [event_id],
+        'Event Type': [event_type],
+        'Message': [message]
+    }
+    df = pd.DataFrame(data)
+    history_file = os.path.join(directory, f'event_history_{datetime.now().strftime("%Y%m%d")}.csv')
+    if os.path.exists(history_file):
+        df.to_csv(history_file, mode='a', header=False, index=False)
+    else:
+        df.to_csv(history_file, index=False)
+
+
+def make_rows(count):
+    now = datetime.now()
+    return [(now, f'rule{i % 20}', now, 'Security-Auditing', 4625, 16,
+             str(('user%d' % (i % 500), '10.0.0.%d' % (i % 255))), 1, now)
+            for i in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--pandas-rows', type=int, default=2000,
+                        help='rows written through the pandas baseline')
+    args = parser.parse_args(argv)
+    rows = make_rows(args.rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        writer = HistoryWriter(os.path.join(directory, 'writer'))
+        start = time.perf_counter()
+        for row in rows:
+            writer.write(row)
+        enqueued = time.perf_counter() - start
+        writer.close()
+        total = time.perf_counter() - start
+        print(f"HistoryWriter: {args.rows} rows, caller blocked {enqueued * 1e6 / args.rows:.1f} us/row, "
+              f"{args.rows / total:,.0f} rows/s including durable close")
+
+        try:
+            import pandas as pd
+        except ImportError:
+            print("pandas not installed, skipping the per-event baseline")
+            return
+        baseline_dir = os.path.join(directory, 'pandas')
+        os.makedirs(baseline_dir)
+        sample = rows[:args.pandas_rows]
+        start = time.perf_counter()
+        for row in sample:
+            pandas_log_event(pd, baseline_dir, row)
+        elapsed = time.perf_counter() - start
+        print(f"pandas per event: {len(sample)} rows, {elapsed * 1e6 / len(sample):.1f} us/row, "
+              f"{len(sample) / elapsed:,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""Measure UI responsiveness while IngestWorker loads a large slow log
+
+A 10 ms probe timer runs on the GUI thread during the load; how late it
+fires is the latency a user clicking around would feel. The same load
+done synchronously on the GUI thread is timed for comparison.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ingest_latency --records 500000
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication, QTableView
+from PyQt5.QtCore import QObject, QThread, QTimer, QEventLoop, pyqtSignal
+
+from benchmarks.bench_event_model import make_events
+from src.event_viewer.event_model import EventTableModel, EventFilterProxyModel
+from src.event_viewer.event_source import EventLogReader, MemoryEventSource
+from src.event_viewer.ingest_worker import IngestWorker
+
+PROBE_INTERVAL_MS = 10
+
+
+class SlowMemorySource(MemoryEventSource):
+    """Memory log that sleeps for every batch, like a slow disk or remote host"""
+
+    def __init__(self, records, batch_delay, batch_size):
+        super().__init__(records, batch_size=batch_size)
+        self.batch_delay = batch_delay
+
+    def read_from(self, record_number):
+        for batch in super().read_from(record_number):
+            time.sleep(self.batch_delay)
+            yield batch
+
+
+class Requester(QObject):
+    fetch_requested = pyqtSignal(str, int, bool)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_threaded(app, source, args):
+    model = EventTableModel(max_rows=args.records)
+    proxy = EventFilterProxyModel()
+    proxy.setSourceModel(model)
+    view = QTableView()
+    view.setModel(proxy)
+    view.show()
+
+    thread = QThread()
+    worker = IngestWorker(lambda log_type: source, args.records, args.updates_per_second)
+    worker.moveToThread(thread)
+    requester = Requester()
+    requester.fetch_requested.connect(worker.fetch)
+
+    updates = []
+    loop = QEventLoop()
+
+    def on_batch(generation, reset, events):
+        if reset:
+            model.set_events(events)
+        else:
+            model.append_events(events)
+        updates.append(len(events))
+
+    worker.batch_ready.connect(on_batch)
+    worker.finished.connect(lambda generation: loop.quit())
+
+    lateness = []
+    last = [time.perf_counter()]
+
+    def probe():
+        now = time.perf_counter()
+        lateness.append(max(0.0, (now - last[0]) * 1000 - PROBE_INTERVAL_MS))
+        last[0] = now
+
+    timer = QTimer()
+    timer.timeout.connect(probe)
+    timer.start(PROBE_INTERVAL_MS)
+
+    cancelled_at = []
+    if args.cancel_after:
+        def cancel():
+            cancelled_at.append(time.perf_counter())
+            worker.cancel_before(1)
+        QTimer.singleShot(int(args.cancel_after * 1000), cancel)
+
+    thread.start()
+    start = time.perf_counter()
+    requester.fetch_requested.emit('Synthetic', 0, True)
+    loop.exec_()
+    elapsed = time.perf_counter() - start
+    timer.stop()
+    thread.quit()
+    thread.wait()
+
+    print(f"threaded load: {elapsed:.2f}s, {len(updates)} UI updates, {model.rowCount()} rows")
+    print(f"  probe lateness p50 {percentile(lateness, 0.5):.1f} ms, "
+          f"p99 {percentile(lateness, 0.99):.1f} ms, max {max(lateness or [0]):.1f} ms")
+    if cancelled_at:
+        print(f"  stopped {(time.perf_counter() - cancelled_at[0]) * 1000:.0f} ms after cancel")
+
+
+def run_synchronous(source, args):
+    model = EventTableModel(max_rows=args.records)
+    reader = EventLogReader(source, args.records)
+    start = time.perf_counter()
+    reset, events = reader.read_all()
+    model.set_events(events)
+    print(f"synchronous load: GUI thread blocked for {time.perf_counter() - start:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=500000)
+    parser.add_argument('--batch-size', type=int, default=512)
+    parser.add_argument('--batch-delay', type=float, default=0.002, help='seconds slept per batch')
+    parser.add_argument('--updates-per-second', type=float, default=4)
+    parser.add_argument('--cancel-after', type=float, default=0, help='cancel the load after this many seconds')
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    source = SlowMemorySource(make_events(args.records), args.batch_delay, args.batch_size)
+    run_threaded(app, source, args)
+    if not args.cancel_after:
+        run_synchronous(source, args)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
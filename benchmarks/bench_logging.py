@@ -0,0 +1,82 @@
+"""Compare what a log call costs the caller: queued logging vs a FileHandler
+
+The old setup_logger wrote and flushed every record synchronously
+through a FileHandler; the queued pipeline only creates the record in
+the caller and leaves formatting, writing and rotation to a listener
+thread, which flushes whenever its queue runs empty. Both write
+--records INFO records with %-style arguments to a temporary directory,
+without the console handler. --flush-ms adds a delay to every flush,
+standing in for a slow disk or network share.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_logging --records 200000
+"""
+import argparse
+import logging
+import os
+import queue
+import tempfile
+import time
+
+from src.utils.logger import LOG_FORMAT, DeferredQueueHandler, LogListener, RotatingLogHandler
+
+
+def slow_flush(cls, delay):
+    class SlowFlush(cls):
+        def flush(self):
+            super().flush()
+            if delay and self.stream is not None:
+                time.sleep(delay)
+    return SlowFlush
+
+
+def run(logger, records):
+    start = time.perf_counter()
+    for i in range(records):
+        logger.info("Rule %s matched %s event %d: %s", 'rule7', 'Security-Auditing', 4625, ('user', i))
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=200000)
+    parser.add_argument('--max-size-mb', type=float, default=10.0)
+    parser.add_argument('--flush-ms', type=float, default=0.0)
+    args = parser.parse_args(argv)
+    formatter = logging.Formatter(LOG_FORMAT)
+    delay = args.flush_ms / 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        logger = logging.getLogger('bench.file')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = slow_flush(logging.FileHandler, delay)(os.path.join(directory, 'sync.log'))
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+        elapsed = run(logger, args.records)
+        handler.close()
+        print(f"FileHandler: {elapsed * 1e6 / args.records:.1f} us per call in the caller")
+
+        logger = logging.getLogger('bench.queue')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = slow_flush(RotatingLogHandler, delay)(os.path.join(directory, 'queued'), 'app',
+                                                        int(args.max_size_mb * (1 << 20)), 0, True)
+        handler.setFormatter(formatter)
+        records = queue.SimpleQueue()
+        listener = LogListener(records, handler)
+        listener.start()
+        logger.addHandler(DeferredQueueHandler(records))
+        start = time.perf_counter()
+        elapsed = run(logger, args.records)
+        listener.stop()
+        total = time.perf_counter() - start
+        handler.close()
+        files = os.listdir(os.path.join(directory, 'queued'))
+        print(f"queued: {elapsed * 1e6 / args.records:.1f} us per call in the caller, "
+              f"{total:.2f}s until written, {len(files)} files after rotation")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
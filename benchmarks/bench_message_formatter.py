@@ -0,0 +1,71 @@
+"""Compare cached message rendering with resolving the template per event
+
+Template lookups go through a DictTemplateResolver wrapped to spin for
+--lookup-us microseconds, standing in for the registry read and message
+DLL load that SafeFormatMessage repeats for every event.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_message_formatter --events 200000
+"""
+import argparse
+import random
+import time
+
+from src.event_viewer.message_formatter import DictTemplateResolver, MessageFormatter, substitute
+
+
+def make_templates(sources, ids):
+    return {
+        (f'Source{s}', event_id): f'Event %1 from %2 on %3 with status %4.%n(id {event_id})'
+        for s in range(sources) for event_id in range(ids)
+    }
+
+
+class SlowResolver(DictTemplateResolver):
+    def __init__(self, templates, lookup_us):
+        super().__init__(templates)
+        self.lookup = lookup_us / 1e6
+
+    def __call__(self, log_type, source, event_id):
+        end = time.perf_counter() + self.lookup
+        while time.perf_counter() < end:
+            pass
+        return super().__call__(log_type, source, event_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--sources', type=int, default=50)
+    parser.add_argument('--ids', type=int, default=40)
+    parser.add_argument('--lookup-us', type=float, default=200.0)
+    parser.add_argument('--cache-size', type=int, default=4096)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    resolver = SlowResolver(make_templates(args.sources, args.ids), args.lookup_us)
+    # Storms are skewed: a few (source, id) pairs make up most events
+    keys = [(f'Source{int(rng.paretovariate(1.2)) % args.sources}', int(rng.paretovariate(1.2)) % args.ids)
+            for _ in range(args.events)]
+    inserts = ('logon', 'WORKSTATION7', 'CONTOSO', '0xC000006D')
+
+    formatter = MessageFormatter(resolver, args.cache_size)
+    start = time.perf_counter()
+    for source, event_id in keys:
+        formatter.format('Application', source, event_id, inserts)
+    cached = time.perf_counter() - start
+    stats = formatter.stats()
+    print(f"cached: {args.events} messages in {cached:.2f}s ({cached * 1e6 / args.events:.1f} us/message), "
+          f"hits {stats['hits']}, misses {stats['misses']}, evictions {stats['evictions']}")
+
+    sample = keys[:max(args.events // 20, 1)]
+    start = time.perf_counter()
+    for source, event_id in sample:
+        substitute(resolver('Application', source, event_id), inserts)
+    uncached = time.perf_counter() - start
+    print(f"per event: {len(sample)} messages in {uncached:.2f}s ({uncached * 1e6 / len(sample):.1f} us/message)")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""Measure what instrumentation costs, with metrics disabled and enabled
+
+Times single metric operations on the no-op and real registries, then
+runs the same synthetic feed through RuleEngine.check_events with each,
+in batches as the collector delivers them.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_metrics --events 500000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src.event_manager.rule_engine import RuleEngine
+from src.utils import metrics
+from src.utils.config import ConfigManager
+from src.utils.synthetic import SyntheticEvents
+
+
+def per_call(function, repeat=1000000):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e9
+
+
+def run_engine(events, rules, batch, directory):
+    os.makedirs(directory)
+    config = ConfigManager(os.path.join(directory, 'config.yaml'))
+    config.config['event_manager']['history_directory'] = os.path.join(directory, 'history')
+    engine = RuleEngine(config=config, rules_file=os.path.join(directory, 'rules.yaml'))
+    for rule in rules:
+        engine.add_rule(rule)
+    start = time.perf_counter()
+    for i in range(0, len(events), batch):
+        engine.check_events(events[i:i + batch])
+    elapsed = time.perf_counter() - start
+    engine.shutdown()
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=500000)
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    null, real = metrics.NullRegistry(), metrics.MetricsRegistry()
+    for name, registry in (('disabled', null), ('enabled', real)):
+        counter = registry.counter('bench_total')
+        histogram = registry.histogram('bench_seconds')
+        print(f"{name}: counter.inc {per_call(counter.inc):.0f} ns, "
+              f"histogram.observe {per_call(lambda: histogram.observe(0.003)):.0f} ns")
+
+    generator = SyntheticEvents(sources=40, ids_per_source=8)
+    events = list(generator.events(args.events))
+    rules = generator.rules(50, action='Log')
+    with tempfile.TemporaryDirectory() as directory:
+        results = {}
+        for name, registry in (('disabled', null), ('enabled', real)):
+            metrics._registry = registry
+            results[name] = run_engine(events, rules, args.batch, os.path.join(directory, name))
+            print(f"check_events {name}: {args.events / results[name]:,.0f} events/s")
+        metrics._registry = null
+    print(f"enabled overhead: {(results['enabled'] / results['disabled'] - 1) * 100:+.1f}%")
+    print(f"{len(real.prometheus_text().splitlines())} lines of Prometheus text")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
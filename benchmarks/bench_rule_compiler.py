@@ -0,0 +1,126 @@
+"""Compare compiled rule conditions with walking their syntax tree per event
+
+Both paths dispatch through the same RuleIndex (ID lists and ranges
+included) and then test each candidate rule's condition: once through
+the closures from RuleCompiler, once by interpreting the parsed tree
+for every event, looking regexes up by pattern string as re.search
+does. The match counts must agree.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_rule_compiler --rules 200 --events 1000000
+"""
+import argparse
+import random
+import re
+import time
+
+from src.event_manager.rule_compiler import FIELD_GETTERS, RuleCompiler, parse_condition
+from src.event_manager.rule_index import RuleIndex
+from src.event_viewer.event_source import EventRecord
+
+SOURCES = ['Security', 'Service Control Manager', 'Application Error', 'DNS Client', 'Schannel']
+WORDS = ['denied', 'svchost.exe', 'logon', 'failure', 'timeout', 'svcdns', 'ok', 'started']
+CONDITIONS = [
+    'type in [Error, Warning]',
+    'message contains "{word}"',
+    'message ~ /svc(host|dns)/i and not type = Information',
+    'category > 2 or message contains {word}',
+    '(message contains {word} or message contains "refused") and id in [{low}..{high}, 7036]',
+    'not (type = Information and category = 0)',
+]
+
+
+def make_rules(count, rng):
+    rules = []
+    for i in range(count):
+        low = rng.randrange(4600, 4800)
+        event_id = f'{low}-{low + rng.randrange(5, 40)}' if i % 2 else f'{low}, {low + 7}, 7036'
+        rules.append({
+            'name': f'rule{i}',
+            'source': rng.choice(SOURCES) if i % 10 else '*',
+            'event_id': event_id,
+            'condition': CONDITIONS[i % len(CONDITIONS)].format(
+                word=rng.choice(WORDS), low=low, high=low + 20),
+        })
+    return rules
+
+
+def make_events(count, rng):
+    return [EventRecord(rng.choice(SOURCES), rng.randrange(4600, 4850), rng.choice((1, 2, 4, 4, 4)),
+                        (f'user{i % 500}', rng.choice(WORDS), rng.choice(WORDS)),
+                        EventCategory=rng.randrange(5))
+            for i in range(count)]
+
+
+def evaluate(node, event):
+    """The interpreted path: walk the tree for every event"""
+    kind = node[0]
+    if kind == 'and':
+        return all(evaluate(child, event) for child in node[1])
+    if kind == 'or':
+        return any(evaluate(child, event) for child in node[1])
+    if kind == 'not':
+        return not evaluate(node[1], event)
+    _, field, op, value = node
+    actual = FIELD_GETTERS[field](event)
+    if isinstance(actual, str):
+        if op == '~':
+            return re.search(value[0], actual, value[1]) is not None
+        actual = actual.casefold()
+    if op == 'contains':
+        return value in actual
+    if op == 'in':
+        return any(item[0] <= actual <= item[1] if isinstance(item, tuple) else actual == item
+                   for item in value)
+    return {'=': actual == value, '!=': actual != value, '<': actual < value,
+            '<=': actual <= value, '>': actual > value, '>=': actual >= value}[op]
+
+
+def run(events, index, conditions):
+    matched = 0
+    start = time.perf_counter()
+    for event in events:
+        for rule in index.match(event.SourceName, event.EventID):
+            if conditions[id(rule)](event):
+                matched += 1
+    return time.perf_counter() - start, matched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=200)
+    parser.add_argument('--events', type=int, default=1000000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    rules = make_rules(args.rules, rng)
+    events = make_events(args.events, rng)
+    index = RuleIndex(rules)
+
+    compiler = RuleCompiler()
+    start = time.perf_counter()
+    compiled = {id(rule): compiler.compile_rule(rule) for rule in rules}
+    compile_time = time.perf_counter() - start
+    trees = {id(rule): parse_condition(rule['condition']) for rule in rules}
+    interpreted = {key: (lambda event, tree=tree: evaluate(tree, event)) for key, tree in trees.items()}
+    print(f"{args.rules} rules compiled in {compile_time * 1000:.1f} ms, "
+          f"{len(compiler.patterns)} distinct regexes")
+
+    dispatch_time, _ = run(events, index, {key: bool for key in compiled})
+    print(f"index dispatch alone: {dispatch_time:.2f}s")
+    compiled_time, compiled_matches = run(events, index, compiled)
+    interpreted_time, interpreted_matches = run(events, index, interpreted)
+    print(f"compiled:    {args.events} events in {compiled_time:.2f}s "
+          f"({args.events / compiled_time:,.0f} events/s, {compiled_matches} matches)")
+    print(f"interpreted: {args.events} events in {interpreted_time:.2f}s "
+          f"({args.events / interpreted_time:,.0f} events/s, {interpreted_matches} matches), "
+          f"{interpreted_time / compiled_time:.1f}x slower")
+    print(f"conditions alone: compiled {compiled_time - dispatch_time:.2f}s, "
+          f"interpreted {interpreted_time - dispatch_time:.2f}s")
+    if compiled_matches != interpreted_matches:
+        print("MISMATCH between compiled and interpreted results")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
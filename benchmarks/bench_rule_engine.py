@@ -0,0 +1,96 @@
+"""Measure headless RuleEngine startup, memory and sustained throughput
+
+A synthetic feed of --events events over --keys (source, event id)
+pairs goes straight into RuleEngine.check_event with --rules rules
+loaded, a share of them matching. Log actions go through the real
+HistoryWriter into a temporary directory; Command actions are left out
+so no processes are started. Peak RSS is reported where the resource
+module exists.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_rule_engine --events 1000000 --rules 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+start_import = time.perf_counter()
+from src.event_manager.rule_engine import RuleEngine  # noqa: E402
+from src.event_viewer.event_source import EventRecord  # noqa: E402
+from src.utils.config import ConfigManager  # noqa: E402
+import_time = time.perf_counter() - start_import
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def make_rules(count, keys):
+    rules = []
+    for i in range(count):
+        source, event_id = keys[i % len(keys)]
+        rules.append({
+            'name': f'rule{i}',
+            'event_id': str(event_id) if i % 3 else '*',
+            'source': source,
+            'action': 'Log',
+            'action_params': '',
+            'occurrence_count': 5 + i % 20,
+            'time_window': 1 + i % 10,
+        })
+    return rules
+
+
+def make_events(count, keys, seed=1):
+    rng = random.Random(seed)
+    now = datetime.now()
+    for i in range(count):
+        source, event_id = keys[rng.randrange(len(keys))]
+        yield EventRecord(source, event_id, 4, ('user%d' % (i % 1000), 'WORKSTATION'), now, i + 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--rules', type=int, default=200)
+    parser.add_argument('--keys', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    keys = [(f'Source{i % 300}', 1000 + i) for i in range(args.keys)]
+    with tempfile.TemporaryDirectory() as directory:
+        config = ConfigManager(os.path.join(directory, 'config.yaml'))
+        config.config['event_manager']['history_directory'] = os.path.join(directory, 'history')
+
+        start = time.perf_counter()
+        engine = RuleEngine(config=config, rules_file=os.path.join(directory, 'rules.yaml'))
+        engine.rules = make_rules(args.rules, keys)
+        engine.save_rules()
+        engine.load_rules()
+        startup = time.perf_counter() - start
+        print(f"import {import_time * 1000:.0f} ms, engine ready in {startup * 1000:.0f} ms, "
+              f"Qt loaded: {any(name.startswith('PyQt5') for name in sys.modules)}")
+
+        events = list(make_events(args.events, keys))
+        start = time.perf_counter()
+        for event in events:
+            engine.check_event(event)
+        elapsed = time.perf_counter() - start
+        engine.shutdown()
+        total = time.perf_counter() - start
+        print(f"{args.events} events in {elapsed:.2f}s, {args.events / elapsed:,.0f} events/s, "
+              f"{engine.actions_triggered} actions, {engine.history_writer.written} history rows "
+              f"({total:.2f}s including history flush)")
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak = peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+            print(f"peak RSS {peak:.0f} MB (includes the pre-built event list)")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
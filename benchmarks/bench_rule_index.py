@@ -0,0 +1,83 @@
+"""Compare RuleIndex dispatch with the old linear rule scan
+
+The linear scan is what EventManager.check_event used to do for every
+event. At 10k rules it is far too slow to run over 1M events, so it is
+timed on a sample and extrapolated.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_rule_index --rules 10000 --events 1000000
+"""
+import argparse
+import random
+import time
+
+from src.event_manager.rule_index import RuleIndex
+
+
+def make_rules(count, sources, rng):
+    rules = []
+    for i in range(count):
+        source = rng.choice(sources)
+        event_id = str(rng.randrange(1000, 9000))
+        if i % 50 == 0:
+            source = '*'
+        elif i % 70 == 0:
+            event_id = ''
+        rules.append({'name': f'rule{i}', 'source': source, 'event_id': event_id})
+    return rules
+
+
+def make_events(count, sources, rng):
+    return [(rng.choice(sources), rng.randrange(1000, 9000)) for _ in range(count)]
+
+
+def linear_match(rules, source, event_id):
+    return [rule for rule in rules
+            if rule['event_id'] == str(event_id) and rule['source'] == source]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=10000)
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--linear-sample', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    sources = [f'Source{i}' for i in range(200)]
+    rules = make_rules(args.rules, sources, rng)
+    events = make_events(args.events, sources, rng)
+
+    start = time.perf_counter()
+    index = RuleIndex(rules)
+    print(f"build index over {len(index)} rules: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    matches = 0
+    start = time.perf_counter()
+    match = index.match
+    for source, event_id in events:
+        matches += len(match(source, event_id))
+    indexed = time.perf_counter() - start
+    print(f"indexed: {args.events} events in {indexed:.2f}s "
+          f"({args.events / indexed:,.0f} events/s, {matches} matches)")
+
+    sample = events[:args.linear_sample]
+    start = time.perf_counter()
+    for source, event_id in sample:
+        linear_match(rules, source, event_id)
+    linear = (time.perf_counter() - start) / len(sample) * args.events
+    print(f"linear: {args.events} events in ~{linear:.0f}s "
+          f"(extrapolated from {len(sample)}), {linear / indexed:,.0f}x slower")
+
+    start = time.perf_counter()
+    for rule in rules[:1000]:
+        index.remove(rule)
+    for rule in rules[:1000]:
+        index.add(rule)
+    print(f"remove + re-add 1000 rules: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""Compare SearchIndex queries with a naive substring scan
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search_index --events 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from src.event_viewer.event_source import EventRecord
+from src.event_viewer.search_index import SearchIndex, SearchQuery, message_text
+
+QUERIES = [
+    'alice',
+    '10.20.30.40',
+    'svc*',
+    '"logon failure alice"',
+    'source:security-auditing id:4625 bob',
+    'id:7036 after:2024-01-05 before:2024-01-06',
+]
+
+
+def make_events(count, seed):
+    rng = random.Random(seed)
+    users = ['alice', 'bob', 'carol', 'dave'] + [f'user{i}' for i in range(5000)]
+    services = [f'svc{name}' for name in ('dns', 'dhcp', 'spooler', 'wuauserv', 'bits')]
+    start = datetime(2024, 1, 1)
+    events = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            inserts = ('logon failure', rng.choice(users),
+                       f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}')
+            source, event_id = 'Security-Auditing', 4625
+        elif kind < 0.8:
+            inserts = (rng.choice(services), 'entered the running state')
+            source, event_id = 'Service Control Manager', 7036
+        else:
+            inserts = ('logon success', rng.choice(users), f'WORKSTATION{rng.randrange(900)}')
+            source, event_id = 'Security-Auditing', 4624
+        events.append(EventRecord(source, event_id, 4, inserts, start + timedelta(seconds=i), i + 1))
+    return events
+
+
+def naive_scan(events, text):
+    needle = text.lower()
+    return [i for i, event in enumerate(events) if needle in message_text(event.StringInserts).lower()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    events = make_events(args.events, args.seed)
+    index = SearchIndex(lambda i: message_text(events[i].StringInserts))
+    start = time.perf_counter()
+    index.add_events(0, events)
+    build = time.perf_counter() - start
+    print(f"index {args.events} events: {build:.2f}s ({args.events / build:,.0f} events/s), "
+          f"{len(index._postings)} distinct tokens")
+
+    for text in QUERIES:
+        query = SearchQuery(text)
+        start = time.perf_counter()
+        ids = index.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"  {text!r:<50} {len(ids):>8} rows {elapsed:8.1f} ms")
+
+    for text in ('alice', '10.20.30.40'):
+        start = time.perf_counter()
+        ids = naive_scan(events, text)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"naive substring {text!r:<34} {len(ids):>8} rows {elapsed:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
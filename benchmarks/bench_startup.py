@@ -0,0 +1,77 @@
+"""Check import time against a budget, failing when it is exceeded
+
+Each module is imported --runs times in a fresh interpreter and the
+median time kept. The headless entry point must also stay free of Qt
+and pywin32. Exits with status 1 when a budget is broken, so it can
+run as a regression check in CI.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup --headless-budget-ms 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules the headless entry point must never load
+FORBIDDEN = ('PyQt5', 'win32evtlog', 'win32api')
+# Median import time allowed for src.headless; tests/test_startup.py holds it
+HEADLESS_BUDGET_MS = 150.0
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, sorted(sys.modules)]))
+'''
+
+
+def time_import(module, runs):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    timings, modules = [], []
+    # One extra, untimed run so bytecode is compiled beforehand
+    for i in range(runs + 1):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(module=module)], cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+        elapsed, modules = json.loads(output.splitlines()[-1])
+        if i:
+            timings.append(elapsed)
+    return statistics.median(timings), modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--headless-budget-ms', type=float, default=HEADLESS_BUDGET_MS)
+    parser.add_argument('--gui-budget-ms', type=float, default=None,
+                        help='also time src.main (needs PyQt5)')
+    args = parser.parse_args(argv)
+
+    failed = False
+    elapsed, modules = time_import('src.headless', args.runs)
+    loaded = [name for name in modules if name.split('.')[0] in FORBIDDEN]
+    print(f"src.headless: {elapsed * 1000:.0f} ms median, {len(modules)} modules "
+          f"(budget {args.headless_budget_ms:.0f} ms)")
+    if loaded:
+        print(f"FAIL: src.headless loads {', '.join(loaded)}")
+        failed = True
+    if elapsed * 1000 > args.headless_budget_ms:
+        print("FAIL: headless import over budget")
+        failed = True
+
+    if args.gui_budget_ms is not None:
+        elapsed, modules = time_import('src.main', args.runs)
+        print(f"src.main: {elapsed * 1000:.0f} ms median, {len(modules)} modules "
+              f"(budget {args.gui_budget_ms:.0f} ms)")
+        if elapsed * 1000 > args.gui_budget_ms:
+            print("FAIL: GUI import over budget")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
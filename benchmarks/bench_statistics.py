@@ -0,0 +1,98 @@
+"""Time EventStatistics ingest, dashboard queries, saving and loading
+
+A synthetic log covering --hours hours ending now is counted in
+reader-sized batches, as the collector and the viewer's reader do.
+Every query the Statistics tab makes is then timed at each period, and
+compared with answering "events per source per minute over the last
+24 hours" by rescanning the events, as had to be done before. The
+rollups are saved and loaded again, with the file size and the memory
+they take.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_statistics --events 1000000 --hours 48
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.event_store.statistics import EventStatistics
+from src.event_viewer.statistics_panel import PERIODS
+from src.utils.synthetic import SyntheticEvents
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def rescan(events, now):
+    """Events per source per minute over the last 24 hours, from the events"""
+    first = int(now // 60) - 1439
+    counts = {}
+    for event in events:
+        minute = int(event.TimeGenerated.timestamp() // 60)
+        if minute >= first:
+            per_minute = counts.setdefault(event.SourceName, [0] * 1440)
+            per_minute[minute - first] += 1
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--hours', type=float, default=48)
+    parser.add_argument('--sources', type=int, default=50)
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    start = datetime.now() - timedelta(hours=args.hours)
+    generator = SyntheticEvents(sources=args.sources, rate=args.events / (args.hours * 3600), start=start)
+    events = list(generator.events(args.events))
+    batches = [events[i:i + args.batch] for i in range(0, len(events), args.batch)]
+    # Bursts compress simulated time, so "now" is the newest event
+    now = events[-1].TimeGenerated.timestamp()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'statistics.dat')
+        tracemalloc.start()
+        statistics = EventStatistics(path, save_interval=float('inf'))
+        for batch in batches:
+            statistics.add('localhost', 'System', batch)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        statistics = EventStatistics(path, save_interval=float('inf'))
+        begin = time.perf_counter()
+        for batch in batches:
+            statistics.add('localhost', 'System', batch)
+        elapsed = time.perf_counter() - begin
+        print(f"ingest: {len(events) / elapsed:,.0f} events/s into {len(statistics.series):,} series, "
+              f"{size / (1 << 20):.1f} MiB held")
+
+        for label, resolution, buckets in PERIODS:
+            top, top_time = timed(statistics.top, 'source', resolution, buckets, 20, now)
+            _, trend_time = timed(lambda: [statistics.counts(resolution, buckets, now, source=value)
+                                           for value, _ in top])
+            _, spike_time = timed(statistics.spikes, 'source', resolution, min(buckets, 60), now=now)
+            print(f"{label:<26} top 20 {top_time * 1000:6.1f} ms, their trends "
+                  f"{trend_time * 1000:6.1f} ms, spikes {spike_time * 1000:6.1f} ms")
+
+        _, grouped_time = timed(statistics.grouped, 'source', 'minute', 1440, now)
+        _, rescan_time = timed(rescan, events, now)
+        print(f"per source per minute, last 24h: {grouped_time * 1000:.1f} ms from the rollups, "
+              f"{rescan_time * 1000:.0f} ms rescanning {len(events):,} events")
+
+        statistics._dirty = True
+        _, save_time = timed(statistics.save)
+        _, load_time = timed(EventStatistics, path)
+        print(f"save {save_time * 1000:.0f} ms, load {load_time * 1000:.0f} ms, "
+              f"{os.path.getsize(path) / (1 << 20):.1f} MiB on disk")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""Run the regression benchmark suite and write a JSON report
+
+Every case runs at each --sizes event count on the same deterministic
+synthetic log (src.utils.synthetic), inside a scratch directory so the
+config, rules and history files it creates start from defaults and are
+thrown away. Cases:
+
+    check_event        RuleEngine.check_event, rules on ids only, Popup actions
+                       (only logged, so the history writer is left out)
+    conditions         the same with conditions on half the rules
+    display_events     EventViewer.display_events and a repaint (offscreen Qt)
+    log_event          RuleEngine.log_event into the history writer, until flushed
+    csv_export         EventExporter writing CSV
+    config             ConfigManager get() per event and update() per 1000
+
+The report holds the git revision, Python and platform, the generator
+settings and, per case and size, the best of --repeat runs. With
+--compare, cases more than --tolerance slower than in an earlier report
+are listed and the exit status is 1. Cases whose dependencies are
+missing (PyQt5 for display_events) are recorded as skipped. Nothing
+needs pywin32.
+
+Run from the repository root:
+
+    python -m benchmarks.suite --sizes 10000 100000 1000000 --report benchmark-report.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from src.utils.synthetic import SyntheticEvents
+
+GENERATOR = {'seed': 1, 'sources': 12, 'ids_per_source': 40, 'id_skew': 1.1,
+             'message_size': [20, 200], 'burst_probability': 0.001}
+RULES = 200
+
+
+def make_generator():
+    options = dict(GENERATOR, message_size=tuple(GENERATOR['message_size']))
+    return SyntheticEvents(**options)
+
+
+class Skipped(Exception):
+    pass
+
+
+def make_engine(rules):
+    from src.event_manager.rule_engine import RuleEngine
+    from src.utils.config import ConfigManager
+    engine = RuleEngine(config=ConfigManager('config/config.yaml'), rules_file='config/rules.yaml')
+    for rule in rules:
+        engine.add_rule(rule)
+    return engine
+
+
+def run_rules(events, conditions):
+    engine = make_engine(make_generator().rules(RULES, conditions=conditions, action='Popup'))
+    start = time.perf_counter()
+    for event in events:
+        engine.check_event(event)
+    elapsed = time.perf_counter() - start
+    engine.shutdown()
+    return elapsed, {'actions': engine.actions_triggered, 'matches': engine.rule_matches}
+
+
+def case_check_event(events):
+    return run_rules(events, conditions=False)
+
+
+def case_conditions(events):
+    return run_rules(events, conditions=True)
+
+
+def case_display_events(events):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        raise Skipped("PyQt5 is not installed")
+    from src.utils.config import get_config
+    app = QApplication.instance() or QApplication(sys.argv)
+    get_config().set('event_viewer.max_events', len(events))
+    from src.event_viewer.event_viewer import EventViewer
+    viewer = EventViewer()
+    viewer.refresh_timer.stop()
+    viewer.resize(1200, 800)
+    viewer.show()
+    start = time.perf_counter()
+    viewer.display_events(events)
+    viewer.event_table.viewport().repaint()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    viewer.shutdown()
+    viewer.deleteLater()
+    app.processEvents()
+    return elapsed, {}
+
+
+def case_log_event(events):
+    engine = make_engine([])
+    rule = {'name': 'bench', 'action': 'Log', 'action_params': ''}
+    start = time.perf_counter()
+    for event in events:
+        engine.log_event(event, rule)
+    enqueued = time.perf_counter() - start
+    engine.shutdown()
+    elapsed = time.perf_counter() - start
+    return elapsed, {'enqueue_seconds': round(enqueued, 4), 'written': engine.history_writer.written,
+                     'dropped': engine.history_writer.dropped}
+
+
+def case_csv_export(events):
+    from src.event_viewer.exporter import EventExporter, row_from_event
+    start = time.perf_counter()
+    count = EventExporter('csv').export(map(row_from_event, events), 'export.csv')
+    elapsed = time.perf_counter() - start
+    return elapsed, {'bytes': os.path.getsize('export.csv'), 'rows': count}
+
+
+def case_config(events):
+    from src.utils.config import ConfigManager
+    config = ConfigManager('config/config.yaml')
+    key = 'event_manager.history_retention'
+    updates = max(len(events) // 1000, 1)
+    start = time.perf_counter()
+    for _ in events:
+        config.get(key)
+    looked_up = time.perf_counter() - start
+    for i in range(updates):
+        config.update({'event_viewer.refresh_interval': 30 + i % 2, 'event_viewer.max_events': 1000 + i})
+    elapsed = time.perf_counter() - start
+    return elapsed, {'get_seconds': round(looked_up, 4), 'updates': updates}
+
+
+CASES = {
+    'check_event': case_check_event,
+    'conditions': case_conditions,
+    'display_events': case_display_events,
+    'log_event': case_log_event,
+    'csv_export': case_csv_export,
+    'config': case_config,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True,
+                              text=True, timeout=10, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_case(name, events, repeat):
+    """Best of repeat runs, each in a fresh scratch directory"""
+    best, details = None, {}
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                gc.collect()
+                elapsed, extra = CASES[name](events)
+            finally:
+                os.chdir(cwd)
+        if best is None or elapsed < best:
+            best, details = elapsed, extra
+    return {'case': name, 'size': len(events), 'seconds': round(best, 4),
+            'events_per_second': round(len(events) / best), **details}
+
+
+def compare(results, previous, tolerance):
+    """Results more than tolerance slower than the same case and size before"""
+    before = {(result['case'], result['size']): result for result in previous['results']}
+    regressions = []
+    for result in results:
+        old = before.get((result['case'], result['size']))
+        if old is None or 'seconds' not in old or 'seconds' not in result:
+            continue
+        change = result['seconds'] / old['seconds'] - 1
+        if change > tolerance:
+            regressions.append((result, old, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case and size; the best is kept')
+    parser.add_argument('--report', default='benchmark-report.json')
+    parser.add_argument('--compare', help='an earlier report to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='slowdown against --compare that counts as a regression')
+    args = parser.parse_args(argv)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'generator': GENERATOR,
+        'rules': RULES,
+        'results': [],
+    }
+    for size in sorted(args.sizes):
+        start = time.perf_counter()
+        events = list(make_generator().events(size))
+        print(f"{size} events generated in {time.perf_counter() - start:.2f}s")
+        for name in args.cases:
+            try:
+                result = run_case(name, events, args.repeat)
+            except Skipped as e:
+                result = {'case': name, 'size': size, 'skipped': str(e)}
+                print(f"  {name:<15} skipped: {e}")
+            else:
+                print(f"  {name:<15} {result['seconds']:8.3f}s  {result['events_per_second']:>12,} events/s")
+            report['results'].append(result)
+        del events
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"report written to {args.report}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        regressions = compare(report['results'], previous, args.tolerance)
+        for result, old, change in regressions:
+            print(f"REGRESSION {result['case']} at {result['size']}: {old['seconds']:.3f}s -> "
+                  f"{result['seconds']:.3f}s ({change * 100:+.0f}%, was {previous.get('revision')})")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,5 +1,30 @@
-import sys
-from src.main import main
-
-if __name__ == '__main__':
-    main() 
\ No newline at end of file
+import argparse
+import sys
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='All-Event-in-One')
+    parser.add_argument('--headless', action='store_true',
+                        help='run the rule engine without the GUI (no Qt import)')
+    parser.add_argument('--config', default='config/config.yaml',
+                        help='configuration file for --headless')
+    parser.add_argument('--rules', default='config/rules.yaml',
+                        help='rules file for --headless')
+    parser.add_argument('--duration', type=float, default=None,
+                        help='stop --headless after this many seconds')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print per-phase and per-import startup timings; the GUI quits once shown')
+    # Anything else is left for Qt
+    return parser.parse_known_args(argv)[0]
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.profile_startup:
+        from src.utils.startup import start_profiling
+        start_profiling()
+    if args.headless:
+        from src.headless import main as headless_main
+        sys.exit(headless_main(args.config, args.rules, args.duration))
+    from src.main import main
+    main()
\ No newline at end of file
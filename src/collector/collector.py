@@ -0,0 +1,324 @@
+import heapq
+import logging
+import random
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.event_viewer.event_source import EventLogReader, EventSource, LogResetError
+
+SourceKey = Tuple[str, str]  # (host, log type)
+
+
+class CollectedEvent(namedtuple('CollectedEvent', ['Host', 'LogType', 'event'])):
+    """An event record tagged with the host and log it was read from
+
+    Record fields are passed through, so it can be handed to anything
+    that takes an event record (EventManager.check_event, the viewer).
+    """
+    __slots__ = ()
+
+    RecordNumber = property(lambda self: self.event.RecordNumber)
+    TimeGenerated = property(lambda self: self.event.TimeGenerated)
+    SourceName = property(lambda self: self.event.SourceName)
+    EventID = property(lambda self: self.event.EventID)
+    EventType = property(lambda self: self.event.EventType)
+    EventCategory = property(lambda self: self.event.EventCategory)
+    StringInserts = property(lambda self: self.event.StringInserts)
+    ComputerName = property(lambda self: self.event.ComputerName)
+
+
+class ReorderBuffer:
+    """K-way merge of per-source event streams into TimeGenerated order
+
+    Each source delivers its own events in time order, so an event can be
+    released once every source has delivered something at least as new
+    (the watermark). A source whose last poll came back empty vouches for
+    everything up to the time that poll started. So that one slow
+    or unreachable source cannot stall the rest, an event is also
+    released once it is `window` seconds older than the newest event
+    seen, once it has waited `window` seconds, or when more than
+    max_buffer events are held. Events that turn up older than what has
+    already been released are passed through and counted as late.
+    """
+
+    def __init__(self, window: float = 5.0, max_buffer: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.max_buffer = max_buffer
+        self.clock = clock
+        self._heap = []
+        self._seq = 0
+        self._watermarks: Dict[SourceKey, float] = {}
+        self._newest = float('-inf')
+        self._released = float('-inf')
+        self.late: Dict[SourceKey, int] = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add_source(self, key: SourceKey) -> None:
+        # Holds everything back until its first poll
+        self._watermarks[key] = float('-inf')
+        self.late.setdefault(key, 0)
+
+    def remove_source(self, key: SourceKey) -> None:
+        self._watermarks.pop(key, None)
+
+    def push(self, key: SourceKey, items: Iterable) -> None:
+        arrival = self.clock()
+        timestamp = None
+        for item in items:
+            timestamp = item.TimeGenerated.timestamp()
+            if timestamp < self._released:
+                self.late[key] = self.late.get(key, 0) + 1
+            heapq.heappush(self._heap, (timestamp, self._seq, arrival, item))
+            self._seq += 1
+        if timestamp is not None:
+            self._watermarks[key] = timestamp
+            self._newest = max(self._newest, timestamp)
+
+    def caught_up(self, key: SourceKey, as_of: float) -> None:
+        """Nothing older than as_of (epoch seconds) is still to come from key"""
+        if key in self._watermarks:
+            self._watermarks[key] = max(self._watermarks[key], as_of)
+
+    def pop_ready(self, limit: Optional[int] = None) -> list:
+        watermark = min(self._watermarks.values(), default=float('inf'))
+        cutoff = max(watermark, self._newest - self.window)
+        expired = self.clock() - self.window
+        heap, ready = self._heap, []
+        while heap and (limit is None or len(ready) < limit):
+            timestamp, _, arrival, item = heap[0]
+            if timestamp > cutoff and arrival > expired and len(heap) <= self.max_buffer:
+                break
+            heapq.heappop(heap)
+            self._released = max(self._released, timestamp)
+            ready.append(item)
+        return ready
+
+
+class SourceReader(threading.Thread):
+    """Polls one (host, log) with its own cursor, backing off on errors
+
+    After a failure the source is reopened on the next attempt but the
+    cursor is kept, so reading resumes where it stopped. Retry delays
+    double from backoff_initial up to backoff_max, with jitter so that
+    readers of a host that went away do not retry in lockstep.
+    """
+
+    def __init__(self, collector: 'Collector', key: SourceKey,
+                 source_factory: Callable[[str, str], EventSource]):
+        super().__init__(name=f'SourceReader-{key[0]}-{key[1]}', daemon=True)
+        self.collector = collector
+        self.key = key
+        self.source_factory = source_factory
+        self.reader: Optional[EventLogReader] = None
+        # (record number, TimeGenerated as epoch seconds) to resume after
+        self.cursor: Optional[Tuple[int, float]] = None
+        self.events = 0
+        self.failures = 0
+        self.retry_delay = 0.0
+        self.last_error: Optional[str] = None
+        self.last_poll: Optional[float] = None
+        self.last_event_time: Optional[datetime] = None
+        self.behind = 0  # records written but not read yet
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def run(self):
+        delay = 0.0
+        while not self._stopping.wait(delay):
+            try:
+                caught_up = self.poll_once()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                self.retry_delay = min(max(self.retry_delay * 2, self.collector.backoff_initial),
+                                       self.collector.backoff_max)
+                delay = self.retry_delay * random.uniform(0.5, 1.0)
+                logging.error(f"Error reading {self.key[1]} log on {self.key[0]}, "
+                              f"retrying in {delay:.1f}s: {e}")
+                self._close_source()
+                continue
+            self.retry_delay = 0.0
+            self.last_error = None
+            delay = self.collector.poll_interval if caught_up else 0.0
+        self._close_source()
+
+    def poll_once(self) -> bool:
+        """Read what is new; returns True when nothing was left to read"""
+        host, log_type = self.key
+        # TimeGenerated has whole seconds, so later records can be stamped
+        # up to a second before this
+        started = time.time() - 1
+        if self.reader is None:
+            # Never skip ahead: a reader that falls behind catches up, and
+            # one reset by a cleared or wrapped log rereads what is there
+            self.reader = EventLogReader(self.source_factory(host, log_type), sys.maxsize)
+            if self.cursor is not None:
+                self.reader.seek(*self.cursor)
+            else:
+                self.reader.seek_end(self.collector.backlog)
+        elif self.reader.source is None:
+            self.reader.source = self.source_factory(host, log_type)
+
+        read = 0
+        try:
+            read = self._read()
+        except LogResetError:
+            self.reader.reset()
+            read = self._read()
+        self.last_poll = time.time()
+        oldest, newest = self.reader.source.record_range()
+        last = self.reader.last_record
+        self.behind = 0 if last is None or newest < oldest else max(newest - last, 0)
+        if read < self.collector.max_batch_events and not self.behind:
+            self.collector.caught_up(self.key, started)
+            return True
+        return False
+
+    def _read(self) -> int:
+        read = 0
+        _, batches = self.reader.poll()
+        for batch in batches:
+            if self._stopping.is_set():
+                break
+            self.collector.deliver(self.key, batch)
+            read += len(batch)
+            self.events += len(batch)
+            self.last_event_time = batch[-1].TimeGenerated
+            if read >= self.collector.max_batch_events:
+                # Give the merge a chance to release before reading on
+                break
+        return read
+
+    def _close_source(self):
+        if self.reader is not None and self.reader.source is not None:
+            try:
+                self.reader.source.close()
+            except Exception as e:
+                logging.error(f"Error closing {self.key[1]} log on {self.key[0]}: {e}")
+            self.reader.source = None
+
+
+class Collector:
+    """Reads several logs on several hosts at once into one ordered stream
+
+    One SourceReader thread per (host, log) polls its log independently;
+    their batches meet in a ReorderBuffer and drain() hands back the
+    merged events, as CollectedEvent, in TimeGenerated order. When an
+    event store is given, each batch is inserted there by its reader,
+    and likewise counted into EventStatistics when given.
+    stats() reports per-source progress and lag.
+    """
+
+    def __init__(self, source_factory: Callable[[str, str], EventSource],
+                 hosts: Iterable[str] = ('localhost',),
+                 logs: Iterable[str] = ('Application', 'Security', 'System'),
+                 poll_interval: float = 5.0, reorder_window: float = 5.0,
+                 max_buffer: int = 100000, backlog: int = 0,
+                 backoff_initial: float = 1.0, backoff_max: float = 60.0,
+                 max_batch_events: int = 5000, store=None, statistics=None):
+        self.source_factory = source_factory
+        self.poll_interval = poll_interval
+        self.backlog = backlog
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.max_batch_events = max_batch_events
+        self.store = store
+        self.statistics = statistics
+        self.buffer = ReorderBuffer(reorder_window, max_buffer)
+        self._lock = threading.Lock()
+        self.readers: Dict[SourceKey, SourceReader] = {}
+        for host in hosts:
+            for log_type in logs:
+                key = (host, log_type)
+                self.buffer.add_source(key)
+                self.readers[key] = SourceReader(self, key, source_factory)
+
+    def restore_cursors(self, cursors: Dict[SourceKey, Tuple[int, float]]) -> None:
+        """Resume each log after the record given for it, before start()
+
+        Cursors are (record number, TimeGenerated as epoch seconds) of the
+        last record handled; logs without one start from backlog as usual.
+        """
+        for key, cursor in cursors.items():
+            reader = self.readers.get(key)
+            if reader is not None:
+                reader.cursor = cursor
+
+    def start(self) -> None:
+        for reader in self.readers.values():
+            reader.start()
+
+    def deliver(self, key: SourceKey, events: List) -> None:
+        """Called by readers with each batch they read"""
+        host, log_type = key
+        if self.store is not None:
+            self.store.insert_events(host, log_type, events)
+        if self.statistics is not None:
+            self.statistics.add(host, log_type, events)
+        with self._lock:
+            self.buffer.push(key, [CollectedEvent(host, log_type, event) for event in events])
+
+    def caught_up(self, key: SourceKey, as_of: float) -> None:
+        with self._lock:
+            self.buffer.caught_up(key, as_of)
+
+    def drain(self, limit: Optional[int] = None) -> List[CollectedEvent]:
+        """Merged events that are ready, oldest first"""
+        with self._lock:
+            return self.buffer.pop_ready(limit)
+
+    def stats(self) -> Dict[SourceKey, dict]:
+        now = datetime.now()
+        stats = {}
+        for key, reader in self.readers.items():
+            last = reader.last_event_time
+            stats[key] = {
+                'events': reader.events,
+                'behind': reader.behind,
+                'lag': (now - last).total_seconds() if last is not None else None,
+                'late': self.buffer.late.get(key, 0),
+                'failures': reader.failures,
+                'retry_delay': reader.retry_delay,
+                'last_error': reader.last_error,
+            }
+        return stats
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        for reader in self.readers.values():
+            reader.stop()
+        for reader in self.readers.values():
+            if reader.is_alive():
+                reader.join(timeout)
+
+
+def collector_from_config(config, source_factory, store=None, statistics=None) -> Collector:
+    """Collector built from the collector config section"""
+    return Collector(
+        source_factory,
+        config.get('collector.hosts', ['localhost']),
+        config.get('collector.logs', ['Application', 'Security', 'System']),
+        config.get('collector.poll_interval', 5),
+        config.get('collector.reorder_window', 5),
+        config.get('collector.max_buffer', 100000),
+        config.get('collector.backlog', 0),
+        config.get('collector.backoff_initial', 1),
+        config.get('collector.backoff_max', 60),
+        store=store,
+        statistics=statistics
+    )
+
+
+def create_collector(config, source_factory, store=None, statistics=None) -> Optional[Collector]:
+    """Collector for the GUI, if enabled in config"""
+    if not config.get('collector.enabled', False):
+        return None
+    return collector_from_config(config, source_factory, store, statistics)
\ No newline at end of file
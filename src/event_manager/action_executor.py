@@ -0,0 +1,194 @@
+import logging
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+from typing import Callable, Dict, Optional
+
+from src.utils.metrics import get_registry
+
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+DROP_POLICIES = (DROP_NEWEST, DROP_OLDEST)
+
+ActionResult = namedtuple('ActionResult', [
+    'rule_name', 'command', 'started_at', 'duration', 'exit_code', 'error'
+])
+
+_STOP = object()
+
+
+class TokenBucket:
+    """Allows bursts of up to `burst` with a sustained `rate` per second"""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated = clock()
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        if self.rate <= 0:
+            return True
+        now = self.clock() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class ActionExecutor:
+    """Runs Command actions on a bounded pool of worker threads
+
+    submit() never blocks the caller. A command is turned away when its
+    rule ran less than `cooldown` seconds ago (suppressed), when the
+    token bucket shared by all rules is empty (rate_limited), or when
+    the queue is full; drop_policy decides whether the new command or
+    the oldest queued one is dropped in that case. A new command dropped
+    for a full queue takes no token from the bucket. Every outcome is
+    counted in stats().
+
+    Workers wait for each process to exit, up to `timeout` seconds,
+    and record an ActionResult with its exit code and duration. The
+    last max_results results are kept in `results`, and on_complete, if
+    given, is called with each one from the worker thread.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 100,
+                 drop_policy: str = DROP_NEWEST, rate: float = 1.0, burst: int = 5,
+                 cooldown: float = 60.0, timeout: float = 300.0, max_results: int = 1000,
+                 on_complete: Optional[Callable[[ActionResult], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.drop_policy = drop_policy
+        self.max_queue = max_queue
+        self.cooldown = cooldown
+        self.timeout = timeout or None
+        self.on_complete = on_complete
+        self.clock = clock
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.results = deque(maxlen=max_results)
+        self.last_run: Dict[str, float] = {}
+        self.counters = dict.fromkeys(
+            ('submitted', 'suppressed', 'rate_limited', 'dropped', 'completed', 'failed'), 0)
+        self.running = 0
+        metrics = get_registry()
+        for counter in self.counters:
+            metrics.counter(f'actions_{counter}_total', f'Commands {counter.replace("_", " ")}',
+                            lambda counter=counter: self.counters[counter])
+        metrics.gauge('actions_queued', 'Commands waiting for a worker', lambda: len(self._queue))
+        metrics.gauge('actions_running', 'Commands running', lambda: self.running)
+        self.queue_seconds = metrics.histogram('action_queue_seconds',
+                                               'Time commands waited for a worker')
+        self.run_seconds = metrics.histogram('action_run_seconds', 'Time commands took to finish')
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._run, name=f'ActionWorker-{i}', daemon=True)
+            for i in range(max(max_workers, 1))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, rule_name: str, command: str, cooldown: Optional[float] = None) -> bool:
+        """Queue a command for a rule; returns False if it was turned away"""
+        cooldown = self.cooldown if cooldown is None else cooldown
+        with self._lock:
+            if self._closed:
+                return False
+            now = self.clock()
+            last = self.last_run.get(rule_name)
+            if last is not None and now - last < cooldown:
+                self.counters['suppressed'] += 1
+                return False
+            full = len(self._queue) >= self.max_queue
+            # Checked before the bucket, so a dropped command spends no token
+            if full and self.drop_policy == DROP_NEWEST:
+                self.counters['dropped'] += 1
+                self._log_drop()
+                return False
+            if not self.bucket.try_acquire(now):
+                self.counters['rate_limited'] += 1
+                return False
+            if full:
+                self.counters['dropped'] += 1
+                self._queue.popleft()
+                self._log_drop()
+            self.last_run[rule_name] = now
+            self.counters['submitted'] += 1
+            self._queue.append((rule_name, command, now))
+            self._ready.notify()
+        return True
+
+    def _log_drop(self):
+        dropped = self.counters['dropped']
+        if dropped == 1 or dropped % 1000 == 0:
+            logging.warning(f"Action queue full, {dropped} commands dropped")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats['queued'] = len(self._queue)
+            stats['running'] = self.running
+        return stats
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop taking commands and wait for the queued ones to finish"""
+        with self._lock:
+            self._closed = True
+            self._queue.extend([_STOP] * len(self._workers))
+            self._ready.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._ready.wait()
+                item = self._queue.popleft()
+                if item is _STOP:
+                    return
+                self.running += 1
+            rule_name, command, queued_at = item
+            self.queue_seconds.observe(self.clock() - queued_at)
+            result = self.execute(rule_name, command)
+            self.run_seconds.observe(result.duration)
+            with self._lock:
+                self.running -= 1
+                self.counters['completed' if result.exit_code == 0 else 'failed'] += 1
+                self.results.append(result)
+            if self.on_complete is not None:
+                try:
+                    self.on_complete(result)
+                except Exception as e:
+                    logging.error(f"Error in action completion callback: {e}")
+
+    def execute(self, rule_name: str, command: str) -> ActionResult:
+        """Run one command to completion on the calling thread"""
+        started_at = time.time()
+        start = time.perf_counter()
+        exit_code, error = None, None
+        try:
+            process = subprocess.Popen(command, shell=True,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                exit_code = process.wait(self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                error = f"timed out after {self.timeout}s"
+        except Exception as e:
+            error = str(e)
+        duration = time.perf_counter() - start
+        if error is not None:
+            logging.error(f"Error executing command for rule {rule_name}: {error}")
+        elif exit_code != 0:
+            logging.warning(f"Command for rule {rule_name} exited with {exit_code} after {duration:.2f}s")
+        return ActionResult(rule_name, command, started_at, duration, exit_code, error)
\ No newline at end of file
@@ -0,0 +1,381 @@
+import gc
+import logging
+import os
+import struct
+import time
+import zlib
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.event_manager.occurrence import OccurrenceTracker, OccurrenceWindow
+
+SNAPSHOT_MAGIC = b'AEIOSNAP'
+JOURNAL_MAGIC = b'AEIOJRNL'
+FORMAT_VERSION = 1
+
+# magic, version, generation, clock offset (wall minus tracker clock), saved at
+SNAPSHOT_HEADER = struct.Struct('<8sHIdd')
+# magic, version, generation
+JOURNAL_HEADER = struct.Struct('<8sHI')
+# payload length, crc32 of the payload
+BLOCK_HEADER = struct.Struct('<II')
+# record number, TimeGenerated (epoch seconds), host length, log length
+CURSOR = struct.Struct('<qdHH')
+# kind, wall time, count, key length
+OCCURRENCE_RECORD = struct.Struct('<BdIH')
+# kind, record number, TimeGenerated, host length, log length
+CURSOR_RECORD = struct.Struct('<BqdHH')
+COUNT = struct.Struct('<I')
+OCCURRENCE, CURSOR_MOVED = 1, 2
+
+# (host, log type) -> (record number, TimeGenerated as epoch seconds)
+Cursors = Dict[Tuple[str, str], Tuple[int, float]]
+
+
+class ShiftedClock:
+    """time.monotonic() moved onto the time base of an earlier run"""
+    __slots__ = ('shift',)
+
+    def __init__(self, shift: float):
+        self.shift = shift
+
+    def __call__(self) -> float:
+        return time.monotonic() + self.shift
+
+
+class RuleStateCheckpoint:
+    """Keeps rule occurrence windows and collector cursors across restarts
+
+    A snapshot holds every window of the tracker and the cursor of every
+    log read so far, in one binary file replaced atomically. Between
+    snapshots each occurrence the tracker records, and each cursor
+    advanced by advance(), is appended to a journal; tick() writes what
+    is pending as one checksummed block every journal_interval seconds
+    and takes a new snapshot every snapshot_interval seconds. A crash
+    therefore loses at most journal_interval seconds of state, and the
+    events behind it are read again from the saved cursors.
+
+    The tracker's timestamps come from a monotonic clock that restarts
+    with the machine, so files store the offset to wall time and
+    restore() hands the tracker a clock continuing the saved time base;
+    the windows are loaded as they were written, without converting a
+    single timestamp. Keys are stored as strings.
+    """
+
+    def __init__(self, tracker: OccurrenceTracker, directory: str = 'history/state',
+                 snapshot_interval: float = 300, journal_interval: float = 1.0,
+                 journal_fsync: bool = True, wall_clock: Callable[[], float] = time.time):
+        self.tracker = tracker
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, 'rules.snapshot')
+        self.journal_path = os.path.join(directory, 'rules.journal')
+        self.snapshot_interval = snapshot_interval
+        self.journal_interval = journal_interval
+        self.journal_fsync = journal_fsync
+        self.wall_clock = wall_clock
+        self.generation = 0
+        self.cursors: Cursors = {}
+        self.pending: List[tuple] = []
+        self.moved: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self.journal = None
+        self.last_flush = self.last_snapshot = time.monotonic()
+        self.snapshots_written = 0
+        self.journal_blocks = 0
+        tracker.on_record = self._note
+
+    def offset(self) -> float:
+        """Wall time minus tracker time"""
+        return self.wall_clock() - self.tracker.clock()
+
+    def _note(self, key, now: float, count: int) -> None:
+        self.pending.append((key, now, count))
+
+    def advance(self, events: Iterable) -> None:
+        """Move the cursors past collected events about to be checked"""
+        cursors, moved = self.cursors, self.moved
+        for event in events:
+            cursor = (event.RecordNumber, event.TimeGenerated.timestamp())
+            key = (event.Host, event.LogType)
+            cursors[key] = moved[key] = cursor
+
+    def tick(self) -> None:
+        """Write the journal and snapshot when they are due"""
+        now = time.monotonic()
+        if now - self.last_snapshot >= self.snapshot_interval:
+            self.save()
+        elif now - self.last_flush >= self.journal_interval:
+            self.flush()
+
+    def restore(self) -> Cursors:
+        """Load the snapshot and replay the journal; returns the cursors
+
+        Whatever cannot be read is logged and skipped, leaving an empty
+        state at worst. Windows that expired while nothing ran are left
+        to the tracker's lazy expiry.
+        """
+        start = time.perf_counter()
+        tracker = self.tracker
+        self.generation = self._load_snapshot()
+        replayed, end = self._replay_journal(self.generation)
+        self.pending = []
+        self.moved = {}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if end:
+                # Journaling carries on after the last intact block
+                self.journal = open(self.journal_path, 'r+b')
+                self.journal.truncate(end)
+                self.journal.seek(end)
+            else:
+                self._open_journal('wb')
+        except OSError as e:
+            logging.error(f"Error opening rule state journal: {e}")
+        logging.info(f"Rule state restored in {(time.perf_counter() - start) * 1000:.1f} ms: "
+                     f"{len(tracker)} keys, {tracker.total} occurrences, {len(self.cursors)} cursors, "
+                     f"{replayed} journal records")
+        return dict(self.cursors)
+
+    def _load_snapshot(self) -> int:
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logging.error(f"Error reading rule state snapshot: {e}")
+            return 0
+        try:
+            return self._decode_snapshot(data)
+        except (ValueError, struct.error, UnicodeDecodeError) as e:
+            logging.error(f"Ignoring rule state snapshot {self.snapshot_path}: {e}")
+            self.tracker.clear()
+            self.cursors = {}
+            return 0
+
+    def _decode_snapshot(self, data: bytes) -> int:
+        if len(data) < SNAPSHOT_HEADER.size + 4 or zlib.crc32(data[:-4]) != COUNT.unpack_from(data, len(data) - 4)[0]:
+            raise ValueError("truncated or corrupt")
+        magic, version, generation, offset, _ = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"not a version {FORMAT_VERSION} snapshot")
+        # Continue the saved time base, so its timestamps load unchanged
+        self.tracker.clock = ShiftedClock(self.wall_clock() - offset - time.monotonic())
+
+        position = SNAPSHOT_HEADER.size
+        cursors, position = self._read_cursors(data, position)
+        (key_count,) = COUNT.unpack_from(data, position)
+        (blob_size,) = COUNT.unpack_from(data, position + 4)
+        position += 8
+        keys = data[position:position + blob_size].decode('utf-8').split('\0') if key_count else []
+        position += blob_size
+        counts = array('I')
+        counts.frombytes(data[position:position + 4 * key_count])
+        position += 4 * key_count
+        times = array('d')
+        times.frombytes(data[position:len(data) - 4])
+        if len(keys) != key_count or sum(counts) != len(times):
+            raise ValueError("key and timestamp counts do not match")
+
+        tracker = self.tracker
+        tracker.clear()
+        # Nothing built here can form a cycle; collecting while 100k
+        # windows are allocated only costs time
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            tracker.windows.update(zip(keys, self._windows(times, counts.tolist())))
+        finally:
+            if collecting:
+                gc.enable()
+        tracker.total = len(times)
+        self.cursors = cursors
+        return generation
+
+    @staticmethod
+    def _windows(times: array, counts: List[int]) -> List[OccurrenceWindow]:
+        # Built without OccurrenceWindow.__init__ and its throwaway array
+        new = OccurrenceWindow.__new__
+        windows = []
+        start = 0
+        for count in counts:
+            window = new(OccurrenceWindow)
+            window.times = times[start:start + count]
+            window.start = 0
+            windows.append(window)
+            start += count
+        return windows
+
+    @staticmethod
+    def _read_cursors(data: bytes, position: int):
+        (count,) = COUNT.unpack_from(data, position)
+        position += 4
+        cursors = {}
+        for _ in range(count):
+            record, stamp, host_size, log_size = CURSOR.unpack_from(data, position)
+            position += CURSOR.size
+            host = data[position:position + host_size].decode('utf-8')
+            position += host_size
+            log_type = data[position:position + log_size].decode('utf-8')
+            position += log_size
+            cursors[(host, log_type)] = (record, stamp)
+        return cursors, position
+
+    def _replay_journal(self, generation: int) -> Tuple[int, int]:
+        """Records replayed, and where the intact part of the journal ends
+
+        The end is 0 when the journal cannot be continued.
+        """
+        try:
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0, 0
+        except OSError as e:
+            logging.error(f"Error reading rule state journal: {e}")
+            return 0, 0
+        if len(data) < JOURNAL_HEADER.size:
+            return 0, 0
+        magic, version, journal_generation = JOURNAL_HEADER.unpack_from(data)
+        if magic != JOURNAL_MAGIC or version != FORMAT_VERSION or journal_generation != generation:
+            # Written before the snapshot, which already holds it
+            return 0, 0
+
+        offset = self.offset()
+        record = self.tracker.record
+        replayed = 0
+        position = JOURNAL_HEADER.size
+        while position + BLOCK_HEADER.size <= len(data):
+            size, checksum = BLOCK_HEADER.unpack_from(data, position)
+            payload = data[position + BLOCK_HEADER.size:position + BLOCK_HEADER.size + size]
+            if len(payload) < size or zlib.crc32(payload) != checksum:
+                # Cut short by a crash; everything before it is intact
+                break
+            position += BLOCK_HEADER.size + size
+            at = 0
+            while at < size:
+                if payload[at] == OCCURRENCE:
+                    _, wall, count, key_size = OCCURRENCE_RECORD.unpack_from(payload, at)
+                    at += OCCURRENCE_RECORD.size
+                    key = payload[at:at + key_size].decode('utf-8')
+                    at += key_size
+                    record(key, wall - offset, count)
+                else:
+                    _, number, stamp, host_size, log_size = CURSOR_RECORD.unpack_from(payload, at)
+                    at += CURSOR_RECORD.size
+                    host = payload[at:at + host_size].decode('utf-8')
+                    at += host_size
+                    log_type = payload[at:at + log_size].decode('utf-8')
+                    at += log_size
+                    self.cursors[(host, log_type)] = (number, stamp)
+                replayed += 1
+        return replayed, position
+
+    def flush(self) -> None:
+        """Append what happened since the last flush to the journal"""
+        self.last_flush = time.monotonic()
+        if not self.pending and not self.moved:
+            return
+        offset = self.offset()
+        parts = []
+        pack = OCCURRENCE_RECORD.pack
+        for key, now, count in self.pending:
+            key = str(key).encode('utf-8')
+            parts.append(pack(OCCURRENCE, now + offset, count, len(key)))
+            parts.append(key)
+        for (host, log_type), (number, stamp) in self.moved.items():
+            host, log_type = host.encode('utf-8'), log_type.encode('utf-8')
+            parts.append(CURSOR_RECORD.pack(CURSOR_MOVED, number, stamp, len(host), len(log_type)))
+            parts.append(host)
+            parts.append(log_type)
+        self.pending = []
+        self.moved = {}
+        payload = b''.join(parts)
+        try:
+            if self.journal is None:
+                self._open_journal('ab')
+            self.journal.write(BLOCK_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self.journal.flush()
+            if self.journal_fsync:
+                os.fsync(self.journal.fileno())
+            self.journal_blocks += 1
+        except OSError as e:
+            logging.error(f"Error writing rule state journal: {e}")
+
+    def save(self) -> None:
+        """Write a snapshot of everything and start an empty journal"""
+        self.last_snapshot = self.last_flush = time.monotonic()
+        self.pending = []
+        self.moved = {}
+        generation = self.generation + 1
+        temp_path = f'{self.snapshot_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(self._encode_snapshot(generation))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.snapshot_path)
+        except OSError as e:
+            logging.error(f"Error writing rule state snapshot: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self.generation = generation
+        self.snapshots_written += 1
+        try:
+            # Anything in the old journal is in the snapshot now
+            self._open_journal('wb')
+        except OSError as e:
+            logging.error(f"Error starting rule state journal: {e}")
+
+    def _encode_snapshot(self, generation: int) -> bytes:
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, FORMAT_VERSION, generation, self.offset(),
+                                      self.wall_clock()),
+                 COUNT.pack(len(self.cursors))]
+        for (host, log_type), (number, stamp) in self.cursors.items():
+            host, log_type = host.encode('utf-8'), log_type.encode('utf-8')
+            parts += [CURSOR.pack(number, stamp, len(host), len(log_type)), host, log_type]
+
+        keys, counts, times = [], array('I'), array('d')
+        for key, window in self.tracker.windows.items():
+            live = window.times[window.start:] if window.start else window.times
+            if not live:
+                continue
+            keys.append(str(key))
+            counts.append(len(live))
+            times.extend(live)
+        blob = '\0'.join(keys).encode('utf-8')
+        parts += [COUNT.pack(len(keys)), COUNT.pack(len(blob)), blob, counts.tobytes(), times.tobytes()]
+        data = b''.join(parts)
+        return data + COUNT.pack(zlib.crc32(data))
+
+    def _open_journal(self, mode: str) -> None:
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = open(self.journal_path, mode)
+        if self.journal.tell() == 0:
+            self.journal.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, FORMAT_VERSION, self.generation))
+            self.journal.flush()
+
+    def close(self) -> None:
+        """Take a final snapshot and stop journaling"""
+        self.save()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.tracker.on_record = None
+
+
+def create_checkpoint(config, tracker: OccurrenceTracker) -> Optional[RuleStateCheckpoint]:
+    """A RuleStateCheckpoint set up from the checkpoint config section, if enabled"""
+    if not config.get('checkpoint.enabled', True):
+        return None
+    return RuleStateCheckpoint(
+        tracker,
+        config.get('checkpoint.directory', 'history/state'),
+        config.get('checkpoint.snapshot_interval', 300),
+        config.get('checkpoint.journal_interval', 1),
+        config.get('checkpoint.journal_fsync', True)
+    )
\ No newline at end of file
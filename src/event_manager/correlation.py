@@ -0,0 +1,376 @@
+"""Correlation patterns: ordered steps across events, matched as they stream
+
+A pattern in config/correlations.yaml lists steps that must happen in
+order, for one partition, within a time limit. For example:
+
+    - name: Logon after repeated failures
+      partition: 5          # string insert 5, the account name
+      within: 120           # seconds from the first step to the last
+      steps:
+        - {source: Microsoft-Windows-Security-Auditing, event_id: 4625, count: 5}
+        - {source: Microsoft-Windows-Security-Auditing, event_id: 4624}
+      action: Popup
+      action_params: Logon after 5 failed attempts
+
+    - name: Service stopped and not restarted
+      partition: 0
+      steps:
+        - {source: Service Control Manager, event_id: 7036, condition: message contains stopped}
+        - {source: Service Control Manager, event_id: 7036, condition: message contains running,
+           absent: 60}
+      action: Log
+
+A step takes source, event_id and condition as rules do, and count for
+how many occurrences it needs (a storm group counts as every event it
+adds). A last step with `absent` seconds matches if no such event comes
+within that time of the step before it. partition names the string
+insert (a number) or event field (host, computer, source, ...) that
+keeps matches apart, compared ignoring case; a step may name its own.
+Events without it are passed over. Without a partition the pattern
+tracks a single match. action, action_params and cooldown are as for
+rules (the action is Log when left out), and the event handed to the
+action is the one that completed the pattern, or for an absence the one
+it followed.
+
+Each pattern is an automaton whose state per partition is the step it
+is waiting for and the occurrences counted towards it. Steps are found
+through a RuleIndex, so an event only reaches the patterns it can
+advance. A partial match is dropped when `within` runs out, and the
+oldest is dropped once a pattern holds max_partitions. Deadlines sit in
+a timer wheel, so expiring costs only the timers that are due.
+"""
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import yaml
+
+from src.event_manager.rule_compiler import FIELD_GETTERS, Predicate, RuleCompiler, RuleSyntaxError
+from src.event_manager.rule_index import RuleIndex
+from src.event_viewer.aggregator import event_count
+from src.utils.metrics import get_registry
+
+PATTERNS_FILE = 'config/correlations.yaml'
+ACTIONS = ('Log', 'Command', 'Popup')
+
+# libyaml's loader is several times faster when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class TimerWheel:
+    """Hashed timer wheel: deadlines bucketed into slots of `resolution` seconds
+
+    Scheduling is O(1). advance(now) visits only the slots whose time
+    has come since the last call and returns what is due there; entries
+    more than one turn of the wheel away stay in their slot until their
+    turn. Timers fire up to one resolution late, never early. There is
+    no cancelling: callers check whether an item still applies.
+    """
+
+    def __init__(self, resolution: float = 1.0, slots: int = 4096, now: float = 0.0):
+        self.resolution = resolution
+        self.slots: List[list] = [[] for _ in range(slots)]
+        self.tick = math.ceil(now / resolution)  # next tick to run
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def schedule(self, deadline: float, item) -> None:
+        tick = max(math.ceil(deadline / self.resolution), self.tick)
+        self.slots[tick % len(self.slots)].append((tick, item))
+        self.length += 1
+
+    def advance(self, now: float) -> list:
+        """Items whose deadline is at or before now, removed from the wheel"""
+        target = math.floor(now / self.resolution)
+        if target < self.tick:
+            return []
+        slots = self.slots
+        if target - self.tick >= len(slots):
+            ticks = range(len(slots))
+        else:
+            ticks = range(self.tick, target + 1)
+        due = []
+        for tick in ticks:
+            slot = slots[tick % len(slots)]
+            if not slot:
+                continue
+            if all(entry[0] <= target for entry in slot):
+                due.extend(item for _, item in slot)
+                slot.clear()
+            else:
+                due.extend(item for entry_tick, item in slot if entry_tick <= target)
+                slot[:] = [entry for entry in slot if entry[0] > target]
+        self.length -= len(due)
+        self.tick = target + 1
+        return due
+
+
+class Step:
+    __slots__ = ('count', 'absent', 'condition', 'partition')
+
+    def __init__(self, count: int, absent: Optional[float], condition: Optional[Predicate],
+                 partition: Callable[[object], Optional[Hashable]]):
+        self.count = count
+        self.absent = absent
+        self.condition = condition
+        self.partition = partition
+
+
+class Partial:
+    """How far one partition has got through a pattern"""
+    __slots__ = ('state', 'count', 'deadline', 'event')
+
+    def __init__(self, deadline: float):
+        self.state = 0
+        self.count = 0
+        self.deadline = deadline
+        self.event = None
+
+
+class Pattern:
+    """A compiled pattern and its partial matches, oldest touched first"""
+
+    def __init__(self, definition: dict, steps: List[Step], within: float):
+        self.definition = definition
+        self.name = definition.get('name', '')
+        self.steps = steps
+        self.within = within
+        self.partials: 'OrderedDict[Hashable, Partial]' = OrderedDict()
+        self.matches = 0
+        self.expired = 0
+        self.evicted = 0
+
+
+def partition_getter(spec) -> Callable[[object], Optional[Hashable]]:
+    """Function extracting a partition key from an event; None if it has none"""
+    if spec is None or spec == '':
+        return lambda event: ''
+    if isinstance(spec, int) and not isinstance(spec, bool):
+        if spec < 0:
+            raise RuleSyntaxError(f"Partition insert {spec} is negative")
+
+        def insert(event):
+            inserts = event.StringInserts
+            if not inserts or len(inserts) <= spec or inserts[spec] is None:
+                return None
+            return str(inserts[spec]).casefold()
+        return insert
+    get = FIELD_GETTERS.get(str(spec).strip().casefold())
+    if get is None:
+        raise RuleSyntaxError(f"Unknown partition {spec!r}: give an insert number or one of "
+                              f"{', '.join(FIELD_GETTERS)}")
+
+    def field(event):
+        value = get(event)
+        return value.casefold() if isinstance(value, str) else value
+    return field
+
+
+class CorrelationEngine:
+    """Runs correlation patterns over events and dispatches their actions
+
+    dispatch(definition, event) is called for every match, with the
+    pattern's definition standing in for a rule; RuleEngine passes its
+    execute_action. expire() runs the timers and should be called
+    regularly even when no events arrive, so absences are noticed.
+    """
+
+    def __init__(self, dispatch: Callable[[dict, object], None],
+                 patterns_file: str = PATTERNS_FILE, max_partitions: int = 100000,
+                 default_within: float = 300, timer_resolution: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.dispatch = dispatch
+        self.patterns_file = patterns_file
+        self.max_partitions = max_partitions
+        self.default_within = default_within
+        self.clock = clock
+        self.compiler = RuleCompiler()
+        self.index = RuleIndex()
+        self.patterns: List[Pattern] = []
+        self.steps: Dict[int, Tuple[Pattern, int]] = {}  # id(step definition) -> position
+        self.wheel = TimerWheel(timer_resolution, now=clock())
+
+        metrics = get_registry()
+        metrics.counter('correlation_matches_total', 'Correlation patterns matched',
+                        lambda: sum(pattern.matches for pattern in self.patterns))
+        metrics.gauge('correlation_partials', 'Partial correlation matches held',
+                      lambda: self.partials)
+        metrics.gauge('correlation_timers', 'Correlation timers scheduled',
+                      lambda: len(self.wheel))
+
+    @property
+    def partials(self) -> int:
+        return sum(len(pattern.partials) for pattern in self.patterns)
+
+    def load(self) -> List[dict]:
+        """(Re)load the patterns file, dropping all partial matches"""
+        try:
+            with open(self.patterns_file, 'r') as f:
+                definitions = yaml.load(f, Loader=YAML_LOADER) or []
+        except FileNotFoundError:
+            definitions = []
+        except Exception as e:
+            logging.error(f"Error loading correlation patterns: {e}")
+            definitions = []
+        self.patterns = []
+        self.steps = {}
+        self.index.rebuild(())
+        for definition in definitions:
+            try:
+                self.add_pattern(definition)
+            except RuleSyntaxError as e:
+                logging.error(f"Error compiling correlation pattern {definition.get('name')!r}, "
+                              f"it is disabled: {e}")
+        return definitions
+
+    def add_pattern(self, definition: dict) -> Pattern:
+        """Compile and start matching a pattern; raises RuleSyntaxError if it is invalid"""
+        pattern = self.compile(definition)
+        self.patterns.append(pattern)
+        for position, step in enumerate(definition['steps']):
+            self.steps[id(step)] = (pattern, position)
+            self.index.add(step)
+        return pattern
+
+    def compile(self, definition: dict) -> Pattern:
+        if not isinstance(definition, dict):
+            raise RuleSyntaxError("A pattern must be a mapping")
+        definitions = definition.get('steps') or []
+        if not isinstance(definitions, list) or not all(isinstance(step, dict) for step in definitions):
+            raise RuleSyntaxError("steps must be a list of mappings")
+        if not definitions:
+            raise RuleSyntaxError("A pattern needs at least one step")
+        within = float(definition.get('within') or self.default_within)
+        steps = []
+        for position, step in enumerate(definitions):
+            count = int(step.get('count', 1))
+            if count < 1:
+                raise RuleSyntaxError(f"Step {position + 1} needs a count of at least 1")
+            absent = step.get('absent')
+            if absent is not None:
+                if position == 0 or position != len(definitions) - 1:
+                    raise RuleSyntaxError("Only the last step, and not the first, can be absent")
+                absent = float(absent)
+            steps.append(Step(count, absent, self.compiler.compile_rule(step),
+                              partition_getter(step.get('partition', definition.get('partition')))))
+        action = definition.get('action', 'Log')
+        if action not in ACTIONS:
+            raise RuleSyntaxError(f"Unknown action {action!r}, expected one of {', '.join(ACTIONS)}")
+        # Dispatched like a rule, so it gets a rule's fields
+        rule = dict(definition, action=action, action_params=definition.get('action_params') or '')
+        return Pattern(rule, steps, within)
+
+    def check_event(self, event) -> None:
+        """Advance every pattern this event is a step of"""
+        found = self.index.match(event.SourceName, event.EventID)
+        if not found:
+            return
+        now = self.clock()
+        if len(found) == 1:
+            pattern, position = self.steps[id(found[0])]
+            condition = pattern.steps[position].condition
+            if condition is None or condition(event):
+                self._advance(pattern, event, (position,), now)
+            return
+        # Steps come back in the order they were added, so each
+        # pattern's positions are in ascending order
+        matched: Dict[int, Tuple[Pattern, List[int]]] = {}
+        steps = self.steps
+        for step in found:
+            pattern, position = steps[id(step)]
+            condition = pattern.steps[position].condition
+            if condition is None or condition(event):
+                matched.setdefault(id(pattern), (pattern, []))[1].append(position)
+        for pattern, positions in matched.values():
+            self._advance(pattern, event, positions, now)
+
+    def _advance(self, pattern: Pattern, event, positions, now: float) -> None:
+        partials = pattern.partials
+        for position in positions:
+            step = pattern.steps[position]
+            key = step.partition(event)
+            if key is None:
+                continue
+            partial = partials.get(key)
+            if partial is None:
+                if position != 0:
+                    continue
+                partial = partials[key] = Partial(now + pattern.within)
+                self.wheel.schedule(partial.deadline, (pattern, key, partial))
+                if len(partials) > self.max_partitions:
+                    partials.popitem(last=False)
+                    pattern.evicted += 1
+            elif partial.state != position:
+                # A step this partition is not waiting for
+                continue
+            elif step.absent is not None:
+                # What had to stay away turned up
+                del partials[key]
+                return
+            else:
+                partials.move_to_end(key)
+            self._count(pattern, key, partial, event, now)
+            # One transition per event, even if it matches later steps too
+            return
+
+    def _count(self, pattern: Pattern, key, partial: Partial, event, now: float) -> None:
+        steps = pattern.steps
+        partial.count += event_count(event)
+        if partial.count < steps[partial.state].count:
+            return
+        partial.state += 1
+        partial.count = 0
+        partial.event = event
+        if partial.state == len(steps):
+            del pattern.partials[key]
+            self._matched(pattern, event)
+            return
+        absent = steps[partial.state].absent
+        if absent is not None:
+            partial.deadline = now + absent
+            self.wheel.schedule(partial.deadline, (pattern, key, partial))
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Run the timers that are due: expire partial matches, report absences"""
+        if now is None:
+            now = self.clock()
+        for pattern, key, partial in self.wheel.advance(now):
+            partials = pattern.partials
+            if partials.get(key) is not partial or partial.deadline > now:
+                # Completed, evicted or waiting on a later deadline by now
+                continue
+            del partials[key]
+            if pattern.steps[partial.state].absent is not None:
+                self._matched(pattern, partial.event)
+            else:
+                pattern.expired += 1
+
+    def _matched(self, pattern: Pattern, event) -> None:
+        pattern.matches += 1
+        try:
+            self.dispatch(pattern.definition, event)
+        except Exception as e:
+            logging.error(f"Error running the action of correlation pattern {pattern.name!r}: {e}")
+
+    def clear(self) -> None:
+        """Drop every partial match"""
+        for pattern in self.patterns:
+            pattern.partials.clear()
+        self.wheel = TimerWheel(self.wheel.resolution, len(self.wheel.slots), self.clock())
+
+
+def create_correlation_engine(config, dispatch: Callable[[dict, object], None],
+                              clock: Callable[[], float] = time.monotonic) -> CorrelationEngine:
+    """CorrelationEngine set up from the correlation config section"""
+    return CorrelationEngine(
+        dispatch,
+        config.get('correlation.patterns_file', PATTERNS_FILE),
+        config.get('correlation.max_partitions', 100000),
+        config.get('correlation.default_within', 300),
+        config.get('correlation.timer_resolution', 1),
+        clock
+    )
\ No newline at end of file
@@ -0,0 +1,186 @@
+import csv
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from src.utils.metrics import get_registry
+
+HISTORY_COLUMNS = [
+    'Timestamp', 'Rule Name', 'Event Time', 'Source Name',
+    'Event ID', 'Event Type', 'Message', 'Count', 'Last Seen'
+]
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """Appends triggered-event rows to the daily history CSV in the background
+
+    write() only puts a row on a queue. A writer thread drains it and
+    writes in batches, whenever batch_size rows are waiting or
+    flush_interval seconds have passed, keeping the current day's file
+    open between batches. Each row is routed to the file named by
+    file_format for the day it was triggered, so the writer rolls over
+    at midnight on its own.
+
+    Rows are tuples in HISTORY_COLUMNS order, with datetimes for the
+    time columns and the raw StringInserts as the message; formatting
+    happens on the writer thread. A row may stand for a storm of
+    identical events, Count of them from Event Time to Last Seen. A day
+    file started with another header is left alone and the rows go to
+    a numbered file beside it. If an event store is given, each batch
+    is also inserted there.
+    """
+
+    def __init__(self, directory: str = 'history', file_format: str = 'event_history_%Y%m%d.csv',
+                 batch_size: int = 500, flush_interval: float = 1.0, max_queue: int = 100000,
+                 store=None):
+        self.directory = directory
+        self.store = store
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue = queue.Queue(max_queue)
+        self.written = 0
+        self.dropped = 0
+        self._file = None
+        self._writer = None
+        self._day = None
+        metrics = get_registry()
+        metrics.counter('history_rows_written_total', 'Rows written to the history files',
+                        lambda: self.written)
+        metrics.counter('history_rows_dropped_total', 'Rows dropped with the queue full',
+                        lambda: self.dropped)
+        metrics.gauge('history_queue_rows', 'Rows waiting to be written', self.queue.qsize)
+        self.write_seconds = metrics.histogram('history_write_seconds',
+                                               'Time to write one batch of history rows')
+        self._thread = threading.Thread(target=self._run, name='HistoryWriter', daemon=True)
+        self._thread.start()
+
+    def write(self, row: tuple) -> None:
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logging.warning(f"History queue full, {self.dropped} rows dropped")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write and fsync everything queued so far; waits for the writer
+
+        Returns False at once if the writer thread is no longer running.
+        """
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Flush durably and stop the writer thread"""
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP or isinstance(item, threading.Event):
+                self._write_batch(batch)
+                batch = []
+                self._sync()
+                if item is _STOP:
+                    self._close_file()
+                    return
+                item.set()
+            elif item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write_batch(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write_batch(self, rows):
+        if not rows:
+            return
+        start = time.perf_counter()
+        try:
+            for row in rows:
+                triggered_at = row[0]
+                if triggered_at.date() != self._day:
+                    self._open(triggered_at)
+                self._writer.writerow(self.format_row(row))
+            self._file.flush()
+            self.written += len(rows)
+        except Exception as e:
+            logging.error(f"Error writing event history: {e}")
+            self._close_file()
+        if self.store is not None:
+            # Guarded like the file: an exception here would end the thread
+            # and leave flush() callers waiting
+            try:
+                self.store.insert_triggered(rows)
+            except Exception as e:
+                logging.error(f"Error storing event history: {e}")
+        self.write_seconds.observe(time.perf_counter() - start)
+
+    @staticmethod
+    def format_row(row):
+        triggered_at, rule_name, event_time, source, event_id, event_type, inserts, count, last_seen = row
+        return [triggered_at.strftime('%Y-%m-%d %H:%M:%S'), rule_name,
+                event_time.strftime('%Y-%m-%d %H:%M:%S'), source, event_id,
+                event_type, str(inserts), count, last_seen.strftime('%Y-%m-%d %H:%M:%S')]
+
+    def path_for(self, day: datetime) -> str:
+        return os.path.join(self.directory, day.strftime(self.file_format))
+
+    def _open(self, day: datetime):
+        self._close_file()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(day)
+        stem, extension = os.path.splitext(path)
+        number = 1
+        while not self._header_matches(path):
+            path = f'{stem}_{number}{extension}'
+            number += 1
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._day = day.date()
+        if self._file.tell() == 0:
+            self._writer.writerow(HISTORY_COLUMNS)
+
+    @staticmethod
+    def _header_matches(path: str) -> bool:
+        """Whether rows can be appended to path: missing, empty or same columns"""
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), None)
+        except FileNotFoundError:
+            return True
+        return header is None or header == HISTORY_COLUMNS
+
+    def _sync(self):
+        if self._file is not None:
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                logging.error(f"Error syncing event history: {e}")
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._writer = None
+        self._day = None
\ No newline at end of file
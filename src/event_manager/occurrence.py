@@ -0,0 +1,146 @@
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class OccurrenceWindow:
+    """Occurrence timestamps for one key, oldest first
+
+    Timestamps come from a monotonic clock, so they are already sorted:
+    expiring is a bisect plus moving a start offset, and the dead prefix
+    is only compacted once it makes up half the array.
+    """
+    __slots__ = ('times', 'start')
+
+    def __init__(self):
+        self.times = array('d')
+        self.start = 0
+
+    def __len__(self):
+        return len(self.times) - self.start
+
+    def add(self, timestamp: float, count: int = 1) -> None:
+        if count == 1:
+            self.times.append(timestamp)
+        else:
+            self.times.extend(array('d', (timestamp,)) * count)
+
+    def last(self) -> float:
+        return self.times[-1]
+
+    def expire(self, cutoff: float) -> int:
+        """Drop timestamps older than cutoff and return how many went"""
+        return self.drop(bisect_left(self.times, cutoff, self.start) - self.start)
+
+    def drop(self, count: int) -> int:
+        """Drop the oldest count timestamps and return count"""
+        start = self.start = self.start + count
+        if start > 64 and start * 2 > len(self.times):
+            del self.times[:start]
+            self.start = 0
+        return count
+
+    def count_since(self, cutoff: float) -> int:
+        return len(self.times) - bisect_left(self.times, cutoff, self.start)
+
+
+class OccurrenceTracker:
+    """Sliding-window occurrence counts per event key
+
+    Recording is amortized O(1) and counting a window is O(log n) in the
+    occurrences kept for that key. Timestamps older than the retention
+    period are dropped lazily when their key is touched, and keys nobody
+    has seen within the retention period are dropped from the
+    least-recently-seen end as new occurrences arrive. Once more than
+    max_entries timestamps are held, least-recently-seen keys are evicted
+    outright to keep memory bounded.
+
+    If on_record is set it is called with (key, now, count) for every
+    occurrence recorded, e.g. to journal it.
+    """
+
+    def __init__(self, retention: float = 86400, max_entries: int = 1000000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.retention = retention
+        self.max_entries = max_entries
+        self.clock = clock
+        self.windows: 'OrderedDict[Hashable, OccurrenceWindow]' = OrderedDict()
+        self.total = 0
+        self.evicted_keys = 0
+        self.on_record: Optional[Callable[[Hashable, float, int], None]] = None
+
+    def __len__(self):
+        return len(self.windows)
+
+    def __contains__(self, key):
+        return key in self.windows
+
+    def record(self, key: Hashable, now: Optional[float] = None, count: int = 1) -> None:
+        """Record count occurrences of key at now"""
+        if now is None:
+            now = self.clock()
+        windows = self.windows
+        window = windows.get(key)
+        if window is None:
+            window = windows[key] = OccurrenceWindow()
+        else:
+            windows.move_to_end(key)
+            self.total -= window.expire(now - self.retention)
+        window.add(now, count)
+        self.total += count
+
+        self._drop_idle(now)
+        if self.total > self.max_entries:
+            self._evict()
+        if self.on_record is not None:
+            self.on_record(key, now, count)
+
+    def count(self, key: Hashable, seconds: float, now: Optional[float] = None) -> int:
+        """Occurrences of key within the last `seconds`"""
+        window = self.windows.get(key)
+        if window is None:
+            return 0
+        if now is None:
+            now = self.clock()
+        self.total -= window.expire(now - self.retention)
+        return window.count_since(now - seconds)
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Expire every key; only needed to release memory eagerly"""
+        if now is None:
+            now = self.clock()
+        cutoff = now - self.retention
+        for key in list(self.windows):
+            window = self.windows[key]
+            self.total -= window.expire(cutoff)
+            if not window:
+                del self.windows[key]
+
+    def clear(self) -> None:
+        self.windows.clear()
+        self.total = 0
+
+    def _drop_idle(self, now: float) -> None:
+        # Windows are ordered by last occurrence, so idle keys sit at the front
+        cutoff = now - self.retention
+        windows = self.windows
+        while windows:
+            key, window = next(iter(windows.items()))
+            if window.last() >= cutoff:
+                break
+            del windows[key]
+            self.total -= len(window)
+
+    def _evict(self) -> None:
+        windows = self.windows
+        while self.total > self.max_entries and len(windows) > 1:
+            _, window = windows.popitem(last=False)
+            self.total -= len(window)
+            self.evicted_keys += 1
+        if self.total > self.max_entries:
+            # A single key is over the cap on its own: keep its newest entries
+            window = next(iter(windows.values()))
+            # by count, as a burst can share one timestamp
+            self.total -= window.drop(self.total - self.max_entries)
\ No newline at end of file
@@ -0,0 +1,347 @@
+"""Rule conditions: parsing and compiling them into predicates
+
+A rule's optional `condition` is a small boolean expression over the
+event, for example:
+
+    id in [4624..4634, 4740] and not type = Information
+    source = Service Control Manager and message ~ /svc(host|dns)/i
+    (message contains "denied" or message contains "refused") and category > 0
+
+Fields are id, category, type, source, computer, message (the string
+inserts joined by spaces), host and log (set on collected events).
+id and category compare as numbers with =, !=, <, <=, >, >= and
+`in [...]`, whose items are numbers or ranges written a..b or a-b.
+type takes Error, Warning, Information, Success Audit, Failure Audit or
+their numbers with =, != and in. Text fields take =, !=, in and
+contains, all ignoring case, and ~ with a /regex/ (flags i, m, s, x).
+Bare words may hold letters, digits, '.', '-' and '_', and run on across
+spaces until the next keyword or operator; other values need quotes.
+`and` binds tighter than `or`, and `not` tighter than both.
+
+Each condition is compiled once into a closure; identical regexes
+across rules share one compiled pattern.
+"""
+import re
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from src.event_viewer.event_source import EVENT_TYPE_NAMES
+from src.event_viewer.message_formatter import join_inserts
+
+Predicate = Callable[[object], bool]
+IdSpec = Tuple[FrozenSet[str], Tuple[Tuple[int, int], ...]]  # exact ids, ranges
+
+KEYWORDS = ('and', 'or', 'not', 'in', 'contains')
+NUMBER_FIELDS = ('id', 'category')
+TEXT_FIELDS = ('source', 'computer', 'message', 'host', 'log')
+FIELDS = NUMBER_FIELDS + ('type',) + TEXT_FIELDS
+EVENT_TYPES = {name.casefold(): number for number, name in EVENT_TYPE_NAMES.items()}
+REGEX_FLAGS = {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL, 'x': re.VERBOSE}
+
+TOKEN_RE = re.compile(r'''\s*(?:
+    (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<regex>/(?:[^/\\]|\\.)*/[imsx]*)
+  | (?P<number>\d+(?!\w|\.(?!\.)))
+  | (?P<op>!=|<=|>=|\.\.|[=<>~()\[\],-])
+  | (?P<word>[A-Za-z_0-9][\w.\-]*)
+)''', re.VERBOSE)
+ID_RANGE_RE = re.compile(r'^(\d+)\s*(?:-|\.\.)\s*(\d+)$')
+
+FIELD_GETTERS = {
+    'id': lambda event: event.EventID,
+    'category': lambda event: event.EventCategory,
+    'type': lambda event: event.EventType,
+    'source': lambda event: event.SourceName or '',
+    'computer': lambda event: event.ComputerName or '',
+    'message': lambda event: join_inserts(event.StringInserts),
+    'host': lambda event: getattr(event, 'Host', '') or '',
+    'log': lambda event: getattr(event, 'LogType', '') or '',
+}
+
+
+class RuleSyntaxError(ValueError):
+    """A rule's event id or condition could not be parsed"""
+
+
+def parse_id_spec(value) -> Optional[IdSpec]:
+    """Parse an Event ID field such as "4624-4634, 4740"; None means any id"""
+    text = str(value if value is not None else '').strip()
+    if text in ('', '*'):
+        return None
+    exact, ranges = set(), []
+    for item in text.split(','):
+        item = item.strip()
+        match = ID_RANGE_RE.match(item)
+        if match:
+            low, high = int(match.group(1)), int(match.group(2))
+            if low > high:
+                raise RuleSyntaxError(f"Empty event id range {item!r}")
+            ranges.append((low, high))
+        elif item.isdigit():
+            exact.add(str(int(item)))
+        elif item:
+            # Kept as written, as exact ids always were
+            exact.add(item)
+    return frozenset(exact), tuple(sorted(ranges))
+
+
+def tokenize(text: str) -> List[Tuple[str, str, int]]:
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise RuleSyntaxError(f"Unexpected {text[position:].strip()[:20]!r} at {position}")
+        kind = match.lastgroup
+        value, start = match.group(kind), match.start(kind)
+        if kind == 'word' and value.lower() in KEYWORDS:
+            kind, value = 'keyword', value.lower()
+        tokens.append((kind, value, start))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser producing nested tuples
+
+    ('or', [nodes]), ('and', [nodes]), ('not', node) and
+    ('cmp', field, op, value), where the value of `in` is a list and
+    that of ~ is a (pattern, flags) pair.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise RuleSyntaxError("Empty condition")
+        node = self.parse_or()
+        if self.position < len(self.tokens):
+            self.fail("Unexpected")
+        return node
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None, len(self.text))
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def accept(self, kind, value=None) -> bool:
+        token_kind, token_value, _ = self.peek()
+        if token_kind == kind and (value is None or token_value == value):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, kind, value=None):
+        if not self.accept(kind, value):
+            self.fail(f"Expected {value or kind}, found")
+        return self.tokens[self.position - 1]
+
+    def fail(self, message):
+        kind, value, position = self.peek()
+        found = 'end of condition' if kind is None else repr(value)
+        raise RuleSyntaxError(f"{message} {found} at {position}")
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.accept('keyword', 'or'):
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while self.accept('keyword', 'and'):
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not(self):
+        if self.accept('keyword', 'not'):
+            return ('not', self.parse_not())
+        if self.accept('op', '('):
+            node = self.parse_or()
+            self.expect('op', ')')
+            return node
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        kind, field, _ = self.peek()
+        if kind != 'word' or field.lower() not in FIELDS:
+            self.fail("Expected a field name, found")
+        self.position += 1
+        field = field.lower()
+        kind, op, _ = self.take()
+        if not (kind == 'keyword' and op in ('in', 'contains')
+                or kind == 'op' and op in ('=', '!=', '<', '<=', '>', '>=', '~')):
+            self.position -= 1
+            self.fail(f"Expected an operator after {field}, found")
+
+        if op == 'in':
+            self.expect('op', '[')
+            values = [self.parse_item(field)]
+            while self.accept('op', ','):
+                values.append(self.parse_item(field))
+            self.expect('op', ']')
+            return ('cmp', field, op, values)
+        if op == '~':
+            kind, value, _ = self.take()
+            if kind != 'regex' or field not in TEXT_FIELDS:
+                self.position -= 1
+                self.fail("~ needs a text field and a /regex/, found")
+            end = value.rindex('/')
+            flags = 0
+            for flag in value[end + 1:]:
+                flags |= REGEX_FLAGS[flag]
+            return ('cmp', field, op, (value[1:end].replace('\\/', '/'), flags))
+        if op == 'contains' and field not in TEXT_FIELDS:
+            self.position -= 1
+            self.fail("contains needs a text field, found")
+        if op in ('<', '<=', '>', '>=') and field not in NUMBER_FIELDS:
+            self.position -= 1
+            self.fail(f"{op} needs a numeric field, found")
+        value = self.parse_value(field)
+        if isinstance(value, tuple):
+            self.fail("A range needs `in`, found")
+        return ('cmp', field, op, value)
+
+    def parse_item(self, field):
+        value = self.parse_value(field)
+        if field in NUMBER_FIELDS and (self.accept('op', '..') or self.accept('op', '-')):
+            high = self.parse_value(field)
+            if value > high:
+                raise RuleSyntaxError(f"Empty range {value}..{high}")
+            return (value, high)
+        return value
+
+    def parse_value(self, field):
+        kind, value, _ = self.peek()
+        if kind == 'string':
+            self.position += 1
+            text = re.sub(r'\\(.)', r'\1', value[1:-1])
+        elif kind in ('word', 'number'):
+            # Unquoted text runs on across spaces, so source names like
+            # Service Control Manager need no quotes
+            words = []
+            while self.peek()[0] in ('word', 'number'):
+                words.append(self.take()[1])
+            text = ' '.join(words)
+        else:
+            self.fail(f"Expected a value for {field}, found")
+        if field in NUMBER_FIELDS:
+            if not text.isdigit():
+                self.position -= 1
+                self.fail(f"{field} needs a number, found")
+            return int(text)
+        if field == 'type':
+            if text.isdigit():
+                return int(text)
+            if text.casefold() not in EVENT_TYPES:
+                self.position -= 1
+                self.fail("Unknown event type")
+            return EVENT_TYPES[text.casefold()]
+        return text.casefold()
+
+
+def parse_condition(text: str):
+    """Parse a condition into its syntax tree; raises RuleSyntaxError"""
+    return _Parser(text).parse()
+
+
+class RuleCompiler:
+    """Compiles rule conditions into predicates over an event record
+
+    Compiled regexes are kept on the compiler, so rules using the same
+    pattern share it.
+    """
+
+    def __init__(self):
+        self.patterns: Dict[Tuple[str, int], 're.Pattern'] = {}
+
+    def pattern(self, source: str, flags: int = 0) -> 're.Pattern':
+        key = (source, flags)
+        compiled = self.patterns.get(key)
+        if compiled is None:
+            try:
+                compiled = self.patterns[key] = re.compile(source, flags)
+            except re.error as e:
+                raise RuleSyntaxError(f"Bad regex /{source}/: {e}")
+        return compiled
+
+    def compile_rule(self, rule: dict) -> Optional[Predicate]:
+        """Validate a rule's event id and compile its condition, if it has one"""
+        parse_id_spec(rule.get('event_id'))
+        condition = str(rule.get('condition') or '').strip()
+        if not condition:
+            return None
+        return self.compile(parse_condition(condition))
+
+    def compile(self, node) -> Predicate:
+        kind = node[0]
+        if kind == 'not':
+            inner = self.compile(node[1])
+            return lambda event: not inner(event)
+        if kind in ('and', 'or'):
+            parts = [self.compile(child) for child in node[1]]
+            if len(parts) == 2:
+                first, second = parts
+                if kind == 'and':
+                    return lambda event: first(event) and second(event)
+                return lambda event: first(event) or second(event)
+            if kind == 'and':
+                return lambda event: all(part(event) for part in parts)
+            return lambda event: any(part(event) for part in parts)
+        return self.compile_comparison(*node[1:])
+
+    def compile_comparison(self, field: str, op: str, value) -> Predicate:
+        get = FIELD_GETTERS[field]
+        if op == '~':
+            search = self.pattern(*value).search
+            return lambda event: search(get(event)) is not None
+        if field in TEXT_FIELDS:
+            # Text compares ignoring case, as Windows does for names
+            if op == 'contains':
+                return lambda event: value in get(event).casefold()
+            if op == 'in':
+                values = frozenset(value)
+                return lambda event: get(event).casefold() in values
+            if op == '=':
+                return lambda event: get(event).casefold() == value
+            return lambda event: get(event).casefold() != value
+        if op == 'in':
+            return self.compile_membership(get, value)
+        if op == '=':
+            return lambda event: get(event) == value
+        if op == '!=':
+            return lambda event: get(event) != value
+        if op == '<':
+            return lambda event: get(event) < value
+        if op == '<=':
+            return lambda event: get(event) <= value
+        if op == '>':
+            return lambda event: get(event) > value
+        return lambda event: get(event) >= value
+
+    @staticmethod
+    def compile_membership(get, items) -> Predicate:
+        exact = frozenset(item for item in items if not isinstance(item, tuple))
+        ranges = tuple(sorted(item for item in items if isinstance(item, tuple)))
+        if not ranges:
+            return lambda event: get(event) in exact
+        if not exact and len(ranges) == 1:
+            (low, high), = ranges
+            return lambda event: low <= get(event) <= high
+
+        def member(event):
+            value = get(event)
+            if value in exact:
+                return True
+            for low, high in ranges:
+                if value < low:
+                    return False
+                if value <= high:
+                    return True
+            return False
+        return member
\ No newline at end of file
@@ -0,0 +1,273 @@
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+from src.event_manager.action_executor import ActionExecutor
+from src.event_manager.correlation import create_correlation_engine
+from src.event_manager.history_writer import HistoryWriter
+from src.event_manager.occurrence import OccurrenceTracker
+from src.event_manager.rule_compiler import Predicate, RuleCompiler, RuleSyntaxError
+from src.event_manager.rule_index import RuleIndex
+from src.event_viewer.aggregator import event_count
+from src.utils.config import ConfigManager, get_config
+from src.utils.metrics import get_registry
+
+RULES_FILE = 'config/rules.yaml'
+
+# Occurrence keys of rules with a condition or that match more than one
+# (source, event id) start with this, which no "source_id" key does
+RULE_KEY_PREFIX = '\x1frule:'
+
+# libyaml's loader is several times faster when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class RuleEngine:
+    """Evaluates rules against events and runs their actions, without Qt
+
+    Holds the rule list and its index, the per-key occurrence windows,
+    the history writer and the command executor, all configured from the
+    event_manager config section. The EventManager tab and the headless
+    daemon both drive one of these. Popup actions go to popup_handler,
+    which the GUI sets; without one they are only logged. Each rule's
+    condition is compiled once, when it is loaded or added; a rule that
+    fails to compile, or that repeats an earlier rule's name, is kept
+    (and saved) but never matches. Events may
+    be storm group snapshots from EventAggregator: each is checked once
+    but counts as every occurrence it adds. Correlation patterns are
+    loaded with the rules and see the same events; their matches run
+    through execute_action like a rule's.
+
+    A rule for one exact source and event id, without a condition, counts
+    occurrences of that pair, shared with any other such rule for it. A
+    rule with a condition, or matching an id list, a range or a wildcard,
+    counts the events it matches in a window of its own, so a threshold
+    over 4624-4634 sees all of them together and a conditioned threshold
+    sees only the events its condition holds for.
+    """
+
+    def __init__(self, store=None, config: Optional[ConfigManager] = None,
+                 rules_file: str = RULES_FILE):
+        self.config = config or get_config()
+        self.rules_file = rules_file
+        self.rules: List[dict] = []
+        self.rule_index = RuleIndex()
+        self.compiler = RuleCompiler()
+        self.conditions: Dict[int, Predicate] = {}
+        self.occurrence_keys: Dict[int, str] = {}
+        self.popup_handler: Optional[Callable[[str, object], None]] = None
+        self.events_checked = 0
+        self.rule_matches = 0
+        self.actions_triggered = 0
+        self.event_history = OccurrenceTracker(
+            self.config.get('event_manager.history_retention', 86400),
+            self.config.get('event_manager.history_max_entries', 1000000)
+        )
+        self.history_writer = HistoryWriter(
+            self.config.get('event_manager.history_directory', 'history'),
+            self.config.get('event_manager.history_file_format', 'event_history_%Y%m%d.csv'),
+            self.config.get('event_manager.history_batch_size', 500),
+            self.config.get('event_manager.history_flush_interval', 1.0),
+            store=store
+        )
+        self.action_executor = ActionExecutor(
+            self.config.get('event_manager.action_workers', 4),
+            self.config.get('event_manager.action_queue_size', 100),
+            self.config.get('event_manager.action_drop_policy', 'drop_newest'),
+            self.config.get('event_manager.action_rate', 1.0),
+            self.config.get('event_manager.action_burst', 5),
+            self.config.get('event_manager.action_cooldown', 60),
+            self.config.get('event_manager.action_timeout', 300)
+        )
+        self.correlator = create_correlation_engine(self.config, self.execute_action)
+        self.config.subscribe('event_manager', self.apply_config)
+
+        # Counts are plain attributes, read only when metrics are collected
+        metrics = get_registry()
+        metrics.counter('rule_events_checked_total', 'Events checked against the rules',
+                        lambda: self.events_checked)
+        metrics.counter('rule_matches_total', 'Candidate rules whose condition held',
+                        lambda: self.rule_matches)
+        metrics.counter('rule_actions_total', 'Rule actions triggered',
+                        lambda: self.actions_triggered)
+        metrics.gauge('rule_count', 'Rules loaded', lambda: len(self.rules))
+        metrics.gauge('occurrence_keys', 'Event keys with occurrences held',
+                      lambda: len(self.event_history))
+        metrics.gauge('occurrence_entries', 'Occurrence timestamps held',
+                      lambda: self.event_history.total)
+        self.batch_seconds = metrics.histogram('rule_check_batch_seconds',
+                                               'Time to check one batch of events')
+
+    def apply_config(self, section=None) -> None:
+        """Apply the event_manager settings that can change while running"""
+        self.event_history.retention = self.config.get('event_manager.history_retention', 86400)
+        self.event_history.max_entries = self.config.get('event_manager.history_max_entries', 1000000)
+        self.action_executor.cooldown = self.config.get('event_manager.action_cooldown', 60)
+        self.action_executor.timeout = self.config.get('event_manager.action_timeout', 300) or None
+        self.action_executor.bucket.rate = self.config.get('event_manager.action_rate', 1.0)
+
+    def load_rules(self) -> List[dict]:
+        try:
+            with open(self.rules_file, 'r') as f:
+                self.rules = yaml.load(f, Loader=YAML_LOADER) or []
+        except FileNotFoundError:
+            self.rules = []
+        except Exception as e:
+            logging.error(f"Error loading rules: {e}")
+            self.rules = []
+        self.conditions = {}
+        self.occurrence_keys = {}
+        names = set()
+        self.rule_index.rebuild(rule for rule in self.rules
+                                if self.unique_name(rule, names) and self.compile_rule(rule))
+        self.correlator.load()
+        return self.rules
+
+    def save_rules(self) -> None:
+        try:
+            directory = os.path.dirname(self.rules_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.rules_file, 'w') as f:
+                yaml.dump(self.rules, f)
+        except Exception as e:
+            logging.error(f"Error saving rules: {e}")
+
+    def unique_name(self, rule: dict, names: set) -> bool:
+        # Rule windows are keyed by name, so two rules must not share one
+        name = rule.get('name')
+        if name in names:
+            logging.error(f"Duplicate rule name {name!r}, the later rule is disabled")
+            return False
+        names.add(name)
+        return True
+
+    def compile_rule(self, rule: dict) -> bool:
+        try:
+            condition = self.compiler.compile_rule(rule)
+        except RuleSyntaxError as e:
+            logging.error(f"Error compiling rule {rule.get('name')!r}, it is disabled: {e}")
+            return False
+        if condition is not None:
+            self.conditions[id(rule)] = condition
+        self.set_occurrence_key(rule)
+        return True
+
+    def set_occurrence_key(self, rule: dict) -> None:
+        source, ids, ranges = RuleIndex.rule_keys(rule)
+        exact = source is not None and len(ids) == 1 and ids[0] is not None and not ranges
+        if not exact or id(rule) in self.conditions:
+            self.occurrence_keys[id(rule)] = RULE_KEY_PREFIX + str(rule.get('name', ''))
+
+    def add_rule(self, rule: dict) -> None:
+        """Add a rule; raises RuleSyntaxError if it does not compile and
+        ValueError if another rule already has its name"""
+        if any(other.get('name') == rule.get('name') for other in self.rules):
+            raise ValueError(f"A rule named {rule.get('name')!r} already exists")
+        condition = self.compiler.compile_rule(rule)
+        self.rules.append(rule)
+        if condition is not None:
+            self.conditions[id(rule)] = condition
+        self.set_occurrence_key(rule)
+        self.rule_index.add(rule)
+
+    def remove_rule(self, position: int) -> dict:
+        rule = self.rules.pop(position)
+        self.rule_index.remove(rule)
+        self.conditions.pop(id(rule), None)
+        self.occurrence_keys.pop(id(rule), None)
+        return rule
+
+    def check_event(self, event) -> None:
+        # A storm group snapshot stands for all the occurrences it adds
+        count = event_count(event)
+        self.events_checked += count
+        event_key = f"{event.SourceName}_{event.EventID}"
+        self.event_history.record(event_key, count=count)
+
+        # Check only the rules indexed under this source and event ID
+        conditions = self.conditions
+        occurrence_keys = self.occurrence_keys
+        for rule in self.rule_index.match(event.SourceName, event.EventID):
+            condition = conditions.get(id(rule))
+            if condition is not None and not condition(event):
+                continue
+            # A rule's own window counts only the events it matches
+            rule_key = occurrence_keys.get(id(rule))
+            if rule_key is not None:
+                self.event_history.record(rule_key, count=count)
+            self.rule_matches += 1
+            if self.check_rule_conditions(rule, rule_key or event_key):
+                self.execute_action(rule, event)
+        if self.correlator.patterns:
+            self.correlator.check_event(event)
+
+    def check_events(self, events) -> None:
+        """Check a batch of events, timing the batch as a whole
+
+        Correlation timers run on every call, even with no events.
+        """
+        if events:
+            start = time.perf_counter()
+            for event in events:
+                self.check_event(event)
+            self.batch_seconds.observe(time.perf_counter() - start)
+        self.correlator.expire()
+
+    def clean_event_history(self) -> None:
+        # Expiry happens lazily as keys are touched; this releases memory
+        # held by every key at once
+        self.event_history.prune()
+
+    def check_rule_conditions(self, rule: dict, event_key: str) -> bool:
+        time_window = rule['time_window'] * 60  # Convert to seconds
+
+        # Count events within time window
+        count = self.event_history.count(event_key, time_window)
+        return count >= rule['occurrence_count']
+
+    def execute_action(self, rule: dict, event) -> None:
+        self.actions_triggered += 1
+        action = rule['action']
+        params = rule['action_params']
+
+        if action == 'Log':
+            self.log_event(event, rule)
+        elif action == 'Command':
+            self.execute_command(params, rule)
+        elif action == 'Popup':
+            self.show_popup(params, event)
+
+    def log_event(self, event, rule: dict) -> None:
+        """Queue triggered event for the history CSV file"""
+        self.history_writer.write((
+            datetime.now(),
+            rule['name'],
+            event.TimeGenerated,
+            event.SourceName,
+            event.EventID,
+            event.EventType,
+            event.StringInserts,
+            event_count(event),
+            getattr(event, 'LastSeen', event.TimeGenerated)
+        ))
+
+    def execute_command(self, command: str, rule: Optional[dict] = None) -> None:
+        # Queued for the worker pool; rules without a cooldown use the default
+        rule = rule or {}
+        self.action_executor.submit(rule.get('name', ''), command, rule.get('cooldown'))
+
+    def show_popup(self, message: str, event) -> None:
+        if self.popup_handler is not None:
+            self.popup_handler(message, event)
+        else:
+            logging.info(f"Popup: {message} ({event.SourceName} {event.EventID})")
+
+    def shutdown(self) -> None:
+        self.config.unsubscribe(self.apply_config)
+        self.action_executor.close()
+        self.history_writer.close()
\ No newline at end of file
@@ -0,0 +1,171 @@
+from bisect import bisect_right, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.event_manager.rule_compiler import RuleSyntaxError, parse_id_spec
+
+# Rule fields left empty or set to one of these match any value
+WILDCARDS = ('', '*')
+
+
+def normalize_key(value) -> Optional[str]:
+    value = str(value if value is not None else '').strip()
+    return None if value in WILDCARDS else value
+
+
+class RuleIndex:
+    """Dispatch table from (source, event id) to the rules that apply
+
+    Rules are bucketed by their exact (source, event id) pair, with a None
+    in either position for a wildcard, so an event only has to look at
+    four buckets instead of every rule. An Event ID field listing several
+    ids puts the rule in one bucket per id. Id ranges are cut, per source,
+    into segments that each list the rules covering them, so an id is
+    looked up with one bisect; the segments are rebuilt lazily after
+    rules change. Matches come back in the order the rules were added.
+    Results are cached per (source, event id) until the rules change, as
+    a log has far fewer distinct pairs than events.
+    """
+
+    MAX_CACHED = 65536
+
+    def __init__(self, rules: Iterable[Dict[str, Any]] = ()):
+        self._buckets: Dict[Tuple[Optional[str], Optional[str]], List[Tuple[int, dict]]] = {}
+        self._ranges: Dict[Optional[str], List[Tuple[int, int, int, dict]]] = {}
+        self._keys: Dict[int, Tuple[Optional[str], List[Optional[str]], bool]] = {}
+        self._segments: Dict[Optional[str], Tuple[List[int], List[List[Tuple[int, dict]]]]] = {}
+        self._cache: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._sequence = 0
+        self.rebuild(rules)
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def rule_keys(rule) -> Tuple[Optional[str], List[Optional[str]], Tuple[Tuple[int, int], ...]]:
+        """Return (source, exact event ids, id ranges) with None for wildcards"""
+        source = normalize_key(rule.get('source'))
+        try:
+            spec = parse_id_spec(rule.get('event_id'))
+        except RuleSyntaxError:
+            # Left to the rule compiler to report; matched literally here
+            spec = frozenset([normalize_key(rule.get('event_id'))]), ()
+        if spec is None:
+            return source, [None], ()
+        ids, ranges = spec
+        return source, sorted(ids), ranges
+
+    def rebuild(self, rules: Iterable[Dict[str, Any]]) -> None:
+        self._buckets = {}
+        self._ranges = {}
+        self._keys = {}
+        self._segments = {}
+        self._cache = {}
+        self._sequence = 0
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: Dict[str, Any]) -> None:
+        source, ids, ranges = self.rule_keys(rule)
+        self._cache = {}
+        sequence = self._sequence
+        self._sequence += 1
+        for event_id in ids:
+            self._buckets.setdefault((source, event_id), []).append((sequence, rule))
+        for low, high in ranges:
+            insort(self._ranges.setdefault(source, []), (low, high, sequence, rule))
+        if ranges:
+            self._segments.pop(source, None)
+        # Removal uses the keys the rule was added under, even if it was edited since
+        self._keys[id(rule)] = (source, ids, bool(ranges))
+
+    def remove(self, rule: Dict[str, Any]) -> None:
+        keys = self._keys.pop(id(rule), None)
+        if keys is None:
+            return
+        source, ids, has_ranges = keys
+        self._cache = {}
+        for event_id in ids:
+            key = (source, event_id)
+            bucket = self._buckets.get(key, [])
+            for i, (_, indexed) in enumerate(bucket):
+                if indexed is rule:
+                    del bucket[i]
+                    break
+            if not bucket:
+                self._buckets.pop(key, None)
+        if has_ranges:
+            ranges = [entry for entry in self._ranges[source] if entry[3] is not rule]
+            if ranges:
+                self._ranges[source] = ranges
+            else:
+                del self._ranges[source]
+            self._segments.pop(source, None)
+
+    def match(self, source: str, event_id) -> List[Dict[str, Any]]:
+        """Return the rules whose source and event id accept this event
+
+        The list is shared with later calls and must not be modified.
+        """
+        event_key = str(event_id)
+        cache_key = (source, event_key)
+        found = self._cache.get(cache_key)
+        if found is None:
+            if len(self._cache) >= self.MAX_CACHED:
+                self._cache = {}
+            found = self._cache[cache_key] = self._lookup(source, event_id, event_key)
+        return found
+
+    def _lookup(self, source: str, event_id, event_key: str) -> List[Dict[str, Any]]:
+        buckets = self._buckets
+        found = None
+        merged = False
+        for key in ((source, event_key), (source, None), (None, event_key), (None, None)):
+            bucket = buckets.get(key)
+            if bucket:
+                if found is None:
+                    found = bucket
+                else:
+                    found = found + bucket
+                    merged = True
+        if self._ranges:
+            in_range = self._match_ranges(source, event_id)
+            if in_range:
+                merged = merged or found is not None or len(in_range) > 1
+                found = in_range if found is None else found + in_range
+        if found is None:
+            return []
+        if merged:
+            # A rule listing an id that also falls in one of its ranges
+            # is found twice
+            return [rule for _, rule in sorted(dict(found).items())]
+        return [rule for _, rule in found]
+
+    def _match_ranges(self, source: str, event_id) -> List[Tuple[int, dict]]:
+        try:
+            number = int(event_id)
+        except (TypeError, ValueError):
+            return []
+        found = []
+        for key in (source, None):
+            if key not in self._ranges:
+                continue
+            segments = self._segments.get(key)
+            if segments is None:
+                segments = self._segments[key] = self._build_segments(self._ranges[key])
+            bounds, covering = segments
+            position = bisect_right(bounds, number) - 1
+            if 0 <= position < len(covering):
+                found.extend(covering[position])
+        return found
+
+    @staticmethod
+    def _build_segments(ranges):
+        """Cut ranges at every start and end into (bounds, rules covering each)"""
+        bounds = sorted({low for low, _, _, _ in ranges} | {high + 1 for _, high, _, _ in ranges})
+        covering = [[] for _ in bounds[:-1]]
+        for low, high, sequence, rule in ranges:
+            for position in range(bisect_right(bounds, low) - 1, bisect_right(bounds, high)):
+                covering[position].append((sequence, rule))
+        for entries in covering:
+            entries.sort(key=lambda entry: entry[0])
+        return bounds, covering
\ No newline at end of file
@@ -0,0 +1 @@
+# This file makes the event_store directory a Python package
\ No newline at end of file
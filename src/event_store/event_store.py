@@ -0,0 +1,348 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from src.event_viewer.event_source import host_name
+
+# Field names follow pywin32 event records so stored rows can be shown and
+# matched like live ones; Host, LogType and RuleName (set for triggered
+# events) are extra
+StoredEvent = namedtuple('StoredEvent', [
+    'id', 'Host', 'LogType', 'RecordNumber', 'TimeGenerated', 'SourceName',
+    'EventID', 'EventType', 'StringInserts', 'RuleName'
+])
+
+PARTITION_PREFIX = 'events_'
+PRUNE_INTERVAL = 3600  # seconds between retention checks while inserting
+INSERT_SEPARATOR = '\x1f'
+
+COLUMNS = ('id, host, log_type, record_number, time_generated, source, '
+           'event_id, event_type, inserts, rule_name')
+
+
+def encode_inserts(inserts):
+    if inserts is None:
+        return None
+    if isinstance(inserts, str):
+        return inserts
+    return INSERT_SEPARATOR.join(str(value) for value in inserts)
+
+
+def decode_inserts(value):
+    if value is None:
+        return None
+    return tuple(value.split(INSERT_SEPARATOR))
+
+
+def to_timestamp(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return value.timestamp()
+
+
+def make_event(row):
+    return StoredEvent(row[0], row[1], row[2], row[3], datetime.fromtimestamp(row[4]), row[5],
+                       row[6], row[7], decode_inserts(row[8]), row[9])
+
+
+class EventStore:
+    """Day-partitioned SQLite store for ingested and triggered events
+
+    Each local calendar day of TimeGenerated gets its own table, indexed
+    on time, source, event id and event type, so queries only touch the
+    days they cover and retention is enforced by dropping whole tables.
+    The database runs in WAL mode: inserts go through one shared
+    connection, while every query opens its own read connection and
+    streams rows in chunks, so readers never block the ingest path.
+    """
+
+    def __init__(self, path: str = 'history/events.db', retention_days: int = 30):
+        self.path = path
+        self.retention_days = retention_days
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._partitions = set(self._list_partitions(self._conn))
+        for name in self._partitions:
+            self._upgrade_partition(name)
+        self._last_prune = 0.0
+        self.prune()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    @staticmethod
+    def _list_partitions(conn) -> List[str]:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+            (PARTITION_PREFIX + '%',)
+        ).fetchall()
+        return sorted(row[0] for row in rows)
+
+    @staticmethod
+    def partition_name(timestamp: float) -> str:
+        return PARTITION_PREFIX + datetime.fromtimestamp(timestamp).strftime('%Y%m%d')
+
+    @staticmethod
+    def partition_day(name: str) -> datetime:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], '%Y%m%d')
+
+    def _create_partition(self, name: str) -> None:
+        self._conn.executescript(f'''
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY,
+                host TEXT,
+                log_type TEXT,
+                record_number INTEGER,
+                time_generated REAL NOT NULL,
+                source TEXT,
+                event_id INTEGER,
+                event_type INTEGER,
+                inserts TEXT,
+                rule_name TEXT
+            );
+            CREATE INDEX IF NOT EXISTS {name}_time ON {name} (time_generated);
+            CREATE INDEX IF NOT EXISTS {name}_source ON {name} (source, time_generated);
+            CREATE INDEX IF NOT EXISTS {name}_event_id ON {name} (event_id, time_generated);
+            CREATE INDEX IF NOT EXISTS {name}_event_type ON {name} (event_type, time_generated);
+            CREATE UNIQUE INDEX IF NOT EXISTS {name}_host_record
+                ON {name} (host, log_type, record_number, time_generated) WHERE rule_name IS NULL;
+        ''')
+        self._partitions.add(name)
+
+    def _upgrade_partition(self, name: str) -> None:
+        """Add the host column to a partition created before it existed
+
+        Record numbers are only unique per host, so the record index moves
+        to (host, log_type, record, time). Events stored before then were
+        read from the local logs and get this machine's name.
+        """
+        columns = [row[1] for row in self._conn.execute(f'PRAGMA table_info({name})')]
+        if 'host' in columns:
+            return
+        with self._conn:
+            self._conn.execute(f'ALTER TABLE {name} ADD COLUMN host TEXT')
+            self._conn.execute(f'UPDATE {name} SET host = ? WHERE rule_name IS NULL',
+                               (host_name(None),))
+            self._conn.execute(f'DROP INDEX IF EXISTS {name}_record')
+            self._conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {name}_host_record '
+                               f'ON {name} (host, log_type, record_number, time_generated) '
+                               f'WHERE rule_name IS NULL')
+
+    def _insert(self, rows) -> int:
+        """Insert (host, log_type, record, time, source, id, type, inserts, rule) rows"""
+        by_partition = {}
+        for row in rows:
+            by_partition.setdefault(self.partition_name(row[3]), []).append(row)
+        with self._lock:
+            try:
+                for name in by_partition:
+                    if name not in self._partitions:
+                        self._create_partition(name)
+                with self._conn:
+                    for name, partition_rows in by_partition.items():
+                        # Rereads of a log are skipped by the unique record index
+                        self._conn.executemany(
+                            f'INSERT OR IGNORE INTO {name} (host, log_type, record_number, '
+                            f'time_generated, source, event_id, event_type, inserts, rule_name) '
+                            f'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                            partition_rows
+                        )
+            except sqlite3.Error as e:
+                logging.error(f"Error writing to event store: {e}")
+                return 0
+        if time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+            self.prune()
+        return len(rows)
+
+    def insert_events(self, host: str, log_type: str, events) -> int:
+        """Bulk insert records read from an event log on host
+
+        'localhost' and the other local aliases are stored as this
+        machine's name, so the viewer and the collector agree on it.
+        """
+        host = host_name(host)
+        return self._insert([
+            (host, log_type, event.RecordNumber, event.TimeGenerated.timestamp(), event.SourceName,
+             event.EventID, event.EventType, encode_inserts(event.StringInserts), None)
+            for event in events
+        ])
+
+    def insert_triggered(self, rows) -> int:
+        """Bulk insert history rows (see HistoryWriter) for triggered rules"""
+        return self._insert([
+            (None, None, None, event_time.timestamp(), source, event_id, event_type,
+             encode_inserts(inserts), rule_name)
+            for _, rule_name, event_time, source, event_id, event_type, inserts, *_ in rows
+        ])
+
+    def _partitions_between(self, start: Optional[float], end: Optional[float]) -> List[str]:
+        with self._lock:
+            names = sorted(self._partitions)
+        if start is not None:
+            first = self.partition_name(start)
+            names = [name for name in names if name >= first]
+        if end is not None:
+            last = self.partition_name(end)
+            names = [name for name in names if name <= last]
+        return names
+
+    @staticmethod
+    def _where(start, end, log_type, source, event_id, event_type, triggered, before=None, after=None,
+               host=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append('time_generated >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('time_generated < ?')
+            params.append(end)
+        if host is not None:
+            clauses.append('host = ?')
+            params.append(host_name(host))
+        if log_type is not None:
+            clauses.append('log_type = ?')
+            params.append(log_type)
+        if source is not None:
+            clauses.append('source = ?')
+            params.append(source)
+        if event_id is not None:
+            clauses.append('event_id = ?')
+            params.append(event_id)
+        if event_type is not None:
+            clauses.append('event_type = ?')
+            params.append(event_type)
+        if triggered is not None:
+            clauses.append('rule_name IS NOT NULL' if triggered else 'rule_name IS NULL')
+        if before is not None:
+            clauses.append('(time_generated < ? OR (time_generated = ? AND id < ?))')
+            params.extend([before[0], before[0], before[1]])
+        if after is not None:
+            clauses.append('(time_generated > ? OR (time_generated = ? AND id > ?))')
+            params.extend([after[0], after[0], after[1]])
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, start=None, end=None, log_type=None, source=None, event_id=None,
+              event_type=None, triggered=None, descending=False, limit=None,
+              before=None, after=None, host=None, chunk_size: int = 1000) -> Iterator[StoredEvent]:
+        """Yield matching events in time order without loading them all
+
+        start/end take datetimes or epoch seconds (end is exclusive).
+        before/after take a (epoch seconds, id) position, as returned by
+        position(), for keyset paging. triggered selects rule-triggered
+        rows (True), ingested rows (False) or both (None). host limits
+        ingested rows to one machine.
+        """
+        start, end = to_timestamp(start), to_timestamp(end)
+        where, params = self._where(start, end, log_type, source, event_id, event_type,
+                                    triggered, before, after, host)
+        order = 'DESC' if descending else 'ASC'
+        partitions = self._partitions_between(
+            start if after is None else max(start or after[0], after[0]),
+            end if before is None else min(end or before[0], before[0])
+        )
+        if descending:
+            partitions.reverse()
+
+        conn = self._connect()
+        try:
+            remaining = limit
+            for name in partitions:
+                sql = (f'SELECT {COLUMNS} FROM {name}{where} '
+                       f'ORDER BY time_generated {order}, id {order}')
+                if remaining is not None:
+                    sql += f' LIMIT {int(remaining)}'
+                try:
+                    cursor = conn.execute(sql, params)
+                except sqlite3.OperationalError:
+                    # Partition dropped by retention since it was listed
+                    continue
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield make_event(row)
+                    if remaining is not None:
+                        remaining -= len(rows)
+                if remaining is not None and remaining <= 0:
+                    return
+        finally:
+            conn.close()
+
+    def page(self, limit: int, before: Optional[Tuple[float, int]] = None, **filters) -> List[StoredEvent]:
+        """Newest-first page of up to limit events older than `before`"""
+        return list(self.query(descending=True, limit=limit, before=before, **filters))
+
+    @staticmethod
+    def position(event: StoredEvent) -> Tuple[float, int]:
+        return event.TimeGenerated.timestamp(), event.id
+
+    def count(self, start=None, end=None, **filters) -> int:
+        start, end = to_timestamp(start), to_timestamp(end)
+        where, params = self._where(start, end, filters.get('log_type'), filters.get('source'),
+                                    filters.get('event_id'), filters.get('event_type'),
+                                    filters.get('triggered'), host=filters.get('host'))
+        total = 0
+        conn = self._connect()
+        try:
+            for name in self._partitions_between(start, end):
+                try:
+                    total += conn.execute(f'SELECT COUNT(*) FROM {name}{where}', params).fetchone()[0]
+                except sqlite3.OperationalError:
+                    continue
+        finally:
+            conn.close()
+        return total
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Drop day partitions older than retention_days; returns how many"""
+        self._last_prune = time.monotonic()
+        if not self.retention_days:
+            return 0
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=self.retention_days)).strftime('%Y%m%d')
+        dropped = 0
+        with self._lock:
+            for name in sorted(self._partitions):
+                if name[len(PARTITION_PREFIX):] >= cutoff:
+                    break
+                try:
+                    self._conn.execute(f'DROP TABLE IF EXISTS {name}')
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logging.error(f"Error pruning event store partition {name}: {e}")
+                    continue
+                self._partitions.discard(name)
+                dropped += 1
+        return dropped
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_event_store(config) -> Optional[EventStore]:
+    """Open the store described by the event_store config section, if enabled"""
+    if not config.get('event_store.enabled', True):
+        return None
+    try:
+        store = EventStore(
+            config.get('event_store.path', 'history/events.db'),
+            config.get('event_store.retention_days', 30)
+        )
+    except sqlite3.Error as e:
+        logging.error(f"Error opening event store: {e}")
+        return None
+    # Retention can be changed while running; it applies at the next prune
+    config.subscribe('event_store.retention_days', lambda days: setattr(store, 'retention_days', days))
+    return store
\ No newline at end of file
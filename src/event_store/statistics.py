@@ -0,0 +1,427 @@
+import logging
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import namedtuple
+from datetime import date, datetime
+from operator import add
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.event_viewer.event_source import host_name
+from src.utils.metrics import get_registry
+
+# Bucket widths, finest first; days follow the local calendar
+RESOLUTIONS = ('minute', 'hour', 'day')
+# Fields of a series key, in order, for grouping and filtering
+FIELDS = ('log', 'source', 'event_id', 'event_type')
+SeriesKey = Tuple[str, str, int, int]
+
+MAGIC = b'AEIOSTAT'
+FORMAT_VERSION = 1
+# magic, version, minute/hour/day buckets, series count, cursor count
+HEADER = struct.Struct('<8sHIIIII')
+# record number, TimeGenerated (epoch seconds), host length, log length
+CURSOR = struct.Struct('<qdHH')
+CRC = struct.Struct('<I')
+
+SPARK_BLOCKS = ' ▁▂▃▄▅▆▇█'
+
+Spike = namedtuple('Spike', ['value', 'count', 'mean', 'score'])
+
+
+def current_bucket(resolution: str, timestamp: Optional[float] = None) -> int:
+    """Bucket number holding timestamp (epoch seconds, default now)"""
+    if timestamp is None:
+        timestamp = time.time()
+    if resolution == 'minute':
+        return int(timestamp // 60)
+    if resolution == 'hour':
+        return int(timestamp // 3600)
+    return datetime.fromtimestamp(timestamp).toordinal()
+
+
+def bucket_start(resolution: str, bucket: int) -> datetime:
+    """Local time a bucket starts at"""
+    if resolution == 'day':
+        return datetime.fromordinal(bucket)
+    return datetime.fromtimestamp(bucket * (60 if resolution == 'minute' else 3600))
+
+
+def sparkline(values: List[int]) -> str:
+    """values drawn as block characters, scaled to the largest"""
+    top = max(values, default=0)
+    if not top:
+        return SPARK_BLOCKS[0] * len(values)
+    scale = (len(SPARK_BLOCKS) - 1) / top
+    return ''.join(SPARK_BLOCKS[math.ceil(value * scale)] for value in values)
+
+
+class Series:
+    """Counts of one (log, source, event id, type) at each resolution
+
+    Each resolution is a ring of array('I') counts and the number of the
+    newest bucket written. A ring is only allocated once something is
+    counted at that resolution, and is dropped again once all it holds
+    has aged out.
+    """
+    __slots__ = ('rings', 'lasts')
+
+    def __init__(self):
+        self.rings: List[Optional[array]] = [None, None, None]
+        self.lasts = [-1, -1, -1]
+
+    def add(self, resolution: int, bucket: int, count: int, size: int) -> None:
+        ring = self.rings[resolution]
+        last = self.lasts[resolution]
+        if ring is None or bucket - last >= size:
+            ring = self.rings[resolution] = array('I', bytes(4 * size))
+            self.lasts[resolution] = bucket
+        elif bucket > last:
+            for skipped in range(last + 1, bucket + 1):
+                ring[skipped % size] = 0
+            self.lasts[resolution] = bucket
+        elif bucket <= last - size:
+            # Older than anything this ring still holds
+            return
+        ring[bucket % size] += count
+
+    def _slice(self, resolution: int, end: int, count: int, size: int):
+        """(zeros before, held counts, zeros after) for the count buckets up to end"""
+        ring = self.rings[resolution]
+        first = end - count + 1
+        if ring is None:
+            return count, None, 0
+        last = self.lasts[resolution]
+        low, high = max(first, last - size + 1), min(end, last)
+        if low > high:
+            return count, None, 0
+        start, stop = low % size, high % size + 1
+        held = ring[start:stop] if start < stop else ring[start:] + ring[:stop]
+        return low - first, held, end - high
+
+    def read(self, resolution: int, end: int, count: int, size: int) -> List[int]:
+        """Counts of the count buckets up to and including end"""
+        before, held, after = self._slice(resolution, end, count, size)
+        if held is None:
+            return [0] * count
+        return [0] * before + held.tolist() + [0] * after
+
+    def total(self, resolution: int, end: int, count: int, size: int) -> int:
+        held = self._slice(resolution, end, count, size)[1]
+        return 0 if held is None else sum(held)
+
+
+class EventStatistics:
+    """Event counts per (log, source, event id, type) in minute, hour and day buckets
+
+    Events are counted as they are read, by the collector and by the
+    viewer's log reader, into fixed rings per series: the newest
+    `minutes` one-minute buckets, `hours` one-hour buckets and `days`
+    days. Older history survives only at the coarser resolutions. A
+    cursor per (host, log) skips events counted already, so rereads of a
+    log are not counted twice. Queries read at most the buckets they
+    ask for from each series they cover.
+
+    Everything is written to one file, atomically, every save_interval
+    seconds while events arrive and on close(), and loaded when created.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, path: str = 'history/statistics.dat', minutes: int = 1440,
+                 hours: int = 168, days: int = 90, save_interval: float = 60):
+        self.path = path
+        self.sizes = (minutes, hours, days)
+        self.save_interval = save_interval
+        self.series: Dict[SeriesKey, Series] = {}
+        self.cursors: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self.events_counted = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.load()
+
+        metrics = get_registry()
+        metrics.gauge('statistics_series', 'Event statistics series held', lambda: len(self.series))
+        metrics.counter('statistics_events_total', 'Events counted into statistics',
+                        lambda: self.events_counted)
+
+    def add(self, host: str, log_type: str, events: Iterable) -> None:
+        """Count events read from one log, oldest first
+
+        host is normalised like EventStore.insert_events does, so the
+        viewer's 'localhost' and the collector share one cursor.
+        """
+        host = host_name(host)
+        batch: Dict[tuple, int] = {}
+        with self._lock:
+            last_record, last_time = self.cursors.get((host, log_type), (-1, float('-inf')))
+            for event in events:
+                timestamp = event.TimeGenerated.timestamp()
+                record = event.RecordNumber
+                if record <= last_record and timestamp <= last_time:
+                    continue
+                # A lower number with a newer time: the log was cleared
+                last_record = record
+                last_time = max(last_time, timestamp)
+                key = (event.SourceName or '', event.EventID, event.EventType, int(timestamp // 60))
+                batch[key] = batch.get(key, 0) + 1
+            if not batch:
+                return
+            self.cursors[(host, log_type)] = (last_record, last_time)
+            minutes, hours, days = self.sizes
+            series = self.series
+            day_of: Dict[int, int] = {}
+            for (source, event_id, event_type, minute), count in batch.items():
+                key = (log_type, source, event_id, event_type)
+                entry = series.get(key)
+                if entry is None:
+                    entry = series[key] = Series()
+                day = day_of.get(minute)
+                if day is None:
+                    day = day_of[minute] = date.fromtimestamp(minute * 60).toordinal()
+                entry.add(0, minute, count, minutes)
+                entry.add(1, minute // 60, count, hours)
+                entry.add(2, day, count, days)
+                self.events_counted += count
+            self._dirty = True
+            # Only one of the threads adding saves when it is due
+            due = time.monotonic() - self._last_save >= self.save_interval
+            if due:
+                self._last_save = time.monotonic()
+        if due:
+            self.save()
+
+    def _matching(self, filters: dict) -> list:
+        conditions = [(FIELDS.index(field), value) for field, value in filters.items() if value is not None]
+        items = self.series.items()
+        if not conditions:
+            return list(items)
+        if len(conditions) == 1:
+            ((position, value),) = conditions
+            return [item for item in items if item[0][position] == value]
+        return [(key, entry) for key, entry in items
+                if all(key[position] == value for position, value in conditions)]
+
+    def _window(self, resolution: str, count: int, now: Optional[float]) -> Tuple[int, int, int]:
+        index = RESOLUTIONS.index(resolution)
+        size = self.sizes[index]
+        return index, current_bucket(resolution, now), min(count, size)
+
+    def counts(self, resolution: str = 'minute', count: int = 60, now: Optional[float] = None,
+               **filters) -> List[int]:
+        """Per-bucket totals of the last count buckets over the series matching filters
+
+        filters are field=value pairs from FIELDS; the newest bucket,
+        still filling, comes last.
+        """
+        index, end, count = self._window(resolution, count, now)
+        size = self.sizes[index]
+        totals = [0] * count
+        with self._lock:
+            for _, entry in self._matching(filters):
+                totals = list(map(add, totals, entry.read(index, end, count, size)))
+        return totals
+
+    def grouped(self, by: str = 'source', resolution: str = 'minute', count: int = 60,
+                now: Optional[float] = None, end_offset: int = 0, **filters) -> Dict[object, List[int]]:
+        """counts() for each value of the field `by`
+
+        end_offset moves the window that many buckets back from the newest.
+        """
+        index, end, count = self._window(resolution, count, now)
+        end -= end_offset
+        size = self.sizes[index]
+        position = FIELDS.index(by)
+        groups: Dict[object, List[int]] = {}
+        with self._lock:
+            for key, entry in self._matching(filters):
+                values = entry.read(index, end, count, size)
+                group = groups.get(key[position])
+                groups[key[position]] = values if group is None else list(map(add, group, values))
+        return groups
+
+    def top(self, by: str = 'source', resolution: str = 'hour', count: int = 24, limit: int = 10,
+            now: Optional[float] = None, **filters) -> List[Tuple[object, int]]:
+        """The limit values of `by` with the most events in the last count buckets"""
+        index, end, count = self._window(resolution, count, now)
+        size = self.sizes[index]
+        position = FIELDS.index(by)
+        totals: Dict[object, int] = {}
+        with self._lock:
+            for key, entry in self._matching(filters):
+                total = entry.total(index, end, count, size)
+                if total:
+                    totals[key[position]] = totals.get(key[position], 0) + total
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def spikes(self, by: str = 'source', resolution: str = 'minute', count: int = 60,
+               threshold: float = 3.0, min_count: int = 10, now: Optional[float] = None,
+               **filters) -> List[Spike]:
+        """Values of `by` whose newest complete bucket stands out from the ones before
+
+        The score is how far that bucket is above the mean of the
+        count - 1 buckets before it, in standard deviations, never less
+        than the square root of the mean (or 1), so rare events do not
+        score high on noise. Strongest first.
+        """
+        spikes = []
+        for value, values in self.grouped(by, resolution, count, now, end_offset=1, **filters).items():
+            current, baseline = values[-1], values[:-1]
+            if current < min_count or not baseline:
+                continue
+            mean = sum(baseline) / len(baseline)
+            deviation = math.sqrt(sum((sample - mean) ** 2 for sample in baseline) / len(baseline))
+            score = (current - mean) / max(deviation, math.sqrt(mean), 1.0)
+            if score >= threshold:
+                spikes.append(Spike(value, current, mean, score))
+        return sorted(spikes, key=lambda spike: spike.score, reverse=True)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logging.error(f"Error reading event statistics: {e}")
+            return
+        try:
+            self._decode(data)
+        except (ValueError, struct.error, UnicodeDecodeError) as e:
+            logging.error(f"Ignoring event statistics in {self.path}: {e}")
+            self.series = {}
+            self.cursors = {}
+
+    def _decode(self, data: bytes) -> None:
+        if len(data) < HEADER.size + CRC.size or zlib.crc32(data[:-CRC.size]) != CRC.unpack_from(data, len(data) - CRC.size)[0]:
+            raise ValueError("truncated or corrupt")
+        magic, version, minutes, hours, days, series_count, cursor_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"not a version {FORMAT_VERSION} statistics file")
+        position = HEADER.size
+        cursors = {}
+        for _ in range(cursor_count):
+            record, stamp, host_size, log_size = CURSOR.unpack_from(data, position)
+            position += CURSOR.size
+            host = data[position:position + host_size].decode('utf-8')
+            position += host_size
+            log_type = data[position:position + log_size].decode('utf-8')
+            position += log_size
+            # Files saved before hosts were normalised may hold 'localhost'
+            key = (host_name(host), log_type)
+            cursors[key] = max(cursors.get(key, (record, stamp)), (record, stamp))
+
+        def take(typecode: str, length: int) -> array:
+            nonlocal position
+            values = array(typecode)
+            end = position + values.itemsize * length
+            values.frombytes(data[position:end])
+            position = end
+            if len(values) != length:
+                raise ValueError("truncated")
+            return values
+
+        (blob_size,) = CRC.unpack_from(data, position)
+        position += CRC.size
+        names = data[position:position + blob_size].decode('utf-8').split('\0') if series_count else []
+        position += blob_size
+        if len(names) != 2 * series_count:
+            raise ValueError("series names do not match the series count")
+        event_ids = take('q', series_count)
+        event_types = take('H', series_count)
+        entries = [Series() for _ in range(series_count)]
+        for index, saved_size in enumerate((minutes, hours, days)):
+            size = self.sizes[index]
+            lasts = take('q', series_count)
+            for entry, last in zip(entries, lasts):
+                if last < 0:
+                    continue
+                ring = take('I', saved_size)
+                if saved_size == size:
+                    entry.rings[index], entry.lasts[index] = ring, last
+                    continue
+                # Resized in the config: keep what fits
+                kept = min(saved_size, size)
+                for bucket in range(last - kept + 1, last + 1):
+                    if ring[bucket % saved_size]:
+                        entry.add(index, bucket, ring[bucket % saved_size], size)
+        self.series = {(names[2 * i], names[2 * i + 1], event_ids[i], event_types[i]): entries[i]
+                       for i in range(series_count)}
+        self.cursors = cursors
+
+    def _encode(self) -> bytes:
+        # Rings that only hold buckets too old to show are dropped first
+        now = time.time()
+        ends = [current_bucket(resolution, now) for resolution in RESOLUTIONS]
+        for key, entry in list(self.series.items()):
+            for index, size in enumerate(self.sizes):
+                if entry.rings[index] is not None and entry.lasts[index] <= ends[index] - size:
+                    entry.rings[index], entry.lasts[index] = None, -1
+            if entry.rings == [None, None, None]:
+                del self.series[key]
+
+        keys = list(self.series)
+        entries = [self.series[key] for key in keys]
+        parts = [HEADER.pack(MAGIC, FORMAT_VERSION, *self.sizes, len(keys), len(self.cursors))]
+        for (host, log_type), (record, stamp) in self.cursors.items():
+            host, log_type = host.encode('utf-8'), log_type.encode('utf-8')
+            parts += [CURSOR.pack(record, stamp, len(host), len(log_type)), host, log_type]
+        blob = '\0'.join(name for key in keys for name in key[:2]).encode('utf-8')
+        parts += [CRC.pack(len(blob)), blob,
+                  array('q', [key[2] for key in keys]).tobytes(),
+                  array('H', [key[3] for key in keys]).tobytes()]
+        for index in range(len(RESOLUTIONS)):
+            parts.append(array('q', [entry.lasts[index] for entry in entries]).tobytes())
+            parts += [entry.rings[index].tobytes() for entry in entries if entry.rings[index] is not None]
+        data = b''.join(parts)
+        return data + CRC.pack(zlib.crc32(data))
+
+    def save(self) -> None:
+        """Write everything to path, replacing it atomically"""
+        with self._save_lock:
+            with self._lock:
+                self._last_save = time.monotonic()
+                if not self._dirty and os.path.exists(self.path):
+                    return
+                data = self._encode()
+                self._dirty = False
+            self._write(data)
+
+    def _write(self, data: bytes) -> None:
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.error(f"Error writing event statistics: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        self.save()
+
+
+def create_statistics(config) -> Optional[EventStatistics]:
+    """EventStatistics set up from the statistics config section, if enabled"""
+    if not config.get('statistics.enabled', True):
+        return None
+    return EventStatistics(
+        config.get('statistics.path', 'history/statistics.dat'),
+        config.get('statistics.minutes', 1440),
+        config.get('statistics.hours', 168),
+        config.get('statistics.days', 90),
+        config.get('statistics.save_interval', 60)
+    )
\ No newline at end of file
@@ -0,0 +1,126 @@
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+from typing import Hashable
+
+
+class AggregatedEvent(namedtuple('AggregatedEvent', ['event', 'Count', 'New', 'LastSeen', 'GroupId'])):
+    """Identical events collapsed into their first occurrence
+
+    Count is how many occurrences the group holds so far and New how
+    many of them arrived since the previous snapshot of the same group;
+    LastSeen is the TimeGenerated of the latest. Record fields are
+    passed through from the first occurrence, so it can be handed to
+    anything that takes an event record.
+    """
+    __slots__ = ()
+
+    RecordNumber = property(lambda self: self.event.RecordNumber)
+    TimeGenerated = property(lambda self: self.event.TimeGenerated)
+    SourceName = property(lambda self: self.event.SourceName)
+    EventID = property(lambda self: self.event.EventID)
+    EventType = property(lambda self: self.event.EventType)
+    EventCategory = property(lambda self: self.event.EventCategory)
+    StringInserts = property(lambda self: self.event.StringInserts)
+    ComputerName = property(lambda self: self.event.ComputerName)
+    LogType = property(lambda self: getattr(self.event, 'LogType', None))
+    Host = property(lambda self: getattr(self.event, 'Host', None))
+
+
+class _Group:
+    __slots__ = ('event', 'id', 'count', 'new', 'last_seen')
+
+    def __init__(self, event, group_id):
+        self.event = event
+        self.id = group_id
+        self.count = 0
+        self.new = 0
+        self.last_seen = event.TimeGenerated
+
+
+class EventAggregator:
+    """Collapses storms of identical events into counted groups
+
+    Events are identical when host, log, source, event id, type and
+    string inserts all match. A group takes every identical event up to
+    window seconds (of TimeGenerated) after its first one; the next
+    starts a new group. add() returns one AggregatedEvent snapshot per
+    group the batch touched, in the order they were first touched, and a
+    group touched again in a later batch comes back under the same
+    GroupId with its counts brought up to date. Groups are forgotten
+    once their window has passed, or oldest first beyond max_groups.
+    With a window of 0, add() passes events through unchanged.
+    """
+
+    def __init__(self, window: float = 60.0, max_groups: int = 10000):
+        self.window = window
+        self.max_groups = max_groups
+        self.groups: 'OrderedDict[Hashable, _Group]' = OrderedDict()
+        self.next_id = 1
+        self.events_in = 0
+        self.rows_out = 0
+
+    @staticmethod
+    def key(event) -> Hashable:
+        inserts = event.StringInserts
+        if isinstance(inserts, list):
+            inserts = tuple(inserts)
+        return (getattr(event, 'Host', None), getattr(event, 'LogType', None),
+                event.SourceName, event.EventID, event.EventType, inserts)
+
+    def reset(self) -> None:
+        """Forget open groups, e.g. when the log is read again from scratch"""
+        self.groups.clear()
+
+    def add(self, events) -> list:
+        events = list(events)
+        self.events_in += len(events)
+        if not self.window:
+            self.rows_out += len(events)
+            return events
+        window = timedelta(seconds=self.window)
+        groups, key_of = self.groups, self.key
+        touched = {}
+        for event in events:
+            key = key_of(event)
+            group = groups.get(key)
+            if group is None or event.TimeGenerated - group.event.TimeGenerated > window:
+                if group is not None:
+                    # Reinserted so the dict stays in order of first occurrence
+                    del groups[key]
+                group = groups[key] = _Group(event, self.next_id)
+                self.next_id += 1
+            group.count += 1
+            group.new += 1
+            if event.TimeGenerated > group.last_seen:
+                group.last_seen = event.TimeGenerated
+            touched[group] = None
+
+        snapshots = []
+        for group in touched:
+            snapshots.append(AggregatedEvent(group.event, group.count, group.new, group.last_seen, group.id))
+            group.new = 0
+        self.rows_out += len(snapshots)
+        if events:
+            self._expire(events[-1].TimeGenerated - window)
+        return snapshots
+
+    def _expire(self, cutoff) -> None:
+        groups = self.groups
+        while groups:
+            group = next(iter(groups.values()))
+            if group.event.TimeGenerated >= cutoff and len(groups) <= self.max_groups:
+                break
+            groups.popitem(last=False)
+
+
+def create_aggregator(config) -> EventAggregator:
+    """An EventAggregator set up from the aggregation config section"""
+    return EventAggregator(
+        config.get('aggregation.window', 60),
+        config.get('aggregation.max_groups', 10000)
+    )
+
+
+def event_count(event) -> int:
+    """Occurrences an event stands for: New for a group snapshot, else 1"""
+    return getattr(event, 'New', 1)
\ No newline at end of file
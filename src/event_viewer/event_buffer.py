@@ -0,0 +1,341 @@
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+# Row views read as the tuples EventTableModel documents:
+# (TimeGenerated, SourceName, EventID, EventType, StringInserts, LogType,
+#  Count, LastSeen, GroupId)
+ROW_FIELDS = 9
+
+# Starting capacity of a buffer without a fixed one
+INITIAL_CAPACITY = 256
+
+
+class StringPool:
+    """Reference-counted pool handing out small ids for repeated values
+
+    Id 0 always stands for None. An id is freed and reused once every
+    row that took it has released it, so the pool only ever holds the
+    values of rows still buffered.
+    """
+
+    def __init__(self):
+        self.values: list = [None]
+        self.refs: List[int] = [0]
+        self.ids: Dict[object, int] = {}
+        self.free: List[int] = []
+
+    def add(self, value) -> int:
+        if value is None:
+            return 0
+        value_id = self.ids.get(value)
+        if value_id is None:
+            if self.free:
+                value_id = self.free.pop()
+                self.values[value_id] = value
+            else:
+                value_id = len(self.values)
+                self.values.append(value)
+                self.refs.append(0)
+            self.ids[value] = value_id
+        self.refs[value_id] += 1
+        return value_id
+
+    def release(self, value_id: int):
+        """Drop one reference; returns the value if that was the last"""
+        if not value_id:
+            return None
+        self.refs[value_id] -= 1
+        if self.refs[value_id]:
+            return None
+        value = self.values[value_id]
+        del self.ids[value]
+        self.values[value_id] = None
+        self.free.append(value_id)
+        return value
+
+    def __len__(self):
+        return len(self.ids)
+
+    def copy(self) -> 'StringPool':
+        pool = StringPool.__new__(StringPool)
+        pool.values = list(self.values)
+        pool.refs = list(self.refs)
+        pool.ids = dict(self.ids)
+        pool.free = list(self.free)
+        return pool
+
+
+class Interner:
+    """Small ids for a bounded set of values, such as source names
+
+    Values are kept for good; id 0 stands for None.
+    """
+
+    def __init__(self):
+        self.values: list = [None]
+        self.ids: Dict[object, int] = {None: 0}
+
+    def add(self, value) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def id_list(self, values) -> List[int]:
+        get, add = self.ids.get, self.add
+        return [get(value) or add(value) for value in values]
+
+
+class EventRow:
+    """View of one buffered event, indexable like a row tuple
+
+    Also has the pywin32 record attributes, so it can go wherever an
+    event goes. A view reads the buffer when used and is only meant to
+    live as long as the row it was made for.
+    """
+    __slots__ = ('buffer', 'position')
+
+    def __init__(self, buffer: 'EventBuffer', position: int):
+        self.buffer = buffer
+        self.position = position
+
+    def __getitem__(self, field):
+        if isinstance(field, slice):
+            return tuple(self[i] for i in range(*field.indices(ROW_FIELDS)))
+        return self.buffer.getters[field](self.position)
+
+    def __len__(self):
+        return ROW_FIELDS
+
+    def __iter__(self):
+        return (self[i] for i in range(ROW_FIELDS))
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return f'EventRow{tuple(self)!r}'
+
+    TimeGenerated = property(lambda self: self[0])
+    SourceName = property(lambda self: self[1])
+    EventID = property(lambda self: self[2])
+    EventType = property(lambda self: self[3])
+    StringInserts = property(lambda self: self[4])
+    LogType = property(lambda self: self[5])
+    Count = property(lambda self: self[6])
+    LastSeen = property(lambda self: self[7])
+    GroupId = property(lambda self: self[8])
+    RecordNumber = property(lambda self: self.buffer.records[self.position])
+
+
+class EventBuffer:
+    """Columnar ring buffer of the event fields the viewer shows
+
+    Each field is an array (times as epoch seconds) or an id into a
+    shared pool: source names and log types are interned for good, and
+    string inserts are pooled by value, so a message repeated across
+    rows is held once for as long as any row uses it. Rows are read through EventRow views made on demand.
+
+    The arrays grow by doubling as rows arrive. Once a buffer holds
+    capacity rows, appending evicts the oldest; without a capacity it
+    keeps growing.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity
+        self.start = 0
+        self.length = 0
+        self.sources = Interner()
+        self.log_types = Interner()
+        self.inserts = StringPool()
+        self._allocate(min(capacity or INITIAL_CAPACITY, INITIAL_CAPACITY))
+        self._make_getters()
+
+    def _make_getters(self) -> None:
+        self.getters = (
+            lambda p: datetime.fromtimestamp(self.times[p]),
+            lambda p: self.sources.values[self.source_ids[p]],
+            lambda p: self.event_ids[p],
+            lambda p: self.types[p],
+            lambda p: self.inserts.values[self.insert_ids[p]],
+            lambda p: self.log_types.values[self.log_type_ids[p]],
+            lambda p: self.counts[p],
+            lambda p: datetime.fromtimestamp(self.last_seen[p]),
+            lambda p: self.groups[p] or None,
+        )
+
+    def _allocate(self, size: int) -> None:
+        self.size = size
+        self.times = array('d', bytes(8 * size))
+        self.last_seen = array('d', bytes(8 * size))
+        self.records = array('q', bytes(8 * size))
+        self.event_ids = array('q', bytes(8 * size))
+        self.counts = array('q', bytes(8 * size))
+        self.groups = array('q', bytes(8 * size))
+        self.types = array('H', bytes(2 * size))
+        self.source_ids = array('I', bytes(4 * size))
+        self.log_type_ids = array('I', bytes(4 * size))
+        self.insert_ids = array('I', bytes(4 * size))
+
+    def _columns(self):
+        return ('times', 'last_seen', 'records', 'event_ids', 'counts', 'groups',
+                'types', 'source_ids', 'log_type_ids', 'insert_ids')
+
+    def __len__(self):
+        return self.length
+
+    def _position(self, index: int) -> int:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('event buffer index out of range')
+        return (self.start + index) % self.size
+
+    def __getitem__(self, index: int) -> EventRow:
+        return EventRow(self, self._position(index))
+
+    def value(self, index: int, field: int):
+        """One field of a row, for index in range(len(self))"""
+        return self.getters[field]((self.start + index) % self.size)
+
+    def __iter__(self) -> Iterator[EventRow]:
+        for index in range(self.length):
+            yield EventRow(self, (self.start + index) % self.size)
+
+    def _ordered(self, column: array) -> list:
+        start, end = self.start, self.start + self.length
+        if end <= self.size:
+            return column[start:end].tolist()
+        return column[start:].tolist() + column[:end - self.size].tolist()
+
+    def column(self, field: int) -> list:
+        """One field of every row, oldest first, without making views"""
+        if field in (0, 7):
+            fromtimestamp = datetime.fromtimestamp
+            return [fromtimestamp(value) for value in self._ordered(self.times if field == 0 else self.last_seen)]
+        if field in (1, 4, 5):
+            pool, ids = {1: (self.sources, self.source_ids), 4: (self.inserts, self.insert_ids),
+                         5: (self.log_types, self.log_type_ids)}[field]
+            values = pool.values
+            return [values[value_id] for value_id in self._ordered(ids)]
+        if field == 8:
+            return [group or None for group in self._ordered(self.groups)]
+        return self._ordered({2: self.event_ids, 3: self.types, 6: self.counts}[field])
+
+    def append(self, event) -> None:
+        self.extend((event,))
+
+    def extend(self, events) -> None:
+        events = events if isinstance(events, list) else list(events)
+        if self.capacity is not None and len(events) > self.capacity:
+            events = events[len(events) - self.capacity:]
+        needed = self.length + len(events)
+        if needed > self.size and (self.capacity is None or self.size < self.capacity):
+            self._grow(needed)
+        if needed > self.size:
+            self.evict(needed - self.size)
+        # Written column by column, in two runs if the ring wraps
+        position = (self.start + self.length) % self.size
+        split = self.size - position
+        self._write(position, events[:split])
+        self._write(0, events[split:])
+        self.length += len(events)
+
+    def replace(self, index: int, event) -> None:
+        position = self._position(index)
+        self._release([self.insert_ids[position]])
+        self._write(position, [event])
+
+    def evict(self, count: int) -> None:
+        """Drop the count oldest rows"""
+        count = min(count, self.length)
+        start, end = self.start, self.start + count
+        insert_ids = self.insert_ids[start:end].tolist()
+        if end > self.size:
+            insert_ids += self.insert_ids[:end - self.size].tolist()
+        self._release(insert_ids)
+        self.start = (self.start + count) % self.size
+        self.length -= count
+
+    def clear(self) -> None:
+        self.evict(self.length)
+        self.start = 0
+
+    def copy(self) -> 'EventBuffer':
+        """An independent copy, e.g. to read from another thread"""
+        buffer = EventBuffer.__new__(EventBuffer)
+        buffer.capacity = self.capacity
+        buffer.start, buffer.length, buffer.size = self.start, self.length, self.size
+        for name in self._columns():
+            setattr(buffer, name, getattr(self, name)[:])
+        # Interned values are never changed or freed, so they can be shared
+        buffer.sources, buffer.log_types = self.sources, self.log_types
+        buffer.inserts = self.inserts.copy()
+        buffer._make_getters()
+        return buffer
+
+    def _write(self, position: int, events: list) -> None:
+        if not events:
+            return
+        end = position + len(events)
+        times = [event.TimeGenerated.timestamp() for event in events]
+        self.times[position:end] = array('d', times)
+        self.last_seen[position:end] = array('d', [
+            time if last_seen is None else last_seen.timestamp()
+            for time, last_seen in zip(times, [getattr(event, 'LastSeen', None) for event in events])
+        ])
+        self.records[position:end] = array('q', [getattr(event, 'RecordNumber', None) or 0 for event in events])
+        self.event_ids[position:end] = array('q', [event.EventID for event in events])
+        self.types[position:end] = array('H', [event.EventType for event in events])
+        self.counts[position:end] = array('q', [getattr(event, 'Count', 1) for event in events])
+        self.groups[position:end] = array('q', [getattr(event, 'GroupId', None) or 0 for event in events])
+        self.source_ids[position:end] = array('I', self.sources.id_list([event.SourceName for event in events]))
+        self.log_type_ids[position:end] = array('I', self.log_types.id_list(
+            [getattr(event, 'LogType', None) for event in events]))
+        self.insert_ids[position:end] = array('I', self._insert_ids(events))
+
+    def _insert_ids(self, events) -> List[int]:
+        get, refs, add = self.inserts.ids.get, self.inserts.refs, self._add_inserts
+        insert_ids = []
+        for event in events:
+            inserts = event.StringInserts
+            try:
+                insert_id = get(inserts)
+            except TypeError:
+                # A list; pooled as a tuple
+                insert_id = None
+            if insert_id is None:
+                insert_id = add(inserts)
+            else:
+                refs[insert_id] += 1
+            insert_ids.append(insert_id)
+        return insert_ids
+
+    def _add_inserts(self, inserts) -> int:
+        if isinstance(inserts, list):
+            inserts = tuple(inserts)
+        return self.inserts.add(inserts)
+
+    def _release(self, insert_ids) -> None:
+        """Give back the pooled inserts of rows being dropped"""
+        pool = self.inserts
+        refs, release = pool.refs, pool.release
+        for insert_id in insert_ids:
+            if refs[insert_id] > 1:
+                refs[insert_id] -= 1
+            else:
+                release(insert_id)
+
+    def _grow(self, needed: int) -> None:
+        # Unrolled into the new arrays so the ring starts at 0 again
+        old_size, start = self.size, self.start
+        old = {name: getattr(self, name) for name in self._columns()}
+        size = max(old_size * 2, needed)
+        self._allocate(size if self.capacity is None else min(size, self.capacity))
+        for name, column in old.items():
+            new = getattr(self, name)
+            head = column[start:] + column[:start]
+            new[:old_size] = head
+        self.start = 0
\ No newline at end of file
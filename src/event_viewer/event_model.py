@@ -0,0 +1,423 @@
+import bisect
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+from src.event_viewer.event_buffer import EventBuffer
+from src.event_viewer.event_source import EVENT_TYPE_NAMES
+
+COLUMNS = ['Time Generated', 'Source Name', 'Event ID', 'Event Type', 'Message', 'Count', 'Last Seen']
+TIME_COLUMN, SOURCE_COLUMN, ID_COLUMN, TYPE_COLUMN, MESSAGE_COLUMN, COUNT_COLUMN, LAST_SEEN_COLUMN = range(7)
+# Rows also carry the log they came from, when the event says, and the
+# storm group they stand for (see EventAggregator)
+LOG_TYPE_FIELD, COUNT_FIELD, LAST_SEEN_FIELD, GROUP_FIELD = range(5, 9)
+
+# Above this many changed rows a column-sorted append resets the model
+SORTED_INSERT_LIMIT = 100
+
+
+def get_event_type(event_type):
+    return EVENT_TYPE_NAMES.get(event_type, 'Unknown')
+
+
+class EventTableModel(QAbstractTableModel):
+    """Table model over a flat buffer of event rows
+
+    Each row keeps only the fields the table shows, read like a tuple of
+    (TimeGenerated, SourceName, EventID, EventType, StringInserts,
+    LogType, Count, LastSeen, GroupId), where LogType is None unless the
+    event carries one and a plain event counts once with no group. Rows
+    live in an EventBuffer holding max_rows of them, column by column,
+    and are read through views. Cell text is produced in data(), so only
+    rows the view actually paints are ever formatted.
+
+    Rows are stored in arrival (record number) order, which is also time
+    order, so the default time sort is just a view onto the buffer. Other
+    columns keep a sorted list of (key, sequence) pairs that new rows are
+    inserted into, so a small append costs O(new rows) signals either way.
+    A storm group that grows replaces its row in place (update_groups).
+
+    message_formatter, when set, is called as (source, event id, inserts,
+    log type) to render the Message column; otherwise the raw inserts are shown.
+    """
+
+    def __init__(self, max_rows=None, parent=None):
+        super().__init__(parent)
+        self.max_rows = max_rows
+        self.message_formatter = None
+        self._rows = EventBuffer(max_rows)
+        self._base = 0  # sequence number of self._rows[0]
+        # Holds an incoming event so its sort key is read as it will be stored
+        self._staged = EventBuffer(1)
+        self._sort_column = TIME_COLUMN
+        self._sort_order = Qt.AscendingOrder
+        self._sorted = None  # [(key, sequence)] when not sorted by time
+        self._groups = {}  # group id -> sequence of its row
+
+    def staged_key(self, event):
+        """The sort key event will have once buffered"""
+        self._staged.append(event)
+        return self.sort_key(self._staged[0])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.format_cell(self.row_at(index.row()), index.column())
+
+    def format_cell(self, row, column):
+        if column == TIME_COLUMN:
+            return row[TIME_COLUMN].strftime('%Y-%m-%d %H:%M:%S')
+        if column == SOURCE_COLUMN:
+            return row[SOURCE_COLUMN]
+        if column == ID_COLUMN:
+            return str(row[ID_COLUMN])
+        if column == TYPE_COLUMN:
+            return get_event_type(row[TYPE_COLUMN])
+        if column == COUNT_COLUMN:
+            return str(row[COUNT_FIELD])
+        if column == LAST_SEEN_COLUMN:
+            return row[LAST_SEEN_FIELD].strftime('%Y-%m-%d %H:%M:%S')
+        if self.message_formatter is not None:
+            return self.message_formatter(row[SOURCE_COLUMN], row[ID_COLUMN], row[MESSAGE_COLUMN],
+                                          row[LOG_TYPE_FIELD])
+        return str(row[MESSAGE_COLUMN])
+
+    def sort_key(self, row):
+        if self._sort_column == ID_COLUMN:
+            return row[ID_COLUMN]
+        if self._sort_column == COUNT_COLUMN:
+            return row[COUNT_FIELD]
+        if self._sort_column == LAST_SEEN_COLUMN:
+            return row[LAST_SEEN_FIELD]
+        return self.format_cell(row, self._sort_column)
+
+    def _storage_index(self, row):
+        """Map a display row to its index in the buffer"""
+        if self._sorted is None:
+            if self._sort_order == Qt.DescendingOrder:
+                return len(self._rows) - 1 - row
+            return row
+        if self._sort_order == Qt.DescendingOrder:
+            row = len(self._sorted) - 1 - row
+        return self._sorted[row][1] - self._base
+
+    def row_at(self, row):
+        """Return the buffered row shown at a display position"""
+        return self._rows[self._storage_index(row)]
+
+    def value_at(self, row, field):
+        """One field of the row shown at a display position"""
+        return self._rows.value(self._storage_index(row), field)
+
+    def sequence_at(self, row):
+        """Sequence number of the row at a display position
+
+        Every row gets the next sequence number as it is added, and keeps
+        it until evicted, so it identifies a row across sorts and inserts.
+        """
+        return self._base + self._storage_index(row)
+
+    def row_for_sequence(self, sequence):
+        index = sequence - self._base
+        if 0 <= index < len(self._rows):
+            return self._rows[index]
+        return None
+
+    @property
+    def first_sequence(self):
+        return self._base
+
+    @property
+    def next_sequence(self):
+        return self._base + len(self._rows)
+
+    def snapshot(self):
+        """Rows in time order, safe to read from another thread"""
+        return self._rows.copy()
+
+    def _display_row(self, position, count):
+        """Map a position in storage order to a display row"""
+        if self._sort_order == Qt.DescendingOrder:
+            return count - position
+        return position
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.beginResetModel()
+        self._sort_column = column
+        self._sort_order = order
+        self._rebuild_sorted()
+        self.endResetModel()
+
+    def _rebuild_sorted(self):
+        if self._sort_column == TIME_COLUMN:
+            self._sorted = None
+            return
+        base = self._base
+        self._sorted = sorted((key, base + i) for i, key in enumerate(self._sort_keys()))
+
+    def _sort_keys(self):
+        """sort_key() of every row in storage order, read a column at a time"""
+        column = self._sort_column
+        if column in (SOURCE_COLUMN, ID_COLUMN):
+            return self._rows.column(column)
+        if column == TYPE_COLUMN:
+            return [get_event_type(event_type) for event_type in self._rows.column(TYPE_COLUMN)]
+        if column == COUNT_COLUMN:
+            return self._rows.column(COUNT_FIELD)
+        if column == LAST_SEEN_COLUMN:
+            return self._rows.column(LAST_SEEN_FIELD)
+        return [self.sort_key(row) for row in self._rows]
+
+    def set_events(self, events):
+        """Replace the whole buffer; returns the first new sequence number"""
+        events = list(events)
+        if self.max_rows is not None and len(events) > self.max_rows:
+            events = events[len(events) - self.max_rows:]
+        self.beginResetModel()
+        self._base += len(self._rows)
+        self._rows.clear()
+        self._rows.extend(events)
+        self._groups = {}
+        self._register_groups(self._base)
+        self._rebuild_sorted()
+        self.endResetModel()
+        return self._base
+
+    def append_events(self, events):
+        """Append new events, evicting the oldest rows past max_rows
+
+        Returns the sequence number of the first new row; rows from
+        first to next_sequence are the tail of events that was kept.
+        """
+        if not events:
+            return self.next_sequence
+        if self.max_rows is not None and len(events) >= self.max_rows:
+            return self.set_events(events)
+
+        evict = 0
+        if self.max_rows is not None:
+            evict = len(self._rows) + len(events) - self.max_rows
+
+        if self._sorted is None:
+            self._evict(evict)
+            first = self._display_row(len(self._rows), len(self._rows))
+            self.beginInsertRows(QModelIndex(), first, first + len(events) - 1)
+            self._rows.extend(events)
+            self.endInsertRows()
+            self._register_groups(self.next_sequence - len(events))
+            return self.next_sequence - len(events)
+
+        if len(events) + evict > SORTED_INSERT_LIMIT:
+            # New rows scatter across a column sort and every single-row
+            # signal costs the proxy O(rows), so past a handful a reset is
+            # cheaper
+            self.beginResetModel()
+            if evict > 0:
+                self._rows.evict(evict)
+                self._base += evict
+            self._rows.extend(events)
+            self._rebuild_sorted()
+            self.endResetModel()
+            self._register_groups(self.next_sequence - len(events))
+            return self.next_sequence - len(events)
+
+        self._evict(evict)
+        for event in events:
+            sequence = self._base + len(self._rows)
+            entry = (self.staged_key(event), sequence)
+            position = bisect.bisect_right(self._sorted, entry)
+            display = self._display_row(position, len(self._sorted))
+            self.beginInsertRows(QModelIndex(), display, display)
+            self._rows.append(event)
+            self._sorted.insert(position, entry)
+            self.endInsertRows()
+        self._register_groups(self.next_sequence - len(events))
+        return self.next_sequence - len(events)
+
+    def _register_groups(self, first):
+        """Remember the rows of storm groups from sequence first on"""
+        groups = self._groups
+        for i in range(first - self._base, len(self._rows)):
+            group_id = self._rows[i][GROUP_FIELD]
+            if group_id is not None:
+                groups[group_id] = self._base + i
+        if len(groups) > 2 * len(self._rows) + 100:
+            # Groups of evicted rows are only dropped now and then
+            base = self._base
+            self._groups = {group_id: sequence for group_id, sequence in groups.items()
+                            if sequence >= base}
+
+    def update_groups(self, events):
+        """Bring rows of storm groups already shown up to date
+
+        Rows of groups in events are replaced where they stand, moving
+        only if the table is sorted on a column that changed. Returns the
+        events that still need rows of their own.
+        """
+        if not self._groups:
+            return events
+        new = []
+        changed = []
+        for event in events:
+            sequence = self._groups.get(getattr(event, 'GroupId', None))
+            index = -1 if sequence is None else sequence - self._base
+            if index < 0:
+                new.append(event)
+                continue
+            display = self._replace_row(index, event)
+            if display is not None:
+                changed.append(display)
+        if changed:
+            # One signal over the span of rows changed in place
+            self.dataChanged.emit(self.index(min(changed), 0), self.index(max(changed), len(COLUMNS) - 1))
+        return new
+
+    def _replace_row(self, index, event):
+        """Replace a row; returns its display row if it stayed in place"""
+        if self._sorted is not None:
+            sequence = self._base + index
+            old_entry = (self.sort_key(self._rows[index]), sequence)
+            entry = (self.staged_key(event), sequence)
+            if entry != old_entry:
+                count = len(self._sorted)
+                position = bisect.bisect_left(self._sorted, old_entry)
+                display = self._display_row(position, count - 1)
+                self.beginRemoveRows(QModelIndex(), display, display)
+                del self._sorted[position]
+                self.endRemoveRows()
+                position = bisect.bisect_right(self._sorted, entry)
+                display = self._display_row(position, count - 1)
+                self.beginInsertRows(QModelIndex(), display, display)
+                self._rows.replace(index, event)
+                self._sorted.insert(position, entry)
+                self.endInsertRows()
+                return None
+            position = bisect.bisect_left(self._sorted, old_entry)
+            display = self._display_row(position, len(self._sorted) - 1)
+        else:
+            display = self._display_row(index, len(self._rows) - 1)
+        self._rows.replace(index, event)
+        return display
+
+    def _evict(self, count):
+        if count <= 0:
+            return
+        if self._sorted is None:
+            total = len(self._rows)
+            first = 0 if self._sort_order == Qt.AscendingOrder else total - count
+            self.beginRemoveRows(QModelIndex(), first, first + count - 1)
+            self._rows.evict(count)
+            self._base += count
+            self.endRemoveRows()
+            return
+
+        for i in range(count):
+            entry = (self.sort_key(self._rows[i]), self._base + i)
+            position = bisect.bisect_left(self._sorted, entry)
+            display = self._display_row(position, len(self._sorted) - 1)
+            self.beginRemoveRows(QModelIndex(), display, display)
+            del self._sorted[position]
+            self.endRemoveRows()
+        self._rows.evict(count)
+        self._base += count
+
+    def clear(self):
+        self.beginResetModel()
+        self._base += len(self._rows)
+        self._rows.clear()
+        self._groups = {}
+        self._rebuild_sorted()
+        self.endResetModel()
+
+
+class EventFilterProxyModel(QSortFilterProxyModel):
+    """Filters on event type, source and a message search
+
+    Sorting is delegated to the source model, which keeps its rows in
+    order incrementally instead of having the proxy compare every pair
+    of rows through data().
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.type_filter = None
+        self.source_filter = ''
+        self.search_query = None
+        self.search_ids = set()
+        self.search_upto = 0
+        self.setDynamicSortFilter(True)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    # Filters are applied with invalidate() rather than invalidateFilter():
+    # the latter emits one removal per rejected run of rows, which makes
+    # the view re-layout thousands of times on a large buffer.
+
+    def set_type_filter(self, type_name):
+        self.type_filter = None if type_name in (None, '', 'All') else type_name
+        self.invalidate()
+
+    def set_source_filter(self, text):
+        self.source_filter = text.strip().lower()
+        self.invalidate()
+
+    def set_search(self, query, ids=(), upto=0):
+        """Show only rows matching a SearchQuery
+
+        ids are the matching sequence numbers below upto, as found by the
+        search index; rows added later are checked against the query
+        directly as they arrive.
+        """
+        self.search_query = query
+        self.search_ids = set(ids)
+        self.search_upto = upto
+        self.invalidate()
+
+    def row_predicate(self):
+        """The current filters as a function of a row tuple, or None
+
+        Captures the filter values so it can be applied off the GUI
+        thread, e.g. while exporting, without the search index.
+        """
+        type_filter, source_filter, query = self.type_filter, self.source_filter, self.search_query
+        if type_filter is None and not source_filter and query is None:
+            return None
+
+        def accepts(row):
+            if type_filter is not None and get_event_type(row[TYPE_COLUMN]) != type_filter:
+                return False
+            if source_filter and source_filter not in row[SOURCE_COLUMN].lower():
+                return False
+            return query is None or query.matches(*row[:3], row[MESSAGE_COLUMN])
+        return accepts
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.type_filter is None and not self.source_filter and self.search_query is None:
+            return True
+        model = self.sourceModel()
+        # Fields are read one at a time, leaving the rest of the row unread
+        value = model.value_at
+        if self.search_query is not None:
+            sequence = model.sequence_at(source_row)
+            if sequence < self.search_upto:
+                if sequence not in self.search_ids:
+                    return False
+            elif not self.search_query.matches(*model.row_at(source_row)[:3],
+                                               value(source_row, MESSAGE_COLUMN)):
+                return False
+        if self.type_filter is not None and get_event_type(value(source_row, TYPE_COLUMN)) != self.type_filter:
+            return False
+        if self.source_filter and self.source_filter not in value(source_row, SOURCE_COLUMN).lower():
+            return False
+        return True
\ No newline at end of file
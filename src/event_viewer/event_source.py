@@ -0,0 +1,245 @@
+import socket
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+# Values of the win32evtlog EVENTLOG_*_TYPE constants, kept here so the
+# reading code does not need pywin32 to be importable
+EVENT_TYPE_NAMES = {
+    1: 'Error',
+    2: 'Warning',
+    4: 'Information',
+    8: 'Success Audit',
+    16: 'Failure Audit'
+}
+
+READ_BATCH_SIZE = 512
+
+# Server names that OpenEventLog takes to mean this machine
+LOCAL_HOSTS = ('', '.', 'localhost')
+
+
+def host_name(server: Optional[str]) -> str:
+    """server, or this machine's name when server means the local machine"""
+    if server is None or server.lower() in LOCAL_HOSTS:
+        return socket.gethostname()
+    return server
+
+
+class EventRecord:
+    """Plain stand-in for a pywin32 PyEventLogRecord"""
+    __slots__ = ('RecordNumber', 'TimeGenerated', 'TimeWritten', 'SourceName',
+                 'EventID', 'EventType', 'EventCategory', 'ComputerName',
+                 'StringInserts')
+
+    def __init__(self, SourceName='', EventID=0, EventType=4, StringInserts=None,
+                 TimeGenerated=None, RecordNumber=0, EventCategory=0,
+                 ComputerName='localhost'):
+        self.RecordNumber = RecordNumber
+        self.TimeGenerated = TimeGenerated or datetime.now()
+        self.TimeWritten = self.TimeGenerated
+        self.SourceName = SourceName
+        self.EventID = EventID
+        self.EventType = EventType
+        self.EventCategory = EventCategory
+        self.ComputerName = ComputerName
+        self.StringInserts = StringInserts
+
+    def __repr__(self):
+        return (f"EventRecord({self.RecordNumber}, {self.SourceName!r}, "
+                f"{self.EventID}, {self.TimeGenerated})")
+
+
+class EventSource:
+    """Minimal interface the reader needs from an event log"""
+
+    def record_range(self) -> Tuple[int, int]:
+        """Return (oldest, newest) record numbers; newest < oldest when empty"""
+        raise NotImplementedError
+
+    def read_from(self, record_number: int) -> Iterator[list]:
+        """Yield batches of records in forward order starting at record_number"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class Win32EventSource(EventSource):
+    def __init__(self, log_type: str, server: str = 'localhost'):
+        import win32evtlog
+        self.win32evtlog = win32evtlog
+        self.log_type = log_type
+        self.server = server
+        self.hand = None
+
+    def open(self):
+        if self.hand is None:
+            self.hand = self.win32evtlog.OpenEventLog(self.server, self.log_type)
+        return self.hand
+
+    def record_range(self) -> Tuple[int, int]:
+        hand = self.open()
+        oldest = self.win32evtlog.GetOldestEventLogRecord(hand)
+        count = self.win32evtlog.GetNumberOfEventLogRecords(hand)
+        return oldest, oldest + count - 1
+
+    def read_from(self, record_number: int) -> Iterator[list]:
+        hand = self.open()
+        forwards = self.win32evtlog.EVENTLOG_FORWARDS_READ
+        batch = self.win32evtlog.ReadEventLog(
+            hand, forwards | self.win32evtlog.EVENTLOG_SEEK_READ, record_number)
+        while batch:
+            yield batch
+            batch = self.win32evtlog.ReadEventLog(
+                hand, forwards | self.win32evtlog.EVENTLOG_SEQUENTIAL_READ, 0)
+
+    def close(self) -> None:
+        if self.hand is not None:
+            self.win32evtlog.CloseEventLog(self.hand)
+            self.hand = None
+
+
+class MemoryEventSource(EventSource):
+    """In-memory event log used for tests and benchmarks
+
+    Behaves like a Windows log: record numbers grow monotonically, old
+    records are overwritten once capacity is reached and clear() restarts
+    numbering at 1.
+    """
+
+    def __init__(self, records=None, capacity: Optional[int] = None,
+                 batch_size: int = READ_BATCH_SIZE):
+        self.records: List[EventRecord] = []
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.next_record = 1
+        for record in records or []:
+            self.append(record)
+
+    def append(self, record=None, **fields):
+        if record is None:
+            record = EventRecord(**fields)
+        record.RecordNumber = self.next_record
+        self.next_record += 1
+        self.records.append(record)
+        if self.capacity is not None and len(self.records) > self.capacity:
+            del self.records[:len(self.records) - self.capacity]
+        return record
+
+    def clear(self):
+        self.records = []
+        self.next_record = 1
+
+    def record_range(self) -> Tuple[int, int]:
+        if not self.records:
+            return self.next_record, self.next_record - 1
+        return self.records[0].RecordNumber, self.records[-1].RecordNumber
+
+    def read_from(self, record_number: int) -> Iterator[list]:
+        oldest, newest = self.record_range()
+        start = max(record_number, oldest) - oldest
+        for i in range(start, len(self.records), self.batch_size):
+            yield self.records[i:i + self.batch_size]
+
+
+class LogResetError(Exception):
+    """Raised while reading when the log no longer matches the cursor"""
+
+
+class EventLogReader:
+    """Reads an event log incrementally using a record-number cursor
+
+    The first poll loads the newest max_events records; later polls only
+    return records written since the last one seen. If the log has been
+    cleared or has wrapped past the cursor the reader falls back to a
+    full reread and reports it so callers can drop what they hold.
+    """
+
+    def __init__(self, source: EventSource, max_events: int = 1000):
+        self.source = source
+        self.max_events = max_events
+        self.last_record: Optional[int] = None
+        self.last_time = None
+
+    def reset(self) -> None:
+        self.last_record = None
+        self.last_time = None
+
+    def seek_end(self, keep: int = 0) -> None:
+        """Place the cursor so the next poll returns only the newest `keep` records"""
+        self.reset()
+        oldest, newest = self.source.record_range()
+        start = newest - keep
+        if newest < oldest or start < oldest:
+            # The whole log is wanted: an unset cursor makes the next poll
+            # read (up to max_events of) whatever has arrived by then
+            return
+        for batch in self.source.read_from(start):
+            first = batch[0]
+            self.last_record = first.RecordNumber
+            self.last_time = first.TimeGenerated
+            break
+
+    def seek(self, record: int, timestamp: float) -> None:
+        """Resume after a record read earlier, given its number and TimeGenerated
+
+        If that record is no longer in the log as it was, the next poll
+        treats the log as reset.
+        """
+        self.last_record = record
+        self.last_time = datetime.fromtimestamp(timestamp)
+
+    def poll(self) -> Tuple[bool, Iterator[list]]:
+        """Return (reset, batches) for records newer than the cursor
+
+        The cursor advances as batches are consumed, so a caller that stops
+        iterating early resumes from the last batch it actually received.
+        """
+        oldest, newest = self.source.record_range()
+        if newest < oldest:
+            reset = self.last_record is not None
+            self.reset()
+            return reset, iter(())
+
+        first = max(oldest, newest - self.max_events + 1)
+        if self.last_record is None:
+            return True, self._read(first, skip_known=False)
+        if (self.last_record > newest or self.last_record < oldest
+                or self.last_record + 1 < first):
+            # Cleared, wrapped past the cursor, or too far behind to catch up
+            self.reset()
+            return True, self._read(first, skip_known=False)
+        if self.last_record == newest:
+            return False, iter(())
+        return False, self._read(self.last_record, skip_known=True)
+
+    def _read(self, start: int, skip_known: bool) -> Iterator[list]:
+        for batch in self.source.read_from(start):
+            if skip_known:
+                skip_known = False
+                known = batch[0]
+                if (known.RecordNumber != self.last_record
+                        or known.TimeGenerated.timestamp() != self.last_time.timestamp()):
+                    # The record under the cursor changed: the log was
+                    # cleared and refilled, so the cursor means nothing
+                    raise LogResetError(self.last_record)
+                batch = batch[1:]
+                if not batch:
+                    continue
+            last = batch[-1]
+            self.last_record = last.RecordNumber
+            self.last_time = last.TimeGenerated
+            yield batch
+
+    def read_all(self) -> Tuple[bool, list]:
+        """Poll and collect the batches into one list"""
+        reset, batches = self.poll()
+        events = []
+        try:
+            for batch in batches:
+                events.extend(batch)
+        except LogResetError:
+            self.reset()
+            reset, batches = self.poll()
+            events = [event for batch in batches for event in batch]
+        return reset, events
\ No newline at end of file
@@ -1,125 +1,421 @@
-import win32evtlog
-import win32evtlogutil
-import win32con
-from datetime import datetime
-import pandas as pd
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QComboBox, QLabel
-from PyQt5.QtCore import Qt, QTimer
-
-class EventViewer(QWidget):
-    def __init__(self):
-        super().__init__()
-        self.setup_ui()
-        self.setup_event_log()
-        
-    def setup_ui(self):
-        layout = QVBoxLayout()
-        
-        # Filter controls
-        filter_layout = QVBoxLayout()
-        
-        # Log type selector
-        self.log_type_combo = QComboBox()
-        self.log_type_combo.addItems(['Application', 'Security', 'System'])
-        self.log_type_combo.currentTextChanged.connect(self.refresh_events)
-        
-        # Refresh button
-        refresh_btn = QPushButton('Refresh')
-        refresh_btn.clicked.connect(self.refresh_events)
-        
-        # Export button
-        export_btn = QPushButton('Export to CSV')
-        export_btn.clicked.connect(self.export_to_csv)
-        
-        filter_layout.addWidget(QLabel('Log Type:'))
-        filter_layout.addWidget(self.log_type_combo)
-        filter_layout.addWidget(refresh_btn)
-        filter_layout.addWidget(export_btn)
-        
-        # Event table
-        self.event_table = QTableWidget()
-        self.event_table.setColumnCount(5)
-        self.event_table.setHorizontalHeaderLabels([
-            'Time Generated', 'Source Name', 'Event ID', 'Event Type', 'Message'
-        ])
-        
-        layout.addLayout(filter_layout)
-        layout.addWidget(self.event_table)
-        self.setLayout(layout)
-        
-        # Setup auto-refresh timer
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_events)
-        self.refresh_timer.start(30000)  # Refresh every 30 seconds
-        
-    def setup_event_log(self):
-        self.server = 'localhost'
-        self.log_type = self.log_type_combo.currentText()
-        self.hand = win32evtlog.OpenEventLog(self.server, self.log_type)
-        self.flags = win32evtlog.EVENTLOG_BACKWARDS_READ | win32evtlog.EVENTLOG_SEQUENTIAL_READ
-        
-    def refresh_events(self):
-        self.log_type = self.log_type_combo.currentText()
-        self.setup_event_log()
-        
-        events = []
-        while True:
-            events_batch = win32evtlog.ReadEventLog(
-                self.hand,
-                self.flags,
-                0
-            )
-            if not events_batch:
-                break
-            events.extend(events_batch)
-            
-        self.display_events(events)
-        
-    def display_events(self, events):
-        self.event_table.setRowCount(len(events))
-        
-        for row, event in enumerate(events):
-            # Time Generated
-            time_str = event.TimeGenerated.strftime('%Y-%m-%d %H:%M:%S')
-            self.event_table.setItem(row, 0, QTableWidgetItem(time_str))
-            
-            # Source Name
-            self.event_table.setItem(row, 1, QTableWidgetItem(event.SourceName))
-            
-            # Event ID
-            self.event_table.setItem(row, 2, QTableWidgetItem(str(event.EventID)))
-            
-            # Event Type
-            event_type = self.get_event_type(event.EventType)
-            self.event_table.setItem(row, 3, QTableWidgetItem(event_type))
-            
-            # Message
-            self.event_table.setItem(row, 4, QTableWidgetItem(str(event.StringInserts)))
-            
-        self.event_table.resizeColumnsToContents()
-        
-    def get_event_type(self, event_type):
-        event_types = {
-            win32evtlog.EVENTLOG_ERROR_TYPE: 'Error',
-            win32evtlog.EVENTLOG_WARNING_TYPE: 'Warning',
-            win32evtlog.EVENTLOG_INFORMATION_TYPE: 'Information',
-            win32evtlog.EVENTLOG_AUDIT_SUCCESS: 'Success Audit',
-            win32evtlog.EVENTLOG_AUDIT_FAILURE: 'Failure Audit'
-        }
-        return event_types.get(event_type, 'Unknown')
-        
-    def export_to_csv(self):
-        data = []
-        for row in range(self.event_table.rowCount()):
-            row_data = []
-            for col in range(self.event_table.columnCount()):
-                item = self.event_table.item(row, col)
-                row_data.append(item.text() if item else '')
-            data.append(row_data)
-            
-        df = pd.DataFrame(data, columns=[
-            'Time Generated', 'Source Name', 'Event ID', 'Event Type', 'Message'
-        ])
-        
-        filename = f'event_log_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        df.to_csv(filename, index=False) 
\ No newline at end of file
+import time
+from datetime import datetime
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTableView, QHeaderView, QPushButton, QComboBox, QLabel,
+                             QLineEdit, QCheckBox, QDialog)
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
+
+from src.event_store.event_store import encode_inserts
+from src.event_viewer.aggregator import create_aggregator
+from src.event_viewer.event_source import EVENT_TYPE_NAMES, Win32EventSource
+from src.event_viewer.event_model import (COUNT_FIELD, LAST_SEEN_FIELD, LOG_TYPE_FIELD, MESSAGE_COLUMN,
+                                          EventTableModel, EventFilterProxyModel, get_event_type)
+from src.event_viewer.export_worker import ExportWorker
+from src.event_viewer.exporter import (EXPORT_FORMATS, EventExporter, ExportError, available_formats,
+                                       export_filename, row_from_event)
+from src.event_viewer.ingest_worker import IngestWorker
+from src.event_viewer.message_formatter import create_message_formatter
+from src.event_viewer.search_index import SearchIndex, SearchQuery, message_text
+from src.utils.config import get_config
+from src.utils.metrics import get_registry
+
+# Log combo entry showing the collector's merged stream of every watched log
+COLLECTED_LOGS = 'All Logs (collector)'
+
+# Most occurrences of a storm group listed when it is opened
+GROUP_EVENTS_LIMIT = 10000
+
+class EventViewer(QWidget):
+    # log_type, generation, full
+    fetch_requested = pyqtSignal(str, int, bool)
+    
+    def __init__(self, store=None, collector=None, statistics=None):
+        super().__init__()
+        self.collector = collector
+        self.statistics = statistics
+        self.config = get_config()
+        self.max_events = self.config.get('event_viewer.max_events', 1000)
+        self.store = store
+        self.page_size = min(self.config.get('event_store.page_size', 1000), self.max_events)
+        self.page_positions = []
+        self.current_page = []
+        self.browsing = False
+        self.log_type = None
+        self.generation = 0
+        self.fetch_in_progress = False
+        self.export_thread = None
+        self.export_worker = None
+        self.export_failed = False
+        # Messages are rendered from cached templates only when a row is painted or exported
+        self.message_formatter = create_message_formatter(self.config)
+        metrics = get_registry()
+        self.fetch_seconds = metrics.histogram('viewer_fetch_seconds',
+                                               'Time from a refresh to the last batch read')
+        self.batch_seconds = metrics.histogram('viewer_batch_apply_seconds',
+                                               'Time to put one batch into the table')
+        self.events_ingested = metrics.counter('viewer_events_ingested_total',
+                                               'Events added to the table')
+        metrics.gauge('viewer_rows', 'Rows held by the table', lambda: self.event_model.rowCount())
+        metrics.counter('message_template_hits_total', 'Message template cache hits',
+                        lambda: self.message_formatter.hits)
+        metrics.counter('message_template_misses_total', 'Message template cache misses',
+                        lambda: self.message_formatter.misses)
+        self.fetch_started = None
+        self.setup_ui()
+        self.setup_event_log()
+        
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        
+        # Filter controls
+        filter_layout = QVBoxLayout()
+        
+        # Log type selector
+        self.log_type_combo = QComboBox()
+        self.log_type_combo.addItems(['Application', 'Security', 'System'])
+        if self.collector is not None:
+            self.log_type_combo.addItem(COLLECTED_LOGS)
+        self.log_type_combo.currentTextChanged.connect(self.refresh_events)
+        
+        # Refresh button
+        refresh_btn = QPushButton('Refresh')
+        refresh_btn.clicked.connect(self.refresh_events)
+        
+        # Export controls; exports stream from the event data on a worker thread
+        self.export_format_combo = QComboBox()
+        self.export_format_combo.addItems(available_formats())
+        self.export_btn = QPushButton('Export')
+        self.export_btn.clicked.connect(self.export_events)
+        self.export_status = QLabel('')
+        
+        # Event type and source filters
+        self.type_filter_combo = QComboBox()
+        self.type_filter_combo.addItems(['All'] + list(EVENT_TYPE_NAMES.values()))
+        self.source_filter_edit = QLineEdit()
+        self.source_filter_edit.setPlaceholderText('Filter by source')
+        
+        # Message search, answered from an index kept alongside the table
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('Search messages: term prefix* "phrase" source: id: after: before:')
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_edit.textChanged.connect(lambda: self.search_timer.start(250))
+        
+        filter_layout.addWidget(QLabel('Log Type:'))
+        filter_layout.addWidget(self.log_type_combo)
+        filter_layout.addWidget(QLabel('Event Type:'))
+        filter_layout.addWidget(self.type_filter_combo)
+        filter_layout.addWidget(self.source_filter_edit)
+        filter_layout.addWidget(self.search_edit)
+        filter_layout.addWidget(refresh_btn)
+        filter_layout.addWidget(self.export_format_combo)
+        filter_layout.addWidget(self.export_btn)
+        filter_layout.addWidget(self.export_status)
+        
+        # Paging through the event store instead of following the live log
+        self.browse_check = QCheckBox('Browse stored events')
+        self.browse_check.setEnabled(self.store is not None)
+        self.browse_check.toggled.connect(self.set_browse_mode)
+        self.older_btn = QPushButton('Older')
+        self.older_btn.clicked.connect(self.show_older_page)
+        self.newer_btn = QPushButton('Newer')
+        self.newer_btn.clicked.connect(self.show_newer_page)
+        self.older_btn.setEnabled(False)
+        self.newer_btn.setEnabled(False)
+        filter_layout.addWidget(self.browse_check)
+        filter_layout.addWidget(self.older_btn)
+        filter_layout.addWidget(self.newer_btn)
+        
+        # Event table, backed by a model so cells are only formatted when painted
+        self.event_model = EventTableModel(self.max_events)
+        self.event_model.message_formatter = self.format_message
+        self.search_index = SearchIndex(self.search_text)
+        self.proxy_model = EventFilterProxyModel()
+        self.proxy_model.setSourceModel(self.event_model)
+        self.type_filter_combo.currentTextChanged.connect(self.proxy_model.set_type_filter)
+        self.source_filter_edit.textChanged.connect(self.proxy_model.set_source_filter)
+        
+        self.event_table = QTableView()
+        self.event_table.setModel(self.proxy_model)
+        self.event_table.setSortingEnabled(True)
+        self.event_table.sortByColumn(0, Qt.DescendingOrder)
+        self.event_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.event_table.horizontalHeader().setStretchLastSection(True)
+        # Count and Last Seen go before the message, which takes the rest of the width
+        self.event_table.horizontalHeader().moveSection(MESSAGE_COLUMN, self.event_model.columnCount() - 1)
+        # A storm group opens to list the events it collapsed
+        self.event_table.doubleClicked.connect(self.show_group)
+        
+        layout.addLayout(filter_layout)
+        layout.addWidget(self.event_table)
+        self.setLayout(layout)
+        
+        # Setup auto-refresh timer
+        self.refresh_timer = QTimer()
+        self.refresh_timer.timeout.connect(self.refresh_events)
+        self.set_refresh_interval(self.config.get('event_viewer.refresh_interval', 30))
+        self.config.subscribe('event_viewer.refresh_interval', self.set_refresh_interval)
+        
+    def setup_event_log(self):
+        self.server = 'localhost'
+        
+        # Log reads run on a worker thread and stream batches back
+        self.ingest_thread = QThread(self)
+        self.ingest_worker = IngestWorker(
+            lambda log_type: Win32EventSource(log_type, self.server),
+            self.max_events,
+            self.config.get('event_viewer.max_updates_per_second', 4),
+            store=self.store,
+            aggregator_factory=lambda: create_aggregator(self.config),
+            statistics=self.statistics,
+            host=self.server
+        )
+        self.ingest_worker.moveToThread(self.ingest_thread)
+        self.fetch_requested.connect(self.ingest_worker.fetch)
+        self.ingest_worker.batch_ready.connect(self.on_batch_ready)
+        self.ingest_worker.finished.connect(self.on_fetch_finished)
+        self.ingest_thread.start()
+        # First read once the event loop runs, so the window shows first
+        QTimer.singleShot(0, self.refresh_events)
+        
+    def set_refresh_interval(self, seconds):
+        self.refresh_timer.start(int((seconds or 30) * 1000))
+        
+    def refresh_events(self):
+        log_type = self.log_type_combo.currentText()
+        if self.browsing:
+            if log_type != self.log_type:
+                self.log_type = log_type
+                self.page_positions = [None]
+                self.show_stored_page()
+            return
+        full = log_type != self.log_type
+        if full:
+            # Abandon any read of the previous log and start over
+            self.generation += 1
+            self.ingest_worker.cancel_before(self.generation)
+            self.log_type = log_type
+            self.event_model.clear()
+        elif self.fetch_in_progress:
+            return
+        if log_type == COLLECTED_LOGS:
+            # Filled by append_collected() instead of the ingest worker
+            self.fetch_in_progress = False
+            return
+            
+        self.fetch_in_progress = True
+        self.fetch_started = time.perf_counter()
+        self.fetch_requested.emit(log_type, self.generation, full)
+        
+    def on_batch_ready(self, generation, reset, events):
+        if generation != self.generation:
+            return
+        start = time.perf_counter()
+        if reset:
+            self.display_events(events)
+        else:
+            self.append_events(events)
+        self.batch_seconds.observe(time.perf_counter() - start)
+        self.events_ingested.inc(len(events))
+            
+    def on_fetch_finished(self, generation):
+        if generation == self.generation:
+            self.fetch_in_progress = False
+            if self.fetch_started is not None:
+                self.fetch_seconds.observe(time.perf_counter() - self.fetch_started)
+                self.fetch_started = None
+            
+    def set_browse_mode(self, enabled):
+        self.browsing = enabled
+        self.older_btn.setEnabled(enabled)
+        self.newer_btn.setEnabled(enabled)
+        # Either way the table is reloaded from scratch
+        self.generation += 1
+        self.ingest_worker.cancel_before(self.generation)
+        if enabled:
+            self.log_type = self.log_type_combo.currentText()
+            self.page_positions = [None]
+            self.show_stored_page()
+        else:
+            self.log_type = None
+            self.refresh_events()
+            
+    def show_stored_page(self):
+        self.current_page = self.store.page(
+            self.page_size,
+            before=self.page_positions[-1],
+            log_type=self.stored_log_type(),
+            triggered=False
+        )
+        self.display_events(self.current_page)
+        
+    def stored_log_type(self):
+        return None if self.log_type == COLLECTED_LOGS else self.log_type
+        
+    def show_older_page(self):
+        if len(self.current_page) == self.page_size:
+            self.page_positions.append(self.store.position(self.current_page[-1]))
+            self.show_stored_page()
+            
+    def show_newer_page(self):
+        if len(self.page_positions) > 1:
+            self.page_positions.pop()
+            self.show_stored_page()
+            
+    def shutdown(self):
+        self.config.unsubscribe(self.set_refresh_interval)
+        self.refresh_timer.stop()
+        if self.export_thread is not None:
+            self.export_worker.cancel()
+            self.export_thread.quit()
+            self.export_thread.wait()
+        self.message_formatter.close()
+        self.ingest_worker.cancel_before(self.generation + 1)
+        self.ingest_thread.quit()
+        self.ingest_thread.wait()
+        self.ingest_worker.close()
+        
+    def display_events(self, events):
+        first = self.event_model.set_events(events)
+        self.index_events(first, events)
+        # Only sizes against the rows currently in view
+        self.event_table.resizeColumnsToContents()
+        
+    def append_events(self, events):
+        # Storm groups already in the table are updated, not added again
+        events = self.event_model.update_groups(events)
+        first = self.event_model.append_events(events)
+        self.index_events(first, events)
+        
+    def append_collected(self, events):
+        """Show events merged by the collector while its entry is selected"""
+        if events and self.log_type == COLLECTED_LOGS and not self.browsing:
+            self.append_events(events)
+        
+    def index_events(self, first, events):
+        if first != self.search_index.next_id:
+            # The model was reset rather than appended to
+            self.search_index.clear()
+        kept = self.event_model.next_sequence - first
+        self.search_index.add_events(first, events[len(events) - kept:])
+        self.search_index.evict_before(self.event_model.first_sequence)
+        
+    def format_message(self, source, event_id, inserts, log_type=None):
+        return self.message_formatter.format(log_type or self.log_type, source, event_id, inserts)
+        
+    def search_text(self, sequence):
+        row = self.event_model.row_for_sequence(sequence)
+        return None if row is None else message_text(row[MESSAGE_COLUMN])
+        
+    def apply_search(self):
+        text = self.search_edit.text().strip()
+        if not text:
+            self.proxy_model.set_search(None)
+            return
+        try:
+            query = SearchQuery(text)
+        except ValueError:
+            # Incomplete time filter while typing
+            return
+        if query.is_empty():
+            self.proxy_model.set_search(None)
+            return
+        ids = self.search_index.search(query)
+        self.proxy_model.set_search(query, ids, self.event_model.next_sequence)
+        
+    def get_event_type(self, event_type):
+        return get_event_type(event_type)
+        
+    def show_group(self, index):
+        """List the events a storm group row stands for"""
+        row = self.event_model.row_at(self.proxy_model.mapToSource(index).row())
+        if row[COUNT_FIELD] <= 1:
+            return
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f'{row[1]} event {row[2]}: {row[COUNT_FIELD]:,} occurrences')
+        layout = QVBoxLayout(dialog)
+        if self.store is None:
+            layout.addWidget(QLabel('Individual occurrences are only kept with the event store enabled.'))
+        else:
+            inserts = encode_inserts(row[MESSAGE_COLUMN])
+            # end is exclusive and stored times are fractional
+            events = [event for event in self.store.query(
+                start=row[0],
+                end=row[LAST_SEEN_FIELD].timestamp() + 0.001,
+                log_type=row[LOG_TYPE_FIELD] or self.stored_log_type(),
+                source=row[1],
+                event_id=row[2],
+                triggered=False,
+                limit=GROUP_EVENTS_LIMIT
+            ) if encode_inserts(event.StringInserts) == inserts and event.EventType == row[3]]
+            model = EventTableModel(parent=dialog)
+            model.message_formatter = self.format_message
+            model.set_events(events)
+            table = QTableView()
+            table.setModel(model)
+            table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+            table.horizontalHeader().setStretchLastSection(True)
+            table.horizontalHeader().moveSection(MESSAGE_COLUMN, model.columnCount() - 1)
+            table.resizeColumnsToContents()
+            layout.addWidget(table)
+            if len(events) < row[COUNT_FIELD]:
+                layout.addWidget(QLabel(f'{len(events):,} of {row[COUNT_FIELD]:,} occurrences are stored.'))
+        dialog.resize(1000, 500)
+        dialog.show()
+        
+    def export_events(self):
+        if self.export_thread is not None:
+            # The button doubles as cancel while an export runs
+            self.export_worker.cancel()
+            return
+        fmt, compression = EXPORT_FORMATS[self.export_format_combo.currentText()]
+        log_type, formatter = self.log_type, self.message_formatter
+        try:
+            exporter = EventExporter(fmt, compression, message_for=lambda row: formatter.format(
+                row[5] or log_type, row[1], row[2], row[4]))
+        except ExportError as e:
+            self.export_status.setText(str(e))
+            return
+        predicate = self.proxy_model.row_predicate()
+        if self.browsing:
+            # Everything stored for this log, not just the page on screen
+            query = self.proxy_model.search_query
+            rows = map(row_from_event, self.store.query(
+                start=query.after if query is not None else None,
+                end=query.before if query is not None else None,
+                log_type=self.stored_log_type(),
+                triggered=False,
+                chunk_size=exporter.chunk_size
+            ))
+        else:
+            rows = self.event_model.snapshot()
+        filename = export_filename(f'event_log_{datetime.now().strftime("%Y%m%d_%H%M%S")}',
+                                   fmt, compression)
+        
+        self.export_thread = QThread(self)
+        self.export_worker = ExportWorker(exporter, rows, filename, predicate)
+        self.export_worker.moveToThread(self.export_thread)
+        self.export_thread.started.connect(self.export_worker.run)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.error.connect(self.on_export_error)
+        self.export_worker.finished.connect(self.on_export_finished)
+        self.export_btn.setText('Cancel Export')
+        self.export_failed = False
+        self.export_status.setText(f'Exporting to {filename}...')
+        self.export_thread.start()
+        
+    def on_export_progress(self, count):
+        self.export_status.setText(f'Exported {count:,} events...')
+        
+    def on_export_error(self, message):
+        self.export_failed = True
+        self.export_status.setText(message)
+        
+    def on_export_finished(self, count, path):
+        self.export_thread.quit()
+        self.export_thread.wait()
+        self.export_thread = None
+        self.export_worker = None
+        self.export_btn.setText('Export')
+        if not self.export_failed:
+            self.export_status.setText(f'Exported {count:,} events to {path}')
\ No newline at end of file
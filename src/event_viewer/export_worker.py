@@ -0,0 +1,60 @@
+import logging
+import os
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from src.event_viewer.exporter import EventExporter, ExportCancelled
+
+
+class ExportWorker(QObject):
+    """Runs one export off the GUI thread
+
+    rows is any iterable of event row tuples; it is only iterated from
+    run(), so an EventStore.query() generator opens its read connection
+    on the worker thread. cancel() is checked every chunk of rows read,
+    and a cancelled or failed export removes its partial file.
+    """
+
+    # rows written so far
+    progress = pyqtSignal(int)
+    # rows written, path
+    finished = pyqtSignal(int, str)
+    # message
+    error = pyqtSignal(str)
+
+    def __init__(self, exporter: EventExporter, rows, path, predicate=None):
+        super().__init__()
+        self.exporter = exporter
+        self.rows = rows
+        self.path = path
+        self.predicate = predicate
+        self._cancelled = False
+
+    def cancel(self):
+        """Stop at the next chunk boundary; safe from any thread"""
+        self._cancelled = True
+
+    @pyqtSlot()
+    def run(self):
+        count = 0
+        try:
+            count = self.exporter.export(
+                self.rows, self.path, self.predicate,
+                progress=self.progress.emit,
+                cancelled=lambda: self._cancelled
+            )
+        except ExportCancelled:
+            self._remove_partial()
+            self.error.emit("Export cancelled")
+        except Exception as e:
+            logging.error(f"Error exporting events to {self.path}: {e}")
+            self._remove_partial()
+            self.error.emit(str(e))
+        finally:
+            self.finished.emit(count, self.path)
+
+    def _remove_partial(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
\ No newline at end of file
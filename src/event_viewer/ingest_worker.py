@@ -0,0 +1,116 @@
+import logging
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from src.event_viewer.event_source import EventLogReader, LogResetError, host_name
+
+
+class IngestWorker(QObject):
+    """Reads event logs off the GUI thread
+
+    Lives in its own QThread; fetch() is invoked through a queued signal.
+    Batches read from the log are coalesced so that at most
+    max_updates_per_second batch_ready signals reach the UI. Every fetch
+    carries a generation number, and cancel_before() lets the UI abandon
+    reads it no longer cares about (e.g. after switching log type); the
+    running fetch notices between batches and stops. When an event store
+    is given, every batch read is also inserted into it from this thread.
+    With an aggregator_factory, each log gets an EventAggregator and the
+    UI is sent storm group snapshots instead of every event; the store
+    still gets every event, stored under the machine name of host, as
+    does EventStatistics when given (counted as read from host).
+    """
+
+    # generation, reset, events
+    batch_ready = pyqtSignal(int, bool, object)
+    # generation
+    finished = pyqtSignal(int)
+    # generation, message
+    error = pyqtSignal(int, str)
+
+    def __init__(self, source_factory, max_events=1000, max_updates_per_second=4, store=None,
+                 aggregator_factory=None, statistics=None, host='localhost'):
+        super().__init__()
+        self.store = store
+        self.statistics = statistics
+        self.host = host
+        self.machine = host_name(host)
+        self.aggregator_factory = aggregator_factory
+        self.aggregators = {}
+        self.source_factory = source_factory
+        self.max_events = max_events
+        self.update_interval = 1.0 / max(max_updates_per_second, 0.1)
+        self.readers = {}
+        self._cancel_below = 0
+
+    def cancel_before(self, generation):
+        """Cancel every fetch with a lower generation; safe from any thread"""
+        self._cancel_below = generation
+
+    def is_cancelled(self, generation):
+        return generation < self._cancel_below
+
+    def get_reader(self, log_type):
+        if log_type not in self.readers:
+            self.readers[log_type] = EventLogReader(self.source_factory(log_type), self.max_events)
+        return self.readers[log_type]
+
+    @pyqtSlot(str, int, bool)
+    def fetch(self, log_type, generation, full):
+        try:
+            if self.is_cancelled(generation):
+                return
+            reader = self.get_reader(log_type)
+            if full:
+                reader.reset()
+            try:
+                self._read(reader, log_type, generation)
+            except LogResetError:
+                reader.reset()
+                self._read(reader, log_type, generation)
+        except Exception as e:
+            logging.error(f"Error reading {log_type} log: {e}")
+            self.error.emit(generation, str(e))
+        finally:
+            self.finished.emit(generation)
+
+    def get_aggregator(self, log_type):
+        if self.aggregator_factory is None:
+            return None
+        if log_type not in self.aggregators:
+            self.aggregators[log_type] = self.aggregator_factory()
+        return self.aggregators[log_type]
+
+    def _read(self, reader, log_type, generation):
+        reset, batches = reader.poll()
+        aggregator = self.get_aggregator(log_type)
+        if reset and aggregator is not None:
+            aggregator.reset()
+        pending = []
+        last_emit = 0.0
+        for batch in batches:
+            if self.is_cancelled(generation):
+                return
+            if self.store is not None:
+                self.store.insert_events(self.machine, log_type, batch)
+            if self.statistics is not None:
+                self.statistics.add(self.host, log_type, batch)
+            pending.extend(batch)
+            now = time.monotonic()
+            if now - last_emit >= self.update_interval:
+                if aggregator is not None:
+                    pending = aggregator.add(pending)
+                self.batch_ready.emit(generation, reset, pending)
+                reset = False
+                pending = []
+                last_emit = now
+        if (pending or reset) and not self.is_cancelled(generation):
+            if aggregator is not None:
+                pending = aggregator.add(pending)
+            self.batch_ready.emit(generation, reset, pending)
+
+    def close(self):
+        for reader in self.readers.values():
+            reader.source.close()
+        self.readers = {}
\ No newline at end of file
@@ -0,0 +1,200 @@
+import importlib.util
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# %1, %1!s! and friends are inserts; %n, %t, %r, %% etc. are escapes
+INSERT_RE = re.compile(r'%(\d+)(?:![^!]*!)?|%([ntr .!%0])')
+ESCAPES = {'n': '\r\n', 't': '\t', 'r': '\r', ' ': ' ', '.': '.', '!': '!', '%': '%', '0': ''}
+
+EVENTLOG_KEY = 'SYSTEM\\CurrentControlSet\\Services\\EventLog\\{}\\{}'
+
+# (log, source, event id) -> template, or None when there is none
+TemplateResolver = Callable[[str, str, int], Optional[str]]
+
+
+def join_inserts(inserts) -> str:
+    if inserts is None:
+        return ''
+    if isinstance(inserts, str):
+        return inserts
+    return ' '.join(str(value) for value in inserts)
+
+
+def substitute(template: str, inserts) -> str:
+    """Fill a message template's %1..%n placeholders from the inserts"""
+    if inserts is None:
+        inserts = ()
+    elif isinstance(inserts, str):
+        inserts = (inserts,)
+
+    def replace(match):
+        number, escape = match.groups()
+        if escape is not None:
+            return ESCAPES[escape]
+        index = int(number) - 1
+        return str(inserts[index]) if 0 <= index < len(inserts) else match.group(0)
+    return INSERT_RE.sub(replace, template).rstrip()
+
+
+class DictTemplateResolver:
+    """Templates from a dict keyed by (log, source, event id) or (source, event id)"""
+
+    def __init__(self, templates: Dict[Tuple, str]):
+        self.templates = templates
+
+    def __call__(self, log_type: str, source: str, event_id: int) -> Optional[str]:
+        template = self.templates.get((log_type, source, event_id))
+        if template is None:
+            template = self.templates.get((source, event_id))
+        return template
+
+
+class Win32TemplateResolver:
+    """Looks templates up in the message DLLs registered for an event source
+
+    Follows win32evtlogutil.FormatMessage: the EventMessageFile value
+    under the source's EventLog registry key names one or more DLLs, and
+    the first one holding the event id wins. The template is fetched
+    with FORMAT_MESSAGE_IGNORE_INSERTS so it can be cached and filled in
+    later. Loaded DLLs are kept until close(). pywin32 itself is only
+    imported on the first lookup, keeping it off the startup path.
+    """
+
+    def __init__(self, server: Optional[str] = None):
+        self._win32api = None
+        self._win32con = None
+        self.server = server
+        self._root = None
+        self._modules: Dict[str, Optional[int]] = {}
+        self._lock = threading.Lock()
+
+    def _message_files(self, log_type: str, source: str):
+        win32api, win32con = self._win32api, self._win32con
+        try:
+            if self._root is None:
+                self._root = win32con.HKEY_LOCAL_MACHINE
+                if self.server not in (None, '', 'localhost'):
+                    self._root = win32api.RegConnectRegistry(self.server, self._root)
+            key = win32api.RegOpenKey(self._root, EVENTLOG_KEY.format(log_type, source))
+        except win32api.error:
+            return []
+        try:
+            value = win32api.RegQueryValueEx(key, 'EventMessageFile')[0]
+        except win32api.error:
+            return []
+        finally:
+            win32api.RegCloseKey(key)
+        return [os.path.expandvars(path) for path in value.split(';') if path]
+
+    def _module(self, path: str) -> Optional[int]:
+        with self._lock:
+            if path not in self._modules:
+                try:
+                    self._modules[path] = self._win32api.LoadLibraryEx(
+                        path, 0, self._win32con.LOAD_LIBRARY_AS_DATAFILE)
+                except self._win32api.error as e:
+                    logging.error(f"Error loading message file {path}: {e}")
+                    self._modules[path] = None
+            return self._modules[path]
+
+    def __call__(self, log_type: str, source: str, event_id: int) -> Optional[str]:
+        if self._win32api is None:
+            import win32api
+            import win32con
+            self._win32api, self._win32con = win32api, win32con
+        win32api, win32con = self._win32api, self._win32con
+        flags = win32con.FORMAT_MESSAGE_FROM_HMODULE | win32con.FORMAT_MESSAGE_IGNORE_INSERTS
+        for path in self._message_files(log_type, source):
+            module = self._module(path)
+            if module is None:
+                continue
+            try:
+                return win32api.FormatMessageW(flags, module, event_id, 0, None)
+            except win32api.error:
+                continue
+        return None
+
+    def close(self) -> None:
+        with self._lock:
+            for module in self._modules.values():
+                if module is not None:
+                    self._win32api.FreeLibrary(module)
+            self._modules = {}
+
+
+class MessageFormatter:
+    """Renders event messages from cached per-source templates
+
+    Resolving a template is the expensive part of formatting a message
+    (registry reads and message DLL lookups), while the template for a
+    given (log, source, event id) never changes. Templates are kept in
+    an LRU of cache_size entries, misses included, so a message costs one
+    dict lookup plus substituting its inserts. Messages whose template
+    cannot be found fall back to the inserts joined by spaces.
+
+    format() may be called from any thread.
+    """
+
+    def __init__(self, resolver: TemplateResolver, cache_size: int = 4096):
+        self.resolver = resolver
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def template(self, log_type: str, source: str, event_id: int) -> Optional[str]:
+        key = (log_type, source, event_id)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+        try:
+            template = self.resolver(log_type, source, event_id)
+        except Exception as e:
+            logging.error(f"Error resolving message template for {source} {event_id}: {e}")
+            template = None
+        with self._lock:
+            self._cache[key] = template
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return template
+
+    def format(self, log_type: str, source: str, event_id: int, inserts) -> str:
+        template = self.template(log_type, source, event_id)
+        if template is None:
+            return join_inserts(inserts)
+        return substitute(template, inserts)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self._cache)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        self.clear()
+        close = getattr(self.resolver, 'close', None)
+        if close is not None:
+            close()
+
+
+def create_message_formatter(config, server: Optional[str] = None) -> MessageFormatter:
+    """Formatter backed by the Windows message DLLs, or by inserts alone without pywin32"""
+    cache_size = config.get('event_viewer.message_cache_size', 4096)
+    if importlib.util.find_spec('win32api') is not None:
+        resolver = Win32TemplateResolver(server)
+    else:
+        resolver = DictTemplateResolver({})
+    return MessageFormatter(resolver, cache_size)
\ No newline at end of file
@@ -0,0 +1,292 @@
+import re
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+TOKEN_RE = re.compile(r'[\w.@$-]+')
+TOKEN_STRIP = '.-'
+QUERY_PART_RE = re.compile(r'\w+:"[^"]*"|"[^"]*"|\S+')
+
+# Postings are compacted once this share of the indexed rows has been evicted
+COMPACT_FRACTION = 0.25
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in TOKEN_RE.findall(text.lower()):
+        token = match.strip(TOKEN_STRIP)
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def message_text(inserts) -> str:
+    if inserts is None:
+        return ''
+    if isinstance(inserts, str):
+        return inserts
+    return ' '.join(str(value) for value in inserts)
+
+
+def parse_time(value: str) -> float:
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised time: {value}")
+
+
+class SearchQuery:
+    """Parsed form of a search string
+
+    Bare words are terms, a trailing * makes a prefix, quoted text is a
+    phrase, and source:, id:, after: and before: filter on fields. All
+    parts must match.
+    """
+
+    def __init__(self, text: str):
+        self.terms: List[str] = []
+        self.prefixes: List[str] = []
+        self.phrases: List[List[str]] = []
+        self.source: Optional[str] = None
+        self.event_id: Optional[int] = None
+        self.after: Optional[float] = None
+        self.before: Optional[float] = None
+        for part in QUERY_PART_RE.findall(text):
+            field, sep, value = part.partition(':')
+            field = field.lower()
+            value = value.strip('"')
+            quoted = part.startswith('"')
+            part = part.strip('"')
+            if sep and field == 'source':
+                self.source = value.strip().lower()
+            elif sep and field == 'id' and value.strip().isdigit():
+                self.event_id = int(value)
+            elif sep and field in ('after', 'before'):
+                setattr(self, field, parse_time(value.strip()))
+            elif part.endswith('*') and len(part) > 1:
+                self.prefixes.extend(tokenize(part[:-1]))
+            else:
+                tokens = tokenize(part)
+                if len(tokens) > 1 or quoted:
+                    self.phrases.append(tokens)
+                else:
+                    self.terms.extend(tokens)
+
+    def matches(self, time_generated, source, event_id, inserts) -> bool:
+        """Evaluate the query against a single event without the index"""
+        if self.source is not None and source.lower() != self.source:
+            return False
+        if self.event_id is not None and event_id != self.event_id:
+            return False
+        if self.after is not None or self.before is not None:
+            timestamp = time_generated.timestamp()
+            if self.after is not None and timestamp < self.after:
+                return False
+            if self.before is not None and timestamp >= self.before:
+                return False
+        tokens = tokenize(message_text(inserts))
+        token_set = set(tokens)
+        if any(term not in token_set for term in self.terms):
+            return False
+        for prefix in self.prefixes:
+            if not any(token.startswith(prefix) for token in token_set):
+                return False
+        if self.phrases:
+            text = ' '.join(tokens)
+            if any(' '.join(phrase) not in text for phrase in self.phrases):
+                return False
+        return True
+
+    def is_empty(self) -> bool:
+        return not (self.terms or self.prefixes or self.phrases or self.source is not None
+                    or self.event_id is not None or self.after is not None
+                    or self.before is not None)
+
+
+class SearchIndex:
+    """Incremental inverted index over event messages
+
+    Rows are identified by the caller's sequence numbers, which must be
+    added in increasing order; that keeps every posting list a sorted
+    array of 32-bit ids that only ever grows at the end. Message inserts
+    are split into lower-cased tokens; source and event id get postings
+    of their own, and TimeGenerated is kept in a parallel array for time
+    filters. Phrases are answered by intersecting their tokens and, when
+    text_for is given, checking the row's text for the exact phrase.
+
+    evict_before() forgets old rows. Their ids are dropped from the
+    postings in one pass once enough have accumulated, which keeps memory
+    proportional to the rows still held.
+    """
+
+    def __init__(self, text_for: Optional[Callable[[int], Optional[str]]] = None):
+        self.text_for = text_for
+        self.clear()
+
+    def clear(self) -> None:
+        self._postings: Dict[str, array] = {}
+        self._sources: Dict[str, array] = {}
+        self._event_ids: Dict[int, array] = {}
+        self._times = array('d')
+        self._first_id = 0  # id of self._times[0]
+        self._next_id = 0
+        self._min_id = 0  # ids below this have been evicted
+        self._vocabulary: Optional[List[str]] = None
+        self._new_tokens: List[str] = []
+
+    def __len__(self):
+        return self._next_id - self._min_id
+
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    @staticmethod
+    def _post(table, key, row_id):
+        posting = table.get(key)
+        if posting is None:
+            posting = table[key] = array('I')
+        posting.append(row_id)
+
+    def add(self, row_id: int, event) -> None:
+        if not self._times:
+            self._first_id = self._min_id = row_id
+        elif row_id != self._next_id:
+            raise ValueError(f"Rows must be added in order, expected {self._next_id}")
+        self._next_id = row_id + 1
+        self._times.append(event.TimeGenerated.timestamp())
+
+        postings = self._postings
+        for token in set(tokenize(message_text(event.StringInserts))):
+            posting = postings.get(token)
+            if posting is None:
+                posting = postings[token] = array('I')
+                self._new_tokens.append(token)
+            posting.append(row_id)
+        self._post(self._sources, event.SourceName.lower(), row_id)
+        self._post(self._event_ids, event.EventID, row_id)
+
+    def add_events(self, first_id: int, events) -> None:
+        for offset, event in enumerate(events):
+            self.add(first_id + offset, event)
+
+    def evict_before(self, row_id: int) -> None:
+        if row_id <= self._min_id:
+            return
+        self._min_id = min(row_id, self._next_id)
+        if self._min_id - self._first_id >= COMPACT_FRACTION * (self._next_id - self._first_id):
+            self._compact()
+
+    def _compact(self) -> None:
+        min_id = self._min_id
+        for table in (self._postings, self._sources, self._event_ids):
+            for key in list(table):
+                posting = table[key]
+                cut = bisect_left(posting, min_id)
+                if cut == len(posting):
+                    del table[key]
+                elif cut:
+                    del posting[:cut]
+        del self._times[:min_id - self._first_id]
+        self._first_id = min_id
+        self._vocabulary = None
+        self._new_tokens = []
+
+    def _live(self, posting) -> array:
+        """Slice of a posting list without evicted ids"""
+        if posting and posting[0] < self._min_id:
+            return posting[bisect_left(posting, self._min_id):]
+        return posting
+
+    def _prefix_ids(self, prefix: str) -> List[int]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+            self._new_tokens = []
+        elif self._new_tokens:
+            # Timsort merges the sorted runs in linear time
+            self._vocabulary.extend(sorted(self._new_tokens))
+            self._vocabulary.sort()
+            self._new_tokens = []
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        end = bisect_left(vocabulary, prefix + '\uffff', start)
+        if end - start == 1:
+            return self._live(self._postings[vocabulary[start]])
+        ids = set()
+        for token in vocabulary[start:end]:
+            ids.update(self._postings[token])
+        return sorted(i for i in ids if i >= self._min_id) if self._min_id else sorted(ids)
+
+    def search(self, query) -> List[int]:
+        """Return the ids of rows matching a query string or SearchQuery"""
+        if isinstance(query, str):
+            query = SearchQuery(query)
+        if query.is_empty():
+            return []
+
+        lists = []
+        empty = array('I')
+        for term in query.terms:
+            lists.append(self._live(self._postings.get(term, empty)))
+        for phrase in query.phrases:
+            for token in phrase:
+                lists.append(self._live(self._postings.get(token, empty)))
+        for prefix in query.prefixes:
+            lists.append(self._prefix_ids(prefix))
+        if query.source is not None:
+            lists.append(self._live(self._sources.get(query.source, empty)))
+        if query.event_id is not None:
+            lists.append(self._live(self._event_ids.get(query.event_id, empty)))
+
+        if lists:
+            ids = intersect(lists)
+        else:
+            ids = range(self._min_id, self._next_id)
+
+        if query.after is not None or query.before is not None:
+            times, first = self._times, self._first_id
+            after = query.after if query.after is not None else float('-inf')
+            before = query.before if query.before is not None else float('inf')
+            ids = [i for i in ids if after <= times[i - first] < before]
+
+        if query.phrases and self.text_for is not None:
+            phrases = [' '.join(phrase) for phrase in query.phrases]
+            matched = []
+            for i in ids:
+                text = self.text_for(i)
+                if text is None:
+                    continue
+                text = ' '.join(tokenize(text))
+                if all(phrase in text for phrase in phrases):
+                    matched.append(i)
+            ids = matched
+        return list(ids)
+
+
+def intersect(lists) -> List[int]:
+    """Intersect sorted id lists, smallest first"""
+    lists = sorted(lists, key=len)
+    result = lists[0]
+    if not result:
+        return []
+    for other in lists[1:]:
+        if len(other) > 16 * len(result):
+            # Probe the big list instead of hashing it
+            found = []
+            lo = 0
+            for i in result:
+                lo = bisect_left(other, i, lo)
+                if lo == len(other):
+                    break
+                if other[lo] == i:
+                    found.append(i)
+            result = found
+        else:
+            members = set(other)
+            result = [i for i in result if i in members]
+        if not result:
+            return []
+    return list(result)
\ No newline at end of file
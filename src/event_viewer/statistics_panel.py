@@ -0,0 +1,120 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import (QComboBox, QHBoxLayout, QHeaderView, QLabel, QTableWidget,
+                             QTableWidgetItem, QVBoxLayout, QWidget)
+
+from src.event_store.statistics import EventStatistics, sparkline
+from src.event_viewer.event_source import EVENT_TYPE_NAMES
+from src.utils.config import get_config
+
+# label, resolution, buckets
+PERIODS = (
+    ('Last hour, per minute', 'minute', 60),
+    ('Last 24 hours, per minute', 'minute', 1440),
+    ('Last 7 days, per hour', 'hour', 168),
+    ('Last 90 days, per day', 'day', 90),
+)
+# label, statistics field
+GROUPS = (
+    ('Source', 'source'),
+    ('Event ID', 'event_id'),
+    ('Log', 'log'),
+    ('Type', 'event_type'),
+)
+TOP_COUNT = 20
+# Characters in a sparkline; longer periods are summed down to this
+SPARKLINE_WIDTH = 60
+
+
+def squeeze(values, width):
+    """values summed into at most width consecutive groups"""
+    if len(values) <= width:
+        return values
+    step = -(-len(values) // width)
+    return [sum(values[i:i + step]) for i in range(0, len(values), step)]
+
+
+class StatisticsPanel(QWidget):
+    """Top sources (or ids, logs, types) with sparklines, and current spikes
+
+    Reads the rollups EventStatistics keeps as events are ingested, so
+    nothing is reread from the logs or the store. Refreshed every
+    statistics.refresh_interval seconds while shown.
+    """
+
+    def __init__(self, statistics: EventStatistics):
+        super().__init__()
+        self.statistics = statistics
+        self.config = get_config()
+        self.setup_ui()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        controls = QHBoxLayout()
+        self.period_combo = QComboBox()
+        self.period_combo.addItems([label for label, _, _ in PERIODS])
+        self.period_combo.currentIndexChanged.connect(self.refresh)
+        self.group_combo = QComboBox()
+        self.group_combo.addItems([label for label, _ in GROUPS])
+        self.group_combo.currentIndexChanged.connect(self.refresh)
+        controls.addWidget(QLabel('Period:'))
+        controls.addWidget(self.period_combo)
+        controls.addWidget(QLabel('By:'))
+        controls.addWidget(self.group_combo)
+        controls.addStretch()
+
+        self.top_table = QTableWidget(0, 3)
+        self.top_table.setHorizontalHeaderLabels(['Source', 'Events', 'Trend'])
+        self.top_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.top_table.verticalHeader().setVisible(False)
+        self.top_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.top_table.setFont(QFont('Consolas'))
+
+        self.spike_label = QLabel()
+        self.spike_label.setWordWrap(True)
+
+        layout.addLayout(controls)
+        layout.addWidget(self.top_table)
+        layout.addWidget(self.spike_label)
+        self.setLayout(layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start(int(self.config.get('statistics.refresh_interval', 10) * 1000))
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+    def display_value(self, field, value):
+        if field == 'event_type':
+            return EVENT_TYPE_NAMES.get(value, str(value))
+        return str(value) if value != '' else '(none)'
+
+    def refresh(self):
+        _, resolution, buckets = PERIODS[self.period_combo.currentIndex()]
+        label, field = GROUPS[self.group_combo.currentIndex()]
+        top = self.statistics.top(field, resolution, buckets, TOP_COUNT)
+        self.top_table.setHorizontalHeaderItem(0, QTableWidgetItem(label))
+        self.top_table.setRowCount(len(top))
+        for row, (value, total) in enumerate(top):
+            trend = self.statistics.counts(resolution, buckets, **{field: value})
+            self.top_table.setItem(row, 0, QTableWidgetItem(self.display_value(field, value)))
+            self.top_table.setItem(row, 1, QTableWidgetItem(f'{total:,}'))
+            self.top_table.setItem(row, 2, QTableWidgetItem(sparkline(squeeze(trend, SPARKLINE_WIDTH))))
+        self.top_table.resizeColumnToContents(0)
+
+        spikes = self.statistics.spikes(
+            field, resolution, min(buckets, 60),
+            self.config.get('statistics.spike_threshold', 3.0),
+            self.config.get('statistics.spike_min_count', 10)
+        )
+        if spikes:
+            self.spike_label.setText('Spikes in the last complete ' + resolution + ': ' + '; '.join(
+                f'{self.display_value(field, spike.value)} {spike.count:,} (usually {spike.mean:.1f})'
+                for spike in spikes[:10]))
+        else:
+            self.spike_label.setText(f'No spikes in the last complete {resolution}.')
\ No newline at end of file
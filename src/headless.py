@@ -0,0 +1,125 @@
+"""Rule engine daemon: collects events and runs rule actions without the GUI
+
+Nothing here imports Qt. Logs are read by the collector (see the
+collector config section, whose enabled flag only applies to the GUI)
+and every merged event goes through RuleEngine.check_event, storms of
+identical events collapsed first (see the aggregation config section).
+Occurrence counts and log cursors are checkpointed (see the checkpoint
+config section), so a restart resumes where the last run stopped.
+"""
+import logging
+import signal
+import threading
+import time
+from typing import Optional
+
+from src.collector.collector import collector_from_config
+from src.event_manager.checkpoint import create_checkpoint
+from src.event_manager.rule_engine import RULES_FILE, RuleEngine
+from src.event_store.event_store import open_event_store
+from src.event_store.statistics import create_statistics
+from src.event_viewer.aggregator import create_aggregator
+from src.event_viewer.event_source import Win32EventSource
+from src.utils.config import ConfigManager, get_config
+from src.utils.logger import setup_logger
+from src.utils.metrics import setup_metrics
+from src.utils.startup import active_profiler, mark, phase
+
+CLEAN_INTERVAL = 60  # seconds between occurrence history prunes
+REPORT_INTERVAL = 300  # seconds between throughput log lines
+
+
+class HeadlessDaemon:
+    def __init__(self, config: ConfigManager, rules_file: str = RULES_FILE, source_factory=None):
+        self.config = config
+        self.metrics = setup_metrics(config)
+        self.store = open_event_store(config)
+        self.engine = RuleEngine(self.store, config, rules_file)
+        self.statistics = create_statistics(config)
+        self.collector = collector_from_config(
+            config,
+            source_factory or (lambda host, log_type: Win32EventSource(log_type, host)),
+            self.store,
+            self.statistics
+        )
+        self.aggregator = create_aggregator(config)
+        self.checkpoint = create_checkpoint(config, self.engine.event_history)
+        self.drain_interval = config.get('collector.drain_interval_ms', 500) / 1000
+        self.stopping = threading.Event()
+
+    def run(self, duration: Optional[float] = None) -> None:
+        with phase('load rules'):
+            rules = self.engine.load_rules()
+        logging.info(f"Headless rule engine started with {len(rules)} rules and "
+                     f"{len(self.engine.correlator.patterns)} correlation patterns on "
+                     f"{len(self.collector.readers)} logs")
+        if self.checkpoint is not None:
+            with phase('restore rule state'):
+                self.collector.restore_cursors(self.checkpoint.restore())
+        self.collector.start()
+        if active_profiler() is not None:
+            mark('collector started')
+            print(active_profiler().report())
+        watch_interval = self.config.get('config.watch_interval', 2)
+        started = last_clean = last_report = last_watch = time.monotonic()
+        reported = 0
+        try:
+            while not self.stopping.wait(self.drain_interval):
+                self.check(self.collector.drain())
+                if self.checkpoint is not None:
+                    self.checkpoint.tick()
+                now = time.monotonic()
+                if watch_interval and now - last_watch >= watch_interval:
+                    self.config.check_for_changes()
+                    last_watch = now
+                if now - last_clean >= CLEAN_INTERVAL:
+                    self.engine.clean_event_history()
+                    last_clean = now
+                if now - last_report >= REPORT_INTERVAL:
+                    checked = self.engine.events_checked
+                    logging.info(f"{checked - reported} events checked in the last "
+                                 f"{now - last_report:.0f}s, {self.engine.actions_triggered} actions so far")
+                    reported, last_report = checked, now
+                if duration is not None and now - started >= duration:
+                    break
+        finally:
+            self.shutdown()
+
+    def check(self, events) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.advance(events)
+        self.engine.check_events(self.aggregator.add(events))
+
+    def stop(self, *args) -> None:
+        self.stopping.set()
+
+    def shutdown(self) -> None:
+        self.collector.close()
+        # Whatever the readers delivered before stopping still gets checked
+        self.check(self.collector.drain())
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        self.engine.shutdown()
+        if self.statistics is not None:
+            self.statistics.close()
+        if self.store is not None:
+            self.store.close()
+        if self.metrics is not None:
+            self.metrics.close()
+        logging.info(f"Headless rule engine stopped after {self.engine.events_checked} events")
+
+
+def main(config_file: str = 'config/config.yaml', rules_file: str = RULES_FILE,
+         duration: Optional[float] = None) -> int:
+    config = get_config(config_file)
+    setup_logger(config)
+    try:
+        with phase('daemon setup'):
+            daemon = HeadlessDaemon(config, rules_file)
+    except Exception as e:
+        logging.error(f"Error starting headless rule engine: {e}")
+        return 1
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    daemon.run(duration)
+    return 0
\ No newline at end of file
@@ -1,103 +1,251 @@
-import sys
-import os
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QSystemTrayIcon, QMenu,
-                           QAction, QTabWidget, QWidget, QVBoxLayout)
-from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt
-
-from src.event_viewer.event_viewer import EventViewer
-from src.event_manager.event_manager import EventManager
-from src.utils.logger import setup_logger, log_info, log_error
-
-class MainWindow(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("All-Event-in-One")
-        self.setGeometry(100, 100, 1200, 800)
-        
-        # Initialize logger
-        self.logger = setup_logger()
-        log_info(self.logger, "Application started")
-        
-        # Initialize system tray
-        self.setup_system_tray()
-        
-        # Initialize main components
-        self.setup_ui()
-        
-    def setup_ui(self):
-        # Create central widget and layout
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        layout = QVBoxLayout(central_widget)
-        
-        # Create tab widget
-        tab_widget = QTabWidget()
-        
-        # Add Event Viewer tab
-        self.event_viewer = EventViewer()
-        tab_widget.addTab(self.event_viewer, "Event Viewer")
-        
-        # Add Event Manager tab
-        self.event_manager = EventManager()
-        tab_widget.addTab(self.event_manager, "Event Manager")
-        
-        layout.addWidget(tab_widget)
-        
-    def setup_system_tray(self):
-        self.tray_icon = QSystemTrayIcon(self)
-        # TODO: Add proper icon
-        # self.tray_icon.setIcon(QIcon("path/to/icon.png"))
-        
-        # Create tray menu
-        tray_menu = QMenu()
-        show_action = QAction("Show", self)
-        quit_action = QAction("Exit", self)
-        
-        show_action.triggered.connect(self.show)
-        quit_action.triggered.connect(self.quit_application)
-        
-        tray_menu.addAction(show_action)
-        tray_menu.addAction(quit_action)
-        
-        self.tray_icon.setContextMenu(tray_menu)
-        self.tray_icon.show()
-        
-    def closeEvent(self, event):
-        # Minimize to tray instead of closing
-        event.ignore()
-        self.hide()
-        self.tray_icon.showMessage(
-            "All-Event-in-One",
-            "Application minimized to tray",
-            QSystemTrayIcon.Information,
-            2000
-        )
-        
-    def quit_application(self):
-        log_info(self.logger, "Application shutting down")
-        QApplication.quit()
-
-def check_admin_privileges():
-    try:
-        return os.getuid() == 0
-    except AttributeError:
-        import ctypes
-        return ctypes.windll.shell32.IsUserAnAdmin() != 0
-
-def main():
-    # Check for admin privileges
-    if not check_admin_privileges():
-        print("Warning: Some features may require administrator privileges")
-    
-    try:
-        app = QApplication(sys.argv)
-        window = MainWindow()
-        window.show()
-        sys.exit(app.exec_())
-    except Exception as e:
-        print(f"Error starting application: {e}")
-        sys.exit(1)
-
-if __name__ == '__main__':
+import sys
+import os
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QSystemTrayIcon, QMenu,
+                           QAction, QTabWidget, QWidget, QVBoxLayout)
+from PyQt5.QtCore import QTimer
+
+from src.collector.collector import create_collector
+from src.event_viewer.aggregator import create_aggregator
+from src.event_viewer.event_source import Win32EventSource
+from src.event_store.event_store import open_event_store
+from src.event_store.statistics import create_statistics
+from src.utils.config import get_config
+from src.utils.logger import setup_logger, log_info
+from src.utils.metrics import setup_metrics
+from src.utils.startup import active_profiler, mark, phase
+
+class LazyTabWidget(QTabWidget):
+    """Tab widget whose pages are only built when first shown
+    
+    Each tab starts as an empty placeholder; the factory for a page runs
+    the first time its tab becomes current, so pages that are never
+    opened cost nothing at startup.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.factories = []
+        self.pages = []
+        self.currentChanged.connect(self.build_page)
+        
+    def add_lazy_tab(self, factory, label):
+        placeholder = QWidget()
+        QVBoxLayout(placeholder).setContentsMargins(0, 0, 0, 0)
+        self.factories.append(factory)
+        self.pages.append(None)
+        self.blockSignals(True)
+        self.addTab(placeholder, label)
+        self.blockSignals(False)
+        
+    def build_page(self, index):
+        if 0 <= index < len(self.pages) and self.pages[index] is None:
+            with phase(f'build tab {self.tabText(index)!r}'):
+                page = self.factories[index]()
+            self.pages[index] = page
+            self.widget(index).layout().addWidget(page)
+
+class MainWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("All-Event-in-One")
+        self.setGeometry(100, 100, 1200, 800)
+        
+        # Initialize logger
+        self.logger = setup_logger()
+        log_info(self.logger, "Application started")
+        
+        # Initialize system tray
+        self.setup_system_tray()
+        
+        # Initialize main components
+        self.setup_ui()
+        
+    def setup_ui(self):
+        # Create central widget and layout
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+        
+        # Shared store for ingested and triggered events
+        self.config = get_config()
+        # Before anything instrumented is created
+        self.metrics = setup_metrics(self.config)
+        with phase('event store'):
+            self.event_store = open_event_store(self.config)
+        # Per-minute, hour and day event counts, kept up to date as logs are read
+        self.statistics = create_statistics(self.config)
+        
+        # Optional reader of several logs and hosts, merged into one stream
+        self.collector = create_collector(
+            self.config,
+            lambda host, log_type: Win32EventSource(log_type, host),
+            self.event_store,
+            self.statistics
+        )
+        # Storms of identical collected events reach the rules and the table as counted groups
+        self.aggregator = create_aggregator(self.config)
+        
+        # Tabs are built when first opened; the rule engine is created
+        # with the Event Manager tab or when the collector needs it
+        self.event_viewer = None
+        self.event_manager = None
+        self.rule_engine = None
+        tab_widget = LazyTabWidget()
+        tab_widget.add_lazy_tab(self.create_event_viewer, "Event Viewer")
+        tab_widget.add_lazy_tab(self.create_event_manager, "Event Manager")
+        if self.statistics is not None:
+            tab_widget.add_lazy_tab(self.create_statistics_panel, "Statistics")
+        tab_widget.build_page(tab_widget.currentIndex())
+        
+        layout.addWidget(tab_widget)
+        
+        # Settings edited in the file are applied without a restart
+        watch_interval = self.config.get('config.watch_interval', 2)
+        if watch_interval:
+            self.config_timer = QTimer(self)
+            self.config_timer.timeout.connect(self.config.check_for_changes)
+            self.config_timer.start(int(watch_interval * 1000))
+        
+        self.checkpoint = None
+        if self.collector is not None:
+            from src.event_manager.checkpoint import create_checkpoint
+            self.checkpoint = create_checkpoint(self.config, self.get_rule_engine().event_history)
+            if self.checkpoint is not None:
+                with phase('restore rule state'):
+                    self.collector.restore_cursors(self.checkpoint.restore())
+            self.collector.start()
+            self.collector_timer = QTimer(self)
+            self.collector_timer.timeout.connect(self.drain_collector)
+            self.collector_timer.start(self.config.get('collector.drain_interval_ms', 500))
+            
+    def create_event_viewer(self):
+        from src.event_viewer.event_viewer import EventViewer
+        self.event_viewer = EventViewer(self.event_store, self.collector, self.statistics)
+        return self.event_viewer
+        
+    def create_statistics_panel(self):
+        from src.event_viewer.statistics_panel import StatisticsPanel
+        return StatisticsPanel(self.statistics)
+        
+    def create_event_manager(self):
+        from src.event_manager.event_manager import EventManager
+        self.event_manager = EventManager(self.event_store, self.get_rule_engine())
+        return self.event_manager
+        
+    def get_rule_engine(self):
+        if self.rule_engine is None:
+            from src.event_manager.rule_engine import RuleEngine
+            with phase('rule engine'):
+                self.rule_engine = RuleEngine(self.event_store, self.config)
+                self.rule_engine.load_rules()
+        return self.rule_engine
+            
+    def drain_collector(self):
+        events = self.collector.drain()
+        if self.checkpoint is not None:
+            self.checkpoint.advance(events)
+        events = self.aggregator.add(events)
+        self.rule_engine.check_events(events)
+        if self.checkpoint is not None:
+            self.checkpoint.tick()
+        if self.event_viewer is not None:
+            self.event_viewer.append_collected(events)
+        self.show_collector_status()
+        
+    def show_collector_status(self):
+        parts = []
+        for (host, log_type), stats in self.collector.stats().items():
+            if stats['last_error'] is not None:
+                state = f"retrying in {stats['retry_delay']:.0f}s"
+            elif stats['lag'] is None:
+                state = 'waiting'
+            else:
+                state = f"lag {stats['lag']:.0f}s, {stats['behind']} behind"
+            parts.append(f"{host}/{log_type}: {state}")
+        self.statusBar().showMessage(' | '.join(parts))
+        
+    def setup_system_tray(self):
+        self.tray_icon = QSystemTrayIcon(self)
+        # TODO: Add proper icon
+        # self.tray_icon.setIcon(QIcon("path/to/icon.png"))
+        
+        # Create tray menu
+        tray_menu = QMenu()
+        show_action = QAction("Show", self)
+        quit_action = QAction("Exit", self)
+        
+        show_action.triggered.connect(self.show)
+        quit_action.triggered.connect(self.quit_application)
+        
+        tray_menu.addAction(show_action)
+        tray_menu.addAction(quit_action)
+        
+        self.tray_icon.setContextMenu(tray_menu)
+        self.tray_icon.show()
+        
+    def closeEvent(self, event):
+        # Minimize to tray instead of closing
+        event.ignore()
+        self.hide()
+        self.tray_icon.showMessage(
+            "All-Event-in-One",
+            "Application minimized to tray",
+            QSystemTrayIcon.Information,
+            2000
+        )
+        
+    def quit_application(self):
+        log_info(self.logger, "Application shutting down")
+        if self.collector is not None:
+            self.collector_timer.stop()
+            self.collector.close()
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+        if self.event_viewer is not None:
+            self.event_viewer.shutdown()
+        if self.event_manager is not None:
+            self.event_manager.shutdown()
+        elif self.rule_engine is not None:
+            self.rule_engine.shutdown()
+        if self.statistics is not None:
+            self.statistics.close()
+        if self.event_store is not None:
+            self.event_store.close()
+        if self.metrics is not None:
+            self.metrics.close()
+        QApplication.quit()
+
+def check_admin_privileges():
+    try:
+        return os.getuid() == 0
+    except AttributeError:
+        import ctypes
+        return ctypes.windll.shell32.IsUserAnAdmin() != 0
+
+def report_startup(window):
+    """Print the startup profile once the event loop is idle, then quit"""
+    mark('event loop idle')
+    print(active_profiler().report())
+    window.quit_application()
+
+def main():
+    # Check for admin privileges
+    if not check_admin_privileges():
+        print("Warning: Some features may require administrator privileges")
+    
+    try:
+        with phase('QApplication'):
+            app = QApplication(sys.argv)
+        with phase('main window'):
+            window = MainWindow()
+        with phase('show window'):
+            window.show()
+        if active_profiler() is not None:
+            QTimer.singleShot(0, lambda: report_startup(window))
+        sys.exit(app.exec_())
+    except Exception as e:
+        print(f"Error starting application: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
     main() 
\ No newline at end of file
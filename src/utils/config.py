@@ -1,99 +1,310 @@
-import yaml
-import os
-from typing import Dict, Any
-
-class ConfigManager:
-    def __init__(self, config_file: str = 'config/config.yaml'):
-        self.config_file = config_file
-        self.config: Dict[str, Any] = {}
-        self.load_config()
-        
-    def load_config(self) -> None:
-        """Load configuration from YAML file"""
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    self.config = yaml.safe_load(f)
-            else:
-                self.config = self.get_default_config()
-                self.save_config()
-        except Exception as e:
-            print(f"Error loading config: {e}")
-            self.config = self.get_default_config()
-            
-    def save_config(self) -> None:
-        """Save configuration to YAML file"""
-        try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w') as f:
-                yaml.dump(self.config, f, default_flow_style=False)
-        except Exception as e:
-            print(f"Error saving config: {e}")
-            
-    def get_default_config(self) -> Dict[str, Any]:
-        """Get default configuration"""
-        return {
-            'email': {
-                'smtp_server': 'smtp.gmail.com',
-                'smtp_port': 587,
-                'username': '',
-                'password': '',
-                'from_address': 'event-manager@localhost'
-            },
-            'event_viewer': {
-                'refresh_interval': 30,
-                'max_events': 1000,
-                'default_log_type': 'System'
-            },
-            'event_manager': {
-                'history_retention': 86400,
-                'max_rules': 100
-            },
-            'logging': {
-                'level': 'INFO',
-                'file_retention_days': 30,
-                'max_file_size_mb': 10
-            },
-            'ui': {
-                'theme': 'default',
-                'language': 'en',
-                'show_system_tray': True,
-                'minimize_to_tray': True
-            }
-        }
-        
-    def get(self, key: str, default: Any = None) -> Any:
-        """Get configuration value by key"""
-        keys = key.split('.')
-        value = self.config
-        
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k, default)
-            else:
-                return default
-                
-        return value
-        
-    def set(self, key: str, value: Any) -> None:
-        """Set configuration value by key"""
-        keys = key.split('.')
-        current = self.config
-        
-        for k in keys[:-1]:
-            if k not in current:
-                current[k] = {}
-            current = current[k]
-            
-        current[keys[-1]] = value
-        self.save_config()
-        
-    def update(self, updates: Dict[str, Any]) -> None:
-        """Update multiple configuration values"""
-        for key, value in updates.items():
-            self.set(key, value)
-            
-    def reset(self) -> None:
-        """Reset configuration to defaults"""
-        self.config = self.get_default_config()
-        self.save_config() 
\ No newline at end of file
+import copy
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+# libyaml's loader and dumper when PyYAML was built with them
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+_MISSING = object()
+
+class ConfigManager:
+    """YAML configuration with cached dotted-key lookups
+    
+    Changes made inside transaction() are written once, when the
+    outermost transaction ends, and rolled back if it raises. Every save
+    goes to a temporary file that is then renamed over the config file,
+    so readers never see it half written. check_for_changes() compares
+    the file's mtime and size with what was last loaded or saved and
+    only parses it when they differ; subscribers to a key are called
+    with its new value whenever it changes, from a reload or from set().
+    """
+    
+    def __init__(self, config_file: str = 'config/config.yaml'):
+        self.config_file = config_file
+        self.config: Dict[str, Any] = {}
+        self._cache: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._dirty = False
+        self._file_state: Optional[Tuple[int, int]] = None
+        self._subscribers: List[Tuple[str, Callable[[Any], None]]] = []
+        self.load_config()
+        
+    def load_config(self) -> None:
+        """Load configuration from YAML file"""
+        with self._lock:
+            try:
+                if os.path.exists(self.config_file):
+                    state = self._stat()
+                    with open(self.config_file, 'r') as f:
+                        self.config = yaml.load(f, Loader=YAML_LOADER) or {}
+                    self._file_state = state
+                else:
+                    self.config = self.get_default_config()
+                    self.save_config()
+            except Exception as e:
+                print(f"Error loading config: {e}")
+                self.config = self.get_default_config()
+            self._cache = {}
+            
+    def save_config(self) -> None:
+        """Save configuration to YAML file, replacing it atomically"""
+        with self._lock:
+            if self._depth:
+                self._dirty = True
+                return
+            temp_path = None
+            try:
+                directory = os.path.dirname(self.config_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                temp_path = f'{self.config_file}.{os.getpid()}.tmp'
+                with open(temp_path, 'w') as f:
+                    yaml.dump(self.config, f, Dumper=YAML_DUMPER, default_flow_style=False)
+                os.replace(temp_path, self.config_file)
+                temp_path = None
+                self._file_state = self._stat()
+                self._dirty = False
+            except Exception as e:
+                print(f"Error saving config: {e}")
+            finally:
+                if temp_path is not None:
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+                        
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+        
+    @contextmanager
+    def transaction(self):
+        """Batch set() calls into one write; nothing changes if the block raises"""
+        with self._lock:
+            if self._depth == 0:
+                snapshot = copy.deepcopy(self.config)
+                values = self._watched_values()
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.config = snapshot
+                    self._cache = {}
+                    self._dirty = False
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                if self._dirty:
+                    self.save_config()
+                self._notify(values)
+                
+    def subscribe(self, key: str, callback: Callable[[Any], None]) -> None:
+        """Call callback(value) whenever the value at key changes"""
+        with self._lock:
+            self._subscribers.append((key, callback))
+            
+    def unsubscribe(self, callback: Callable[[Any], None]) -> None:
+        with self._lock:
+            self._subscribers = [entry for entry in self._subscribers if entry[1] != callback]
+            
+    def check_for_changes(self) -> bool:
+        """Reload the file if it changed on disk; returns True if it was reloaded"""
+        with self._lock:
+            state = self._stat()
+            if state is None or state == self._file_state or self._depth:
+                return False
+            try:
+                with open(self.config_file, 'r') as f:
+                    config = yaml.load(f, Loader=YAML_LOADER) or {}
+            except Exception as e:
+                # Probably caught mid-edit; the next check tries again
+                print(f"Error reloading config: {e}")
+                return False
+            values = self._watched_values()
+            self.config = config
+            self._cache = {}
+            self._file_state = state
+            self._notify(values)
+            return True
+            
+    def _watched_values(self) -> List[Any]:
+        return [copy.deepcopy(self.get(key)) for key, _ in self._subscribers]
+        
+    def _notify(self, before: List[Any]) -> None:
+        for (key, callback), old in zip(list(self._subscribers), before):
+            value = self.get(key)
+            if value != old:
+                try:
+                    callback(value)
+                except Exception as e:
+                    print(f"Error applying config change to {key}: {e}")
+            
+    def get_default_config(self) -> Dict[str, Any]:
+        """Get default configuration"""
+        return {
+            'email': {
+                'smtp_server': 'smtp.gmail.com',
+                'smtp_port': 587,
+                'username': '',
+                'password': '',
+                'from_address': 'event-manager@localhost'
+            },
+            'event_viewer': {
+                'refresh_interval': 30,
+                'max_events': 1000,
+                'max_updates_per_second': 4,
+                'message_cache_size': 4096,
+                'default_log_type': 'System'
+            },
+            'event_manager': {
+                'history_retention': 86400,
+                'history_max_entries': 1000000,
+                'max_rules': 100,
+                'history_directory': 'history',
+                'history_file_format': 'event_history_%Y%m%d.csv',
+                'history_batch_size': 500,
+                'history_flush_interval': 1.0,
+                'action_workers': 4,
+                'action_queue_size': 100,
+                'action_drop_policy': 'drop_newest',
+                'action_rate': 1.0,
+                'action_burst': 5,
+                'action_cooldown': 60,
+                'action_timeout': 300
+            },
+            'collector': {
+                'enabled': False,
+                'hosts': ['localhost'],
+                'logs': ['Application', 'Security', 'System'],
+                'poll_interval': 5,
+                'reorder_window': 5,
+                'max_buffer': 100000,
+                'backlog': 0,
+                'backoff_initial': 1,
+                'backoff_max': 60,
+                'drain_interval_ms': 500
+            },
+            'aggregation': {
+                'window': 60,
+                'max_groups': 10000
+            },
+            'correlation': {
+                'patterns_file': 'config/correlations.yaml',
+                'max_partitions': 100000,
+                'default_within': 300,
+                'timer_resolution': 1
+            },
+            'statistics': {
+                'enabled': True,
+                'path': 'history/statistics.dat',
+                'minutes': 1440,
+                'hours': 168,
+                'days': 90,
+                'save_interval': 60,
+                'refresh_interval': 10,
+                'spike_threshold': 3.0,
+                'spike_min_count': 10
+            },
+            'checkpoint': {
+                'enabled': True,
+                'directory': 'history/state',
+                'snapshot_interval': 300,
+                'journal_interval': 1,
+                'journal_fsync': True
+            },
+            'event_store': {
+                'enabled': True,
+                'path': 'history/events.db',
+                'retention_days': 30,
+                'page_size': 1000
+            },
+            'logging': {
+                'level': 'INFO',
+                'directory': 'logs',
+                'file_retention_days': 30,
+                'max_file_size_mb': 10,
+                'compress_rotated': True
+            },
+            'config': {
+                'watch_interval': 2
+            },
+            'metrics': {
+                'enabled': False,
+                'host': '127.0.0.1',
+                'port': 9464,
+                'snapshot_path': 'logs/metrics.json',
+                'snapshot_interval': 60,
+                'profiler': False
+            },
+            'ui': {
+                'theme': 'default',
+                'language': 'en',
+                'show_system_tray': True,
+                'minimize_to_tray': True
+            }
+        }
+        
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get configuration value by key"""
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.config
+            for k in key.split('.'):
+                if isinstance(value, dict) and k in value:
+                    value = value[k]
+                else:
+                    value = None
+                    break
+            self._cache[key] = value
+        return default if value is None else value
+        
+    def set(self, key: str, value: Any) -> None:
+        """Set configuration value by key"""
+        with self.transaction():
+            keys = key.split('.')
+            current = self.config
+            
+            for k in keys[:-1]:
+                if not isinstance(current.get(k), dict):
+                    current[k] = {}
+                current = current[k]
+                
+            current[keys[-1]] = value
+            self._cache = {}
+            self._dirty = True
+        
+    def update(self, updates: Dict[str, Any]) -> None:
+        """Update multiple configuration values with one write"""
+        with self.transaction():
+            for key, value in updates.items():
+                self.set(key, value)
+            
+    def reset(self) -> None:
+        """Reset configuration to defaults"""
+        with self.transaction():
+            self.config = self.get_default_config()
+            self._cache = {}
+            self._dirty = True
+
+
+_shared: Dict[str, ConfigManager] = {}
+_shared_lock = threading.Lock()
+
+def get_config(config_file: str = 'config/config.yaml') -> ConfigManager:
+    """The ConfigManager shared by every component using config_file"""
+    path = os.path.abspath(config_file)
+    with _shared_lock:
+        if path not in _shared:
+            _shared[path] = ConfigManager(config_file)
+        return _shared[path]
\ No newline at end of file
@@ -1,43 +1,218 @@
-import logging
-import os
-from datetime import datetime
-
-def setup_logger():
-    # Create logs directory if it doesn't exist
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-        
-    # Configure logging
-    log_file = f'logs/app_{datetime.now().strftime("%Y%m%d")}.log'
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
-    
-    # Create logger
-    logger = logging.getLogger('AllEventInOne')
-    return logger
-
-def log_event(logger, event_type, message, details=None):
-    """Log an event with optional details"""
-    if details:
-        logger.info(f"{event_type}: {message} - Details: {details}")
-    else:
-        logger.info(f"{event_type}: {message}")
-
-def log_error(logger, message, error):
-    """Log an error with exception details"""
-    logger.error(f"{message}: {str(error)}", exc_info=True)
-
-def log_warning(logger, message):
-    """Log a warning message"""
-    logger.warning(message)
-
-def log_info(logger, message):
-    """Log an informational message"""
-    logger.info(message) 
\ No newline at end of file
+import atexit
+import glob
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+from datetime import datetime, timedelta
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+
+
+class RotatingLogHandler(logging.handlers.BaseRotatingHandler):
+    """Writes {prefix}_YYYYmmdd.log, rotating at midnight and at max_bytes
+
+    A file that outgrows max_bytes is renamed {prefix}_YYYYmmdd.N.log,
+    N counting up through the day. Finished files are gzipped if
+    compress is set, and files older than retention_days are deleted
+    whenever a file is rotated and at startup.
+    """
+
+    def __init__(self, directory: str = 'logs', prefix: str = 'app', max_bytes: int = 10 << 20,
+                 retention_days: int = 30, compress: bool = True):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.compress = compress
+        self.rollover_at = 0.0
+        self.record_time = 0.0
+        self.size = 0
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(self.path_for(time.time()), 'a', encoding='utf-8', delay=True)
+        self.remove_expired()
+
+    def path_for(self, now: float) -> str:
+        """The file for the day of now; also sets when that day ends"""
+        day = datetime.fromtimestamp(now).date()
+        self.rollover_at = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+        return os.path.join(self.directory, f'{self.prefix}_{day:%Y%m%d}.log')
+
+    def shouldRollover(self, record) -> bool:
+        self.record_time = record.created
+        if record.created >= self.rollover_at:
+            return True
+        # Checked before writing, so a file ends at most one record past the limit
+        return bool(self.max_bytes) and self.stream is not None and self.size >= self.max_bytes
+
+    def emit(self, record) -> None:
+        """Write without flushing; LogListener flushes once the queue is empty"""
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+                self.size = self.stream.tell()
+            message = self.format(record) + self.terminator
+            self.stream.write(message)
+            # max_bytes is in bytes: localized messages take more than one
+            # per character, and text mode writes os.linesep for each \n
+            self.size += len(message) if message.isascii() else len(message.encode(self.encoding))
+            if os.linesep != '\n':
+                self.size += message.count('\n') * (len(os.linesep) - 1)
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        finished = self.baseFilename
+        if self.record_time >= self.rollover_at:
+            # The previous day's file is complete as it stands
+            self.baseFilename = os.path.abspath(self.path_for(self.record_time))
+        else:
+            finished = self.numbered_path(finished)
+            os.replace(self.baseFilename, finished)
+        if self.compress and os.path.exists(finished):
+            self.compress_file(finished)
+        self.remove_expired()
+
+    def numbered_path(self, path: str) -> str:
+        stem = path[:-len('.log')]
+        number = 1
+        while os.path.exists(f'{stem}.{number}.log') or os.path.exists(f'{stem}.{number}.log.gz'):
+            number += 1
+        return f'{stem}.{number}.log'
+
+    @staticmethod
+    def compress_file(path: str) -> None:
+        try:
+            with open(path, 'rb') as source, gzip.open(f'{path}.gz', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.remove(path)
+        except OSError as e:
+            # Logging from the listener would come straight back here
+            print(f"Error compressing log file {path}: {e}")
+
+    def remove_expired(self) -> None:
+        if not self.retention_days:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        current = os.path.abspath(self.baseFilename)
+        for path in glob.glob(os.path.join(self.directory, f'{self.prefix}_*.log*')):
+            try:
+                if os.path.abspath(path) != current and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError as e:
+                print(f"Error removing old log file {path}: {e}")
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records as they are, leaving all formatting to the listener
+
+    The stock QueueHandler formats each message in the calling thread.
+    Records here keep their msg and args until the listener writes them,
+    so callers only pay for creating the record; objects passed as
+    arguments are read when the record is written, not when it was logged.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class LogListener(logging.handlers.QueueListener):
+    """Flushes its handlers when the queue runs empty, not after every record"""
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
+def log_level(name) -> int:
+    level = logging.getLevelName(str(name).upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+def setup_logger(config=None):
+    """Route logging through a queue to a background file and console writer
+
+    Settings come from the logging config section: level (reapplied
+    when the config file changes), directory, max_file_size_mb,
+    file_retention_days and compress_rotated.
+    """
+    global _listener
+    if config is None:
+        from src.utils.config import get_config
+        config = get_config()
+    root = logging.getLogger()
+    root.setLevel(log_level(config.get('logging.level', 'INFO')))
+
+    if _listener is None:
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler = RotatingLogHandler(
+            config.get('logging.directory', 'logs'),
+            'app',
+            int(config.get('logging.max_file_size_mb', 10) * (1 << 20)),
+            config.get('logging.file_retention_days', 30),
+            config.get('logging.compress_rotated', True)
+        )
+        console_handler = logging.StreamHandler()
+        for handler in (file_handler, console_handler):
+            handler.setFormatter(formatter)
+        records = queue.SimpleQueue()
+        _listener = LogListener(records, file_handler, console_handler)
+        _listener.start()
+        # Replaces whatever a logging call made before setup installed
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        root.addHandler(DeferredQueueHandler(records))
+        atexit.register(stop_logger)
+        config.subscribe('logging.level', lambda level: root.setLevel(log_level(level)))
+
+    # Create logger
+    logger = logging.getLogger('AllEventInOne')
+    return logger
+
+
+def stop_logger():
+    """Write out everything queued and close the log files"""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, DeferredQueueHandler):
+            root.removeHandler(handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def log_event(logger, event_type, message, details=None):
+    """Log an event with optional details"""
+    if details:
+        logger.info("%s: %s - Details: %s", event_type, message, details)
+    else:
+        logger.info("%s: %s", event_type, message)
+
+def log_error(logger, message, error):
+    """Log an error with exception details"""
+    logger.error("%s: %s", message, error, exc_info=True)
+
+def log_warning(logger, message):
+    """Log a warning message"""
+    logger.warning(message)
+
+def log_info(logger, message):
+    """Log an informational message"""
+    logger.info(message)
\ No newline at end of file
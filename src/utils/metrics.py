@@ -0,0 +1,325 @@
+"""In-process metrics: counters, gauges and latency histograms
+
+Components ask get_registry() for their metrics when they are created.
+Unless the metrics config section enables them, that is a NullRegistry
+whose metrics do nothing, so instrumented code costs a no-op method
+call. Counters and gauges can also read a function at collection time,
+which keeps counts a component already has off the hot path entirely.
+
+setup_metrics() turns on the real registry and its exporters: Prometheus
+text over HTTP (/metrics, plus /snapshot as JSON and, if enabled,
+/profile?seconds=N with folded stacks for flame graphs) and a JSON
+snapshot file rewritten periodically.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seconds; suits everything from a rule check batch to a command run
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str = '', function: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help = help
+        self.function = function
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class Histogram:
+    """Fixed-bucket histogram, typically of durations in seconds"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str = '', buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        position = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def get(self) -> dict:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, buckets = 0, []
+        for bound, bucket in zip(self.bounds, counts):
+            cumulative += bucket
+            buckets.append((bound, cumulative))
+        return {'buckets': buckets, 'sum': total, 'count': count}
+
+
+class _NullMetric:
+    """Stands in for every metric while metrics are disabled"""
+    kind = None
+    value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    @contextmanager
+    def time(self):
+        yield
+
+    def get(self):
+        return 0
+
+
+NULL_METRIC = _NullMetric()
+
+
+class NullRegistry:
+    enabled = False
+
+    def counter(self, name, help='', function=None):
+        return NULL_METRIC
+
+    def gauge(self, name, help='', function=None):
+        return NULL_METRIC
+
+    def histogram(self, name, help='', buckets=DEFAULT_BUCKETS):
+        return NULL_METRIC
+
+    def snapshot(self) -> dict:
+        return {}
+
+    def prometheus_text(self) -> str:
+        return ''
+
+
+class MetricsRegistry:
+    """Metrics by name; asking for an existing name returns that metric"""
+    enabled = True
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **options)
+            elif not isinstance(metric, cls) or metric.kind != cls.kind:
+                raise ValueError(f"Metric {name} is already a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str = '', function: Optional[Callable[[], float]] = None) -> Counter:
+        metric = self._get(Counter, name, help)
+        if function is not None:
+            # A newer component instance takes over the name
+            metric.function = function
+        return metric
+
+    def gauge(self, name: str, help: str = '', function: Optional[Callable[[], float]] = None) -> Gauge:
+        metric = self._get(Gauge, name, help)
+        if function is not None:
+            metric.function = function
+        return metric
+
+    def histogram(self, name: str, help: str = '', buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def collect(self) -> List[Tuple[object, object]]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        collected = []
+        for metric in metrics:
+            try:
+                collected.append((metric, metric.get()))
+            except Exception as e:
+                logging.error(f"Error collecting metric {metric.name}: {e}")
+        return collected
+
+    def snapshot(self) -> dict:
+        return {
+            'time': time.time(),
+            'metrics': {metric.name: value for metric, value in self.collect()},
+        }
+
+    def prometheus_text(self) -> str:
+        lines = []
+        for metric, value in self.collect():
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if metric.kind == 'histogram':
+                for bound, count in value['buckets']:
+                    lines.append(f'{metric.name}_bucket{{le="{bound:g}"}} {count}')
+                lines.append(f'{metric.name}_bucket{{le="+Inf"}} {value["count"]}')
+                lines.append(f"{metric.name}_sum {value['sum']:g}")
+                lines.append(f"{metric.name}_count {value['count']}")
+            else:
+                lines.append(f"{metric.name} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+    def write_snapshot(self, path: str) -> None:
+        """Write snapshot() as JSON, replacing the file atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(temp_path, path)
+
+
+class SamplingProfiler:
+    """Samples every thread's stack to find where time goes
+
+    Output is in the folded format flame graph tools read: one line per
+    distinct stack, frames root first separated by ';', then the number
+    of samples it was seen in.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+
+    def sample(self, seconds: float) -> StackCounter:
+        stacks = StackCounter()
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                stacks[';'.join(reversed(frames))] += 1
+            time.sleep(self.interval)
+        return stacks
+
+    def folded(self, seconds: float) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.sample(seconds).most_common())
+
+    def dump(self, path: str, seconds: float) -> None:
+        with open(path, 'w') as f:
+            f.write(self.folded(seconds))
+
+
+class MetricsExporter:
+    """The HTTP endpoint and periodic snapshot file set up from config"""
+
+    def __init__(self, registry: MetricsRegistry, server=None,
+                 snapshot_path: Optional[str] = None, snapshot_interval: float = 60.0):
+        self.registry = registry
+        self.server = server
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._stopping = threading.Event()
+        self._thread = None
+        if snapshot_path and snapshot_interval:
+            self._thread = threading.Thread(target=self._run, name='MetricsSnapshot', daemon=True)
+            self._thread.start()
+        if server is not None:
+            server.start()
+
+    def _run(self):
+        while not self._stopping.wait(self.snapshot_interval):
+            self.write_snapshot()
+
+    def write_snapshot(self) -> None:
+        try:
+            self.registry.write_snapshot(self.snapshot_path)
+        except Exception as e:
+            logging.error(f"Error writing metrics snapshot: {e}")
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            # One last snapshot with the final counts
+            self.write_snapshot()
+        if self.server is not None:
+            self.server.close()
+
+
+_registry = NullRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+def setup_metrics(config) -> Optional[MetricsExporter]:
+    """Enable metrics if the metrics config section says so
+
+    Must run before the instrumented components are created, as they
+    take their metrics from the registry then.
+    """
+    global _registry
+    if not config.get('metrics.enabled', False):
+        return None
+    _registry = MetricsRegistry()
+    server = None
+    port = config.get('metrics.port', 9464)
+    if port:
+        # http.server is only imported when the endpoint is wanted
+        from src.utils.metrics_server import MetricsServer
+        profiler = SamplingProfiler() if config.get('metrics.profiler', False) else None
+        try:
+            server = MetricsServer(_registry, config.get('metrics.host', '127.0.0.1'), port, profiler)
+        except OSError as e:
+            logging.error(f"Error starting metrics endpoint on port {port}: {e}")
+    return MetricsExporter(
+        _registry,
+        server,
+        config.get('metrics.snapshot_path', 'logs/metrics.json'),
+        config.get('metrics.snapshot_interval', 60)
+    )
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""HTTP endpoint for the metrics registry
+
+Kept apart from src.utils.metrics so http.server is only imported when
+setup_metrics() starts the endpoint.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from src.utils.metrics import MetricsRegistry, SamplingProfiler
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        server = self.server
+        if url.path == '/metrics':
+            body, content_type = server.registry.prometheus_text(), 'text/plain; version=0.0.4'
+        elif url.path == '/snapshot':
+            body, content_type = json.dumps(server.registry.snapshot()), 'application/json'
+        elif url.path == '/profile' and server.profiler is not None:
+            query = parse_qs(url.query)
+            try:
+                seconds = min(float(query.get('seconds', ['10'])[0]), 300.0)
+            except ValueError:
+                self.send_error(400, 'seconds must be a number')
+                return
+            body, content_type = server.profiler.folded(seconds), 'text/plain'
+        else:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9464,
+                 profiler: Optional[SamplingProfiler] = None):
+        super().__init__((host, port), _Handler)
+        self.registry = registry
+        self.profiler = profiler
+        self._thread = threading.Thread(target=self.serve_forever, name='MetricsServer', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self.shutdown()
+        self.server_close()
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""Startup profiling: wall time per phase and per imported module
+
+Started by `run.py --profile-startup`. While a profiler is active,
+phase() blocks record how long each part of startup took and every
+module imported is timed through a sys.meta_path hook. With no active
+profiler phase() costs one global lookup, so the calls stay in place.
+"""
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+_active: Optional['StartupProfiler'] = None
+
+
+class _TimedLoader:
+    """Wraps a module loader to time create_module and exec_module
+
+    Extension modules do their work in create_module, Python modules in
+    exec_module; the two are added up.
+    """
+
+    def __init__(self, loader, profiler: 'StartupProfiler', name: str):
+        self.loader = loader
+        self.profiler = profiler
+        self.name = name
+        self.own = 0.0
+        self.total = 0.0
+
+    def __getattr__(self, attr):
+        return getattr(self.loader, attr)
+
+    def _timed(self, call, arg):
+        stack = self.profiler._stack
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return call(arg)
+        finally:
+            total = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += total
+            self.own += total - nested
+            self.total += total
+
+    def create_module(self, spec):
+        return self._timed(self.loader.create_module, spec)
+
+    def exec_module(self, module):
+        try:
+            self._timed(self.loader.exec_module, module)
+        finally:
+            self.profiler.imports.append((self.name, self.own, self.total))
+
+
+class _ImportTimer:
+    """Meta path finder that asks the others and wraps what they find"""
+
+    def __init__(self, profiler: 'StartupProfiler'):
+        self.profiler = profiler
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self.profiler, name)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float, float]] = []  # name, offset, duration
+        self.imports: List[Tuple[str, float, float]] = []  # name, self, inclusive
+        self._stack: List[float] = []
+        self._finder = _ImportTimer(self)
+
+    def install(self) -> None:
+        sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self) -> None:
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.started, time.perf_counter() - start))
+
+    def mark(self, name: str) -> None:
+        """Record a point in time, such as the window being shown"""
+        self.phases.append((name, time.perf_counter() - self.started, 0.0))
+
+    def report(self, top: int = 20) -> str:
+        lines = [f"Startup: {(time.perf_counter() - self.started) * 1000:.0f} ms total"]
+        for name, offset, duration in sorted(self.phases, key=lambda item: item[1]):
+            if duration:
+                lines.append(f"  {offset * 1000:8.1f} ms  {name}: {duration * 1000:.1f} ms")
+            else:
+                lines.append(f"  {offset * 1000:8.1f} ms  {name}")
+        lines.append(f"Imports: {len(self.imports)} modules, "
+                     f"{sum(own for _, own, _ in self.imports) * 1000:.0f} ms")
+        lines.append(f"  {'self ms':>9} {'total ms':>9}  module")
+        for name, own, inclusive in sorted(self.imports, key=lambda item: item[1], reverse=True)[:top]:
+            lines.append(f"  {own * 1000:9.1f} {inclusive * 1000:9.1f}  {name}")
+        return '\n'.join(lines)
+
+
+def start_profiling() -> StartupProfiler:
+    global _active
+    _active = StartupProfiler()
+    _active.install()
+    return _active
+
+
+def stop_profiling() -> Optional[StartupProfiler]:
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.uninstall()
+    return profiler
+
+
+def active_profiler() -> Optional[StartupProfiler]:
+    return _active
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block as a startup phase if profiling, else do nothing"""
+    if _active is None:
+        yield
+    else:
+        with _active.phase(name):
+            yield
+
+
+def mark(name: str) -> None:
+    if _active is not None:
+        _active.mark(name)
\ No newline at end of file
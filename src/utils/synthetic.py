@@ -0,0 +1,196 @@
+"""Deterministic synthetic event logs for benchmarks and load tests
+
+SyntheticEvents produces EventRecords shaped like pywin32's
+PyEventLogRecord, so everything downstream of the event source can be
+exercised on any platform. The same seed and settings always give the
+same events. Events come from a pool of (source, event id) keys, each
+with a fixed type and category as on Windows. Keys are drawn from a
+Zipf-like distribution: with id_skew 0 every key is equally likely, and
+around 1 a handful of keys make up most of the log. Bursts repeat one
+key many times in quick succession, the way a failing service or a
+logon storm fills a real log.
+"""
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.event_viewer.event_source import EventRecord
+
+DEFAULT_SOURCES = (
+    'Security-Auditing', 'Service Control Manager', 'Application Error',
+    'DNS Client', 'Schannel', 'Kernel-Power', 'Winlogon', 'Group Policy',
+    'Disk', 'Tcpip', 'MsiInstaller', 'Windows Update Agent',
+)
+
+# Roughly the mix of a busy server's System and Security logs
+DEFAULT_TYPE_WEIGHTS = {1: 4, 2: 8, 4: 70, 8: 14, 16: 4}
+
+WORDS = (
+    'logon', 'failure', 'denied', 'service', 'started', 'stopped', 'timeout',
+    'svchost.exe', 'lsass.exe', 'CONTOSO', 'WORKSTATION7', 'administrator',
+    '0xC000006D', '0x0', 'NTLM', 'Kerberos', 'running', 'state', 'driver',
+    'network', 'refused', 'update', 'installed', 'certificate', 'expired',
+)
+
+# Rule conditions for rules(conditions=True); {word} is one of WORDS
+CONDITIONS = (
+    'type in [Error, Warning]',
+    'message contains "{word}"',
+    'message ~ /svc(host|dns)|{word}/i and not type = Information',
+    'category > 4 or message contains {word}',
+    'not (type = Information and category = 0)',
+)
+
+# Records are generated this many at a time, drawing keys in bulk
+CHUNK_SIZE = 4096
+
+
+class SyntheticEvents:
+    """Deterministic generator of pywin32-shaped event records
+
+    sources is a count or a list of names; each source gets
+    ids_per_source event ids starting at first_id. rate is the mean
+    events per second of simulated time, and inside a burst events
+    arrive burst_speedup times faster. message_size bounds the total
+    length of an event's string inserts, which are drawn from a pool of
+    distinct_messages pregenerated tuples.
+    """
+
+    def __init__(self, seed: int = 1, sources=DEFAULT_SOURCES, ids_per_source: int = 40,
+                 first_id: int = 1000, id_skew: float = 1.1,
+                 type_weights: Optional[Dict[int, float]] = None,
+                 message_size: Tuple[int, int] = (20, 200), distinct_messages: int = 4096,
+                 burst_probability: float = 0.001, burst_length: Tuple[int, int] = (50, 500),
+                 burst_speedup: float = 100.0, rate: float = 1000.0,
+                 start: Optional[datetime] = None, computers: int = 1, first_record: int = 1):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if isinstance(sources, int):
+            sources = [DEFAULT_SOURCES[i] if i < len(DEFAULT_SOURCES) else f'Source{i}'
+                       for i in range(sources)]
+        self.sources = list(sources)
+        self.id_skew = id_skew
+        self.burst_probability = burst_probability
+        self.burst_length = burst_length
+        self.burst_speedup = burst_speedup
+        self.rate = rate
+        self.time = start or datetime(2024, 1, 1)
+        self.next_record = first_record
+        self._drawn: List[Tuple[str, int]] = []
+        self._burst_key = None
+        self._burst_left = 0
+        self.computers = ['localhost'] if computers <= 1 else [f'HOST{i:03d}' for i in range(computers)]
+
+        type_weights = type_weights or DEFAULT_TYPE_WEIGHTS
+        types, weights = list(type_weights), list(type_weights.values())
+        self.keys: List[Tuple[str, int]] = [
+            (source, first_id + i * ids_per_source + j)
+            for i, source in enumerate(self.sources) for j in range(ids_per_source)
+        ]
+        # Popularity must not follow source order, or one source would
+        # own every popular id
+        self.rng.shuffle(self.keys)
+        self.key_types = {key: self.rng.choices(types, weights)[0] for key in self.keys}
+        self.key_categories = {key: self.rng.randrange(16) for key in self.keys}
+        self.cum_weights = list(accumulate(1.0 / (rank + 1) ** id_skew for rank in range(len(self.keys))))
+        self.messages = [self.make_inserts(self.rng.randint(*message_size))
+                         for _ in range(max(distinct_messages, 1))]
+
+    def make_inserts(self, size: int) -> Tuple[str, ...]:
+        """A tuple of inserts whose lengths add up to about size characters"""
+        rng = self.rng
+        inserts, length = [], 0
+        while length < size:
+            count = rng.randint(1, 6)
+            insert = ' '.join(rng.choice(WORDS) for _ in range(count))
+            if rng.random() < 0.3:
+                insert = f'{insert} {rng.randrange(100000)}'
+            inserts.append(insert[:size - length] if length + len(insert) > size else insert)
+            length += len(inserts[-1])
+        return tuple(inserts)
+
+    def events(self, count: int) -> Iterator[EventRecord]:
+        """Yield the next count events; the stream continues across calls"""
+        rng = self.rng
+        keys, cum_weights = self.keys, self.cum_weights
+        messages, computers = self.messages, self.computers
+        key_types, key_categories = self.key_types, self.key_categories
+        single_host = len(computers) == 1
+        mean_gap = 1.0 / self.rate
+        for _ in range(count):
+            if not self._drawn:
+                # Drawn a fixed chunk at a time, so a stream is the same
+                # however it is split into calls
+                self._drawn = rng.choices(keys, cum_weights=cum_weights, k=CHUNK_SIZE)
+                self._drawn.reverse()
+            key = self._drawn.pop()
+            gap = rng.expovariate(1.0) * mean_gap
+            if self._burst_left:
+                key = self._burst_key
+                self._burst_left -= 1
+                gap /= self.burst_speedup
+            elif rng.random() < self.burst_probability:
+                self._burst_key, self._burst_left = key, rng.randint(*self.burst_length)
+            self.time += timedelta(seconds=gap)
+            record = EventRecord(key[0], key[1], key_types[key],
+                                 messages[rng.randrange(len(messages))],
+                                 self.time, self.next_record, key_categories[key],
+                                 computers[0] if single_host else rng.choice(computers))
+            self.next_record += 1
+            yield record
+
+    def batches(self, count: int, size: int = 500) -> Iterator[List[EventRecord]]:
+        """The next count events in lists of up to size, as a reader delivers them"""
+        batch = []
+        for event in self.events(count):
+            batch.append(event)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def rules(self, count: int, matching: float = 0.5, conditions: bool = False,
+              action: str = 'Log') -> List[dict]:
+        """Rules for RuleEngine, about `matching` of them on keys in the log
+
+        The rest name ids the generator never produces. Event ids mix
+        single ids, lists and ranges, with a wildcard in one rule of
+        twenty; with conditions, every other rule also gets a condition
+        on type, category or message.
+        """
+        rng = random.Random(self.seed + 1)
+        rules = []
+        for i in range(count):
+            if rng.random() < matching:
+                source, event_id = rng.choice(self.keys)
+            else:
+                source, event_id = rng.choice(self.sources), 60000 + i
+            if i % 20 == 19:
+                spec = '*'
+            elif i % 3 == 0:
+                spec = str(event_id)
+            elif i % 3 == 1:
+                spec = f'{event_id}, {event_id + 7}'
+            else:
+                spec = f'{event_id - rng.randrange(5)}-{event_id + rng.randrange(5)}'
+            rule = {
+                'name': f'rule{i}',
+                'event_id': spec,
+                'source': source,
+                'action': action,
+                'action_params': '',
+                'occurrence_count': 5 + i % 20,
+                'time_window': 1 + i % 10,
+            }
+            if conditions and i % 2:
+                rule['condition'] = CONDITIONS[i // 2 % len(CONDITIONS)].format(word=rng.choice(WORDS))
+            rules.append(rule)
+        return rules
+
+
+
+def generate(count: int, seed: int = 1, **options) -> List[EventRecord]:
+    """A list of count events from a fresh SyntheticEvents(seed, **options)"""
+    return list(SyntheticEvents(seed, **options).events(count))
\ No newline at end of file
@@ -0,0 +1,103 @@
+import sys
+import threading
+
+import pytest
+
+from src.event_manager.action_executor import (DROP_NEWEST, DROP_OLDEST, ActionExecutor, ActionResult,
+                                               TokenBucket)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_a_burst_then_the_sustained_rate():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.now = 0.5
+    assert [bucket.try_acquire() for _ in range(2)] == [True, False]
+
+
+@pytest.fixture
+def blocked():
+    """Executors whose commands wait until release is set, so the queue fills"""
+    release = threading.Event()
+    started = threading.Event()
+    executors = []
+
+    def make(**options):
+        executor = ActionExecutor(max_workers=1, clock=options.pop('clock', Clock()), **options)
+
+        def execute(rule_name, command):
+            started.set()
+            release.wait(5)
+            return ActionResult(rule_name, command, 0, 0, 0, None)
+        executor.execute = execute
+        executors.append(executor)
+        return executor
+
+    make.started = started
+    yield make
+    release.set()
+    for executor in executors:
+        executor.close(5)
+
+
+def test_rule_cooldown_suppresses_repeats(blocked):
+    clock = Clock()
+    executor = blocked(rate=0, cooldown=60, clock=clock)
+    assert executor.submit('rule', 'cmd')
+    assert not executor.submit('rule', 'cmd')
+    assert executor.submit('other', 'cmd')
+    clock.now = 60
+    assert executor.submit('rule', 'cmd')
+    assert executor.submit('rule', 'cmd', cooldown=0)
+    assert executor.stats()['suppressed'] == 1
+
+
+def test_shared_rate_limit_turns_commands_away(blocked):
+    executor = blocked(rate=1, burst=2, cooldown=0)
+    assert [executor.submit(f'rule{i}', 'cmd') for i in range(3)] == [True, True, False]
+    assert executor.stats()['rate_limited'] == 1
+
+
+@pytest.mark.parametrize('policy, kept', [(DROP_NEWEST, ['b', 'c']), (DROP_OLDEST, ['c', 'd'])])
+def test_full_queue_drops_per_policy(blocked, policy, kept):
+    executor = blocked(max_queue=2, drop_policy=policy, rate=0, cooldown=0)
+    executor.submit('a', 'cmd')
+    assert blocked.started.wait(5)
+    results = [executor.submit(name, 'cmd') for name in 'bcd']
+    assert results == [True, True, policy == DROP_OLDEST]
+    assert [item[0] for item in executor._queue] == kept
+    assert executor.stats()['dropped'] == 1
+
+
+def test_unknown_drop_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ActionExecutor(drop_policy='drop_random')
+
+
+def test_commands_run_and_report_exit_codes():
+    done = []
+    executor = ActionExecutor(max_workers=2, rate=0, cooldown=0, on_complete=done.append)
+    executor.submit('ok', f'"{sys.executable}" -c "pass"')
+    executor.submit('fails', f'"{sys.executable}" -c "raise SystemExit(3)"')
+    executor.close(30)
+    assert sorted((result.rule_name, result.exit_code) for result in done) == [('fails', 3), ('ok', 0)]
+    assert executor.stats()['completed'] == 1 and executor.stats()['failed'] == 1
+
+
+def test_dropped_command_spends_no_token(blocked):
+    clock = Clock()
+    executor = blocked(max_queue=1, rate=1, burst=3, cooldown=0, clock=clock)
+    executor.submit('a', 'cmd')
+    assert blocked.started.wait(5)
+    assert executor.submit('b', 'cmd')
+    assert not executor.submit('c', 'cmd')
+    assert executor.stats()['dropped'] == 1
+    assert executor.bucket.tokens == 1
\ No newline at end of file
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from src.event_viewer.aggregator import EventAggregator, event_count
+from src.event_viewer.event_source import EventRecord
+
+START = datetime(2026, 10, 17, 12, 0, 0)
+
+
+def at(seconds, user='bob', event_id=4625):
+    return EventRecord('Security', event_id, 16, (user,), START + timedelta(seconds=seconds))
+
+
+def summary(snapshots):
+    return [(s.StringInserts[0], s.Count, s.New, (s.LastSeen - START).seconds, s.GroupId)
+            for s in snapshots]
+
+
+def test_identical_events_collapse_into_one_snapshot_per_group():
+    aggregator = EventAggregator(window=60)
+    snapshots = aggregator.add([at(0), at(1), at(2, 'alice'), at(5), at(3, 'bob', 4624)])
+    assert summary(snapshots) == [('bob', 3, 3, 5, 1), ('alice', 1, 1, 2, 2), ('bob', 1, 1, 3, 3)]
+    assert [event_count(s) for s in snapshots] == [3, 1, 1]
+    assert (aggregator.events_in, aggregator.rows_out) == (5, 3)
+
+
+def test_later_batches_update_the_same_group_until_the_window_ends():
+    aggregator = EventAggregator(window=60)
+    aggregator.add([at(0), at(10)])
+    assert summary(aggregator.add([at(30)])) == [('bob', 3, 1, 30, 1)]
+    assert summary(aggregator.add([at(61), at(62)])) == [('bob', 2, 2, 62, 2)]
+
+
+def test_oldest_groups_are_forgotten_beyond_max_groups():
+    aggregator = EventAggregator(window=60, max_groups=2)
+    aggregator.add([at(0, 'alice'), at(1, 'bob'), at(2, 'carol')])
+    assert list(group.id for group in aggregator.groups.values()) == [2, 3]
+    assert summary(aggregator.add([at(3, 'alice')])) == [('alice', 1, 1, 3, 4)]
+
+
+def test_a_zero_window_passes_events_through():
+    aggregator = EventAggregator(window=0)
+    events = [at(0), at(0)]
+    assert aggregator.add(events) == events
+    assert [event_count(event) for event in events] == [1, 1]
\ No newline at end of file
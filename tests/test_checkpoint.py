@@ -0,0 +1,86 @@
+from collections import namedtuple
+from datetime import datetime
+
+from src.event_manager.checkpoint import RuleStateCheckpoint
+from src.event_manager.occurrence import OccurrenceTracker
+
+Collected = namedtuple('Collected', ['Host', 'LogType', 'RecordNumber', 'TimeGenerated'])
+
+
+def checkpoint(directory):
+    tracker = OccurrenceTracker()
+    state = RuleStateCheckpoint(tracker, str(directory), journal_fsync=False)
+    return tracker, state
+
+
+def advance(state, host, log_type, record):
+    state.advance([Collected(host, log_type, record, datetime.fromtimestamp(1_800_000_000 + record))])
+
+
+def test_snapshot_and_journal_round_trip(tmp_path):
+    tracker, state = checkpoint(tmp_path)
+    state.restore()
+    tracker.record('Security_4625', count=3)
+    advance(state, 'host1', 'Security', 10)
+    state.save()
+    tracker.record('Security_4625')
+    tracker.record('System_7036', count=2)
+    advance(state, 'host1', 'Security', 12)
+    advance(state, 'host2', 'System', 5)
+    state.flush()
+    state.journal.close()
+
+    restored, state = checkpoint(tmp_path)
+    cursors = state.restore()
+    assert restored.count('Security_4625', 3600) == 4
+    assert restored.count('System_7036', 3600) == 2
+    assert restored.total == 6
+    assert cursors == {('host1', 'Security'): (12, 1_800_000_012.0),
+                       ('host2', 'System'): (5, 1_800_000_005.0)}
+    state.close()
+
+
+def test_torn_journal_block_is_cut_off(tmp_path):
+    tracker, state = checkpoint(tmp_path)
+    state.restore()
+    tracker.record('kept')
+    state.flush()
+    tracker.record('torn', count=5)
+    state.flush()
+    state.journal.close()
+    journal = tmp_path / 'rules.journal'
+    data = bytearray(journal.read_bytes())
+    data[-1] ^= 0xff
+    journal.write_bytes(bytes(data))
+
+    restored, state = checkpoint(tmp_path)
+    state.restore()
+    assert 'kept' in restored and 'torn' not in restored
+    # Journaling carries on after the last good block
+    restored.record('after')
+    state.flush()
+    state.journal.close()
+    again, state = checkpoint(tmp_path)
+    state.restore()
+    assert set(again.windows) == {'kept', 'after'}
+    state.close()
+
+
+def test_corrupt_snapshot_is_rejected_with_its_journal(tmp_path):
+    tracker, state = checkpoint(tmp_path)
+    state.restore()
+    tracker.record('key', count=2)
+    advance(state, 'host1', 'System', 1)
+    state.save()
+    tracker.record('key')
+    state.flush()
+    state.journal.close()
+    snapshot = tmp_path / 'rules.snapshot'
+    data = bytearray(snapshot.read_bytes())
+    data[len(data) // 2] ^= 0xff
+    snapshot.write_bytes(bytes(data))
+
+    restored, state = checkpoint(tmp_path)
+    assert state.restore() == {}
+    assert len(restored) == 0 and restored.total == 0
+    state.close()
\ No newline at end of file
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+
+from src.collector.collector import Collector, ReorderBuffer
+from src.event_viewer.event_source import EventRecord, MemoryEventSource
+
+START = datetime(2020, 1, 1, 12, 0, 0)
+KEY = ('host', 'System')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def at(seconds, event_id=0):
+    return EventRecord('Svc', event_id, TimeGenerated=START + timedelta(seconds=seconds))
+
+
+def stamp(seconds):
+    return (START + timedelta(seconds=seconds)).timestamp()
+
+
+def seconds(events):
+    return [(event.TimeGenerated - START).total_seconds() for event in events]
+
+
+def test_buffer_merges_sources_up_to_the_watermark():
+    buffer = ReorderBuffer(window=60, clock=Clock())
+    buffer.add_source('a')
+    buffer.add_source('b')
+    buffer.push('a', [at(1), at(4)])
+    assert buffer.pop_ready() == []
+    buffer.push('b', [at(2), at(3)])
+    assert seconds(buffer.pop_ready()) == [1, 2, 3]
+    buffer.caught_up('b', stamp(10))
+    assert seconds(buffer.pop_ready()) == [4]
+
+
+def test_buffer_releases_events_held_back_by_a_silent_source():
+    clock = Clock()
+    buffer = ReorderBuffer(window=5, clock=clock)
+    buffer.add_source('a')
+    buffer.add_source('silent')
+    buffer.push('a', [at(0)])
+    clock.now = 4
+    buffer.push('a', [at(2)])
+    assert buffer.pop_ready() == []
+    # Waited the whole window since it arrived
+    clock.now = 5
+    assert seconds(buffer.pop_ready()) == [0]
+    # More than the window older than the newest event
+    buffer.push('a', [at(8)])
+    assert seconds(buffer.pop_ready()) == [2]
+    buffer.push('silent', [at(1)])
+    assert buffer.late == {'a': 0, 'silent': 1}
+
+
+class FlakySource(MemoryEventSource):
+    """MemoryEventSource that fails while down, like a host gone away"""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+
+    def record_range(self):
+        if self.down:
+            raise OSError('The RPC server is unavailable')
+        return super().record_range()
+
+
+def fill(source, first, count):
+    for i in range(first, first + count):
+        source.append(at(i, i))
+
+
+def run_until(collector, count, on_deliver=None):
+    """Run the reader on this thread until count events have been delivered"""
+    reader = collector.readers[KEY]
+    delivered = []
+    deliver = collector.deliver
+
+    def record(key, events):
+        deliver(key, events)
+        delivered.extend(event.EventID for event in events)
+        if on_deliver is not None:
+            on_deliver(delivered)
+        if len(delivered) >= count:
+            reader.stop()
+    collector.deliver = record
+    reader.run()
+    return delivered
+
+
+def test_reader_backs_off_doubling_up_to_the_cap_then_resets():
+    source = MemoryEventSource()
+    fill(source, 0, 3)
+    delays = []
+
+    def factory(host, log_type):
+        delays.append(collector.readers[KEY].retry_delay)
+        if len(delays) <= 4:
+            raise OSError('The RPC server is unavailable')
+        return source
+
+    collector = Collector(factory, ['host'], ['System'], backlog=10,
+                          backoff_initial=0.01, backoff_max=0.04)
+    assert run_until(collector, 3) == [0, 1, 2]
+    reader = collector.readers[KEY]
+    assert delays == [0.0, 0.01, 0.02, 0.04, 0.04]
+    assert reader.failures == 4
+    assert reader.retry_delay == 0.0 and reader.last_error is None
+    assert [event.EventID for event in collector.drain()] == [0, 1, 2]
+
+
+def test_reader_reopens_a_failed_source_and_resumes_after_its_cursor():
+    source = FlakySource()
+    fill(source, 0, 3)
+    opened = []
+
+    def factory(host, log_type):
+        opened.append(True)
+        source.down = False
+        return source
+
+    def fail_once(delivered):
+        if len(delivered) == 3:
+            fill(source, 3, 2)
+            source.down = True
+
+    collector = Collector(factory, ['host'], ['System'], poll_interval=0, backlog=10,
+                          backoff_initial=0.01)
+    assert run_until(collector, 5, fail_once) == [0, 1, 2, 3, 4]
+    reader = collector.readers[KEY]
+    assert len(opened) == 2
+    assert reader.failures == 1 and reader.retry_delay == 0.0
\ No newline at end of file
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+import yaml
+
+from src.utils import config as config_module
+from src.utils.config import ConfigManager
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'config' / 'config.yaml')
+
+
+@pytest.fixture
+def config(path):
+    return ConfigManager(path)
+
+
+def on_disk(path):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def test_missing_file_is_created_with_the_defaults(config, path):
+    assert on_disk(path) == config.get_default_config()
+    assert config.get('event_manager.action_rate') == 1.0
+    assert config.get('event_manager.missing', 7) == 7
+
+
+def test_transaction_writes_once_and_notifies_after(config, path, monkeypatch):
+    replaced = []
+    replace = os.replace
+    monkeypatch.setattr(config_module.os, 'replace',
+                        lambda *args: (replaced.append(args), replace(*args)))
+    seen = []
+    config.subscribe('event_manager.action_rate', seen.append)
+    with config.transaction():
+        config.set('event_manager.action_rate', 2.0)
+        config.set('event_manager.action_burst', 10)
+        assert seen == [] and replaced == []
+    assert len(replaced) == 1
+    assert seen == [2.0]
+    assert on_disk(path)['event_manager']['action_burst'] == 10
+
+
+def test_transaction_rolls_back_when_the_block_raises(config, path):
+    seen = []
+    config.subscribe('event_manager.action_rate', seen.append)
+    with pytest.raises(RuntimeError):
+        with config.transaction():
+            config.set('event_manager.action_rate', 2.0)
+            config.set('new.key', 'value')
+            raise RuntimeError
+    assert config.get('event_manager.action_rate') == 1.0
+    assert config.get('new.key') is None
+    assert on_disk(path) == config.get_default_config()
+    assert seen == []
+
+
+def test_failed_save_leaves_the_file_as_it_was(config, path, monkeypatch):
+    def dump(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(config_module.yaml, 'dump', dump)
+    config.set('event_manager.action_rate', 2.0)
+    assert on_disk(path) == config.get_default_config()
+    assert os.listdir(os.path.dirname(path)) == ['config.yaml']
+
+
+def test_check_for_changes_reloads_an_edited_file(config, path):
+    seen = []
+    config.subscribe('event_manager.action_rate', seen.append)
+    config.subscribe('ui.theme', seen.append)
+    assert not config.check_for_changes()
+    edited = config.get_default_config()
+    edited['event_manager']['action_rate'] = 0.5
+    with open(path, 'w') as f:
+        yaml.safe_dump(edited, f)
+    # Make sure the mtime differs even on a coarse filesystem clock
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert config.check_for_changes()
+    assert config.get('event_manager.action_rate') == 0.5
+    assert seen == [0.5]
+    assert not config.check_for_changes()
+
+
+def test_unsubscribed_callbacks_are_not_called(config):
+    seen = []
+    config.subscribe('ui.theme', seen.append)
+    config.set('ui.theme', 'dark')
+    config.unsubscribe(seen.append)
+    config.set('ui.theme', 'light')
+    assert seen == ['dark']
\ No newline at end of file
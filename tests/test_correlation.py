@@ -0,0 +1,124 @@
+import pytest
+
+from src.event_manager.correlation import CorrelationEngine, TimerWheel
+from src.event_manager.rule_compiler import RuleSyntaxError
+from src.event_viewer.event_source import EventRecord
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+FAILURES_THEN_LOGON = {
+    'name': 'logon after failures', 'partition': 0, 'within': 120,
+    'steps': [{'source': 'Security', 'event_id': 4625, 'count': 3},
+              {'source': 'Security', 'event_id': 4624}],
+}
+
+STOPPED_NOT_RESTARTED = {
+    'name': 'not restarted', 'partition': 0,
+    'steps': [{'source': 'SCM', 'event_id': 7036, 'condition': 'message contains stopped'},
+              {'source': 'SCM', 'event_id': 7036, 'condition': 'message contains running', 'absent': 60}],
+}
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def make(tmp_path, clock):
+    def make(*patterns, **options):
+        engine = CorrelationEngine(lambda rule, event: engine.fired.append((rule['name'], event)),
+                                   str(tmp_path / 'correlations.yaml'), clock=clock, **options)
+        engine.fired = []
+        for pattern in patterns:
+            engine.add_pattern(pattern)
+        return engine
+    return make
+
+
+def security(event_id, user):
+    return EventRecord('Security', event_id, StringInserts=(user,))
+
+
+def scm(state, service='spooler'):
+    return EventRecord('SCM', 7036, StringInserts=(service, state))
+
+
+def test_timer_wheel_fires_due_items_never_early():
+    wheel = TimerWheel(resolution=1, slots=8)
+    wheel.schedule(1.5, 'a')
+    wheel.schedule(3, 'b')
+    wheel.schedule(20, 'far')
+    assert len(wheel) == 3
+    assert wheel.advance(1.9) == []
+    assert wheel.advance(2) == ['a']
+    assert wheel.advance(3) == ['b']
+    # 'far' shares a slot with tick 4 but is two turns of the wheel away
+    assert wheel.advance(19.5) == []
+    assert wheel.advance(20) == ['far']
+    assert len(wheel) == 0
+
+
+def test_steps_match_in_order_per_partition(make):
+    engine = make(FAILURES_THEN_LOGON)
+    for event in [security(4625, 'bob'), security(4625, 'bob'), security(4624, 'bob'),
+                  security(4625, 'alice'), security(4625, 'bob')]:
+        engine.check_event(event)
+    assert engine.fired == []
+    logon = security(4624, 'BOB')
+    engine.check_event(logon)
+    assert engine.fired == [('logon after failures', logon)]
+    assert list(engine.patterns[0].partials) == ['alice']
+
+
+def test_partial_match_expires_after_within(make, clock):
+    engine = make(FAILURES_THEN_LOGON)
+    for _ in range(3):
+        engine.check_event(security(4625, 'bob'))
+    clock.now = 121
+    engine.expire()
+    assert engine.patterns[0].expired == 1
+    engine.check_event(security(4624, 'bob'))
+    assert engine.fired == []
+
+
+def test_absent_step_fires_when_nothing_comes(make, clock):
+    engine = make(STOPPED_NOT_RESTARTED)
+    engine.check_event(scm('stopped'))
+    clock.now = 30
+    engine.check_event(scm('running'))
+    clock.now = 100
+    engine.expire()
+    assert engine.fired == []
+    stopped = scm('stopped')
+    engine.check_event(stopped)
+    clock.now = 159
+    engine.expire()
+    assert engine.fired == []
+    clock.now = 161
+    engine.expire()
+    assert engine.fired == [('not restarted', stopped)]
+    assert engine.partials == 0
+
+
+def test_oldest_partition_is_evicted_at_the_cap(make):
+    engine = make(FAILURES_THEN_LOGON, max_partitions=2)
+    for user in ('alice', 'bob', 'carol'):
+        engine.check_event(security(4625, user))
+    pattern = engine.patterns[0]
+    assert list(pattern.partials) == ['bob', 'carol']
+    assert pattern.evicted == 1
+
+
+def test_only_the_last_step_can_be_absent(make):
+    engine = make()
+    with pytest.raises(RuleSyntaxError):
+        engine.add_pattern({'steps': [{'source': 'SCM', 'event_id': 7036, 'absent': 60},
+                                      {'source': 'SCM', 'event_id': 7036}]})
\ No newline at end of file
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from src.event_viewer.event_buffer import EventBuffer
+from src.event_viewer.event_source import EventRecord
+
+START = datetime(2026, 10, 17, 12, 0, 0)
+
+
+def records(first, count, message=None):
+    return [EventRecord('Svc', i, 4, message or (f'message {i}',), START + timedelta(seconds=i), i)
+            for i in range(first, first + count)]
+
+
+def ids(buffer):
+    return buffer.column(2)
+
+
+def test_full_buffer_evicts_oldest_rows_across_the_wrap():
+    buffer = EventBuffer(capacity=5)
+    buffer.extend(records(0, 3))
+    buffer.extend(records(3, 4))
+    assert len(buffer) == 5 and ids(buffer) == [2, 3, 4, 5, 6]
+    buffer.extend(records(7, 3))
+    assert ids(buffer) == [5, 6, 7, 8, 9]
+    assert [row.EventID for row in buffer] == [5, 6, 7, 8, 9]
+    assert buffer[0].TimeGenerated == START + timedelta(seconds=5)
+    assert buffer[-1].StringInserts == ('message 9',)
+    assert buffer[-1].RecordNumber == 9
+
+
+def test_batch_larger_than_capacity_keeps_its_newest_rows():
+    buffer = EventBuffer(capacity=4)
+    buffer.extend(records(0, 10))
+    assert ids(buffer) == [6, 7, 8, 9]
+
+
+def test_unbounded_buffer_grows_and_keeps_order():
+    buffer = EventBuffer()
+    for first in range(0, 1000, 100):
+        buffer.extend(records(first, 100))
+    assert len(buffer) == 1000 and ids(buffer) == list(range(1000))
+
+
+def test_evicted_rows_release_their_pooled_inserts():
+    buffer = EventBuffer(capacity=3)
+    buffer.extend(records(0, 2, ('shared',)))
+    buffer.extend(records(2, 1, ('own',)))
+    assert len(buffer.inserts) == 2
+    buffer.extend(records(3, 2, ('new',)))
+    assert ids(buffer) == [2, 3, 4]
+    assert set(buffer.inserts.ids) == {('own',), ('new',)}
+    buffer.evict(1)
+    assert set(buffer.inserts.ids) == {('new',)}
\ No newline at end of file
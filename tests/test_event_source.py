@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from src.event_viewer.event_source import EventLogReader, MemoryEventSource
+
+START = datetime(2026, 10, 17, 12, 0, 0)
+
+
+def fill(source, count, first=0):
+    for i in range(first, first + count):
+        source.append(SourceName='Svc', EventID=i, TimeGenerated=START + timedelta(seconds=i))
+
+
+def numbers(events):
+    return [event.RecordNumber for event in events]
+
+
+def test_first_poll_reads_newest_then_only_new_records():
+    source = MemoryEventSource(batch_size=4)
+    fill(source, 10)
+    reader = EventLogReader(source, max_events=5)
+    reset, events = reader.read_all()
+    assert reset and numbers(events) == [6, 7, 8, 9, 10]
+    assert reader.read_all() == (False, [])
+    fill(source, 3, 10)
+    reset, events = reader.read_all()
+    assert not reset and numbers(events) == [11, 12, 13]
+
+
+def test_cursor_advances_only_past_consumed_batches():
+    source = MemoryEventSource(batch_size=2)
+    fill(source, 6)
+    reader = EventLogReader(source, max_events=100)
+    _, batches = reader.poll()
+    assert numbers(next(batches)) == [1, 2]
+    reset, events = reader.read_all()
+    assert not reset and numbers(events) == [3, 4, 5, 6]
+
+
+def test_seek_resumes_a_new_reader_after_a_saved_record():
+    source = MemoryEventSource()
+    fill(source, 8)
+    saved = source.records[4]
+    reader = EventLogReader(source)
+    reader.seek(saved.RecordNumber, saved.TimeGenerated.timestamp())
+    reset, events = reader.read_all()
+    assert not reset and numbers(events) == [6, 7, 8]
+
+
+def test_cleared_and_refilled_log_is_read_again_as_a_reset():
+    source = MemoryEventSource()
+    fill(source, 5)
+    reader = EventLogReader(source)
+    reader.read_all()
+    source.clear()
+    fill(source, 7, 100)
+    reset, events = reader.read_all()
+    assert reset and numbers(events) == [1, 2, 3, 4, 5, 6, 7]
+    assert events[0].EventID == 100
+
+
+def test_log_wrapping_past_the_cursor_is_a_reset():
+    source = MemoryEventSource(capacity=4)
+    fill(source, 4)
+    reader = EventLogReader(source)
+    reader.read_all()
+    fill(source, 6, 4)
+    reset, events = reader.read_all()
+    assert reset and numbers(events) == [7, 8, 9, 10]
\ No newline at end of file
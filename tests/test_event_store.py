@@ -0,0 +1,26 @@
+import socket
+from datetime import datetime
+
+from src.event_store.event_store import EventStore
+from src.event_viewer.event_source import EventRecord
+
+
+def test_same_record_from_two_hosts_is_kept_and_rereads_are_skipped(tmp_path):
+    store = EventStore(str(tmp_path / 'events.db'), retention_days=0)
+    events = [EventRecord('Service Control Manager', 7036, 4, ('a', 'running'),
+                          datetime(2026, 10, 17, 12, 0, 0), 1)]
+    store.insert_events('server1', 'System', events)
+    store.insert_events('server2', 'System', events)
+    store.insert_events('server1', 'System', events)
+    assert sorted(event.Host for event in store.query()) == ['server1', 'server2']
+    assert store.count(host='server2') == 1
+    store.close()
+
+
+def test_localhost_is_stored_under_the_machine_name(tmp_path):
+    store = EventStore(str(tmp_path / 'events.db'), retention_days=0)
+    events = [EventRecord('Svc', 1, 4, None, datetime(2026, 10, 17, 12, 0, 0), 1)]
+    store.insert_events('localhost', 'System', events)
+    store.insert_events(socket.gethostname(), 'System', events)
+    assert [event.Host for event in store.query()] == [socket.gethostname()]
+    store.close()
\ No newline at end of file
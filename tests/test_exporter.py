@@ -0,0 +1,42 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from src.event_viewer.exporter import EventExporter, ExportCancelled
+
+
+def rows(count):
+    when = datetime(2026, 10, 17, 12, 0, 0)
+    return [(when, 'Security', 4624 + i % 2, 4, (f'user{i}',), 'Security') for i in range(count)]
+
+
+def test_jsonl_gzip_export_writes_rows_matching_the_predicate(tmp_path):
+    path = str(tmp_path / 'events.jsonl.gz')
+    count = EventExporter('jsonl', 'gzip').export(rows(10), path, predicate=lambda row: row[2] == 4625)
+    assert count == 5
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        written = [json.loads(line) for line in f]
+    assert [row['inserts'] for row in written] == [[f'user{i}'] for i in range(1, 10, 2)]
+
+
+def test_cancel_is_checked_while_the_predicate_skips_rows(tmp_path):
+    checked = []
+
+    def cancelled():
+        checked.append(True)
+        return True
+
+    with pytest.raises(ExportCancelled):
+        EventExporter('csv', chunk_size=100).export(
+            rows(1000), str(tmp_path / 'events.csv'), predicate=lambda row: False, cancelled=cancelled)
+    assert len(checked) == 1
+
+
+def test_progress_reports_rows_written_every_chunk_read(tmp_path):
+    progress = []
+    EventExporter('csv', chunk_size=4).export(
+        rows(10), str(tmp_path / 'events.csv'), predicate=lambda row: row[2] == 4624,
+        progress=progress.append)
+    assert progress == [2, 4, 5]
\ No newline at end of file
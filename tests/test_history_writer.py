@@ -0,0 +1,58 @@
+import csv
+import time
+from datetime import datetime
+
+from src.event_manager.history_writer import HISTORY_COLUMNS, HistoryWriter
+
+
+def row(triggered_at, rule_name='failures'):
+    return (triggered_at, rule_name, triggered_at, 'Security', 4625, 16, ('bob',), 1, triggered_at)
+
+
+def read(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_full_batch_is_written_without_flush(tmp_path):
+    writer = HistoryWriter(str(tmp_path), batch_size=3, flush_interval=60)
+    now = datetime(2026, 10, 17, 12, 0, 0)
+    for i in range(3):
+        writer.write(row(now, f'rule{i}'))
+    assert wait_for(lambda: writer.written == 3)
+    writer.write(row(now, 'rule3'))
+    time.sleep(0.05)
+    assert writer.written == 3
+    assert writer.flush(5)
+    assert writer.written == 4
+    rows = read(writer.path_for(now))
+    assert rows[0] == HISTORY_COLUMNS
+    assert [r[1] for r in rows[1:]] == ['rule0', 'rule1', 'rule2', 'rule3']
+    writer.close()
+
+
+def test_rows_roll_over_to_the_day_they_were_triggered(tmp_path):
+    writer = HistoryWriter(str(tmp_path), flush_interval=60)
+    before = datetime(2026, 10, 17, 23, 59, 59)
+    after = datetime(2026, 10, 18, 0, 0, 1)
+    writer.write(row(before, 'late'))
+    writer.write(row(after, 'early'))
+    writer.close()
+    assert writer.path_for(before) != writer.path_for(after)
+    assert [r[1] for r in read(writer.path_for(before))] == ['Rule Name', 'late']
+    assert [r[1] for r in read(writer.path_for(after))] == ['Rule Name', 'early']
+
+
+def test_flush_returns_once_the_writer_has_stopped(tmp_path):
+    writer = HistoryWriter(str(tmp_path))
+    writer.close()
+    start = time.monotonic()
+    assert writer.flush() is False
+    assert time.monotonic() - start < 1
\ No newline at end of file
@@ -0,0 +1,18 @@
+import glob
+import logging
+import os
+
+from src.utils.logger import RotatingLogHandler
+
+
+def test_size_limit_counts_bytes_of_non_ascii_messages(tmp_path):
+    handler = RotatingLogHandler(str(tmp_path), max_bytes=1000, compress=False)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    record = logging.LogRecord('test', logging.INFO, __file__, 0, 'Dienst gestoppt — 日本語のログ', None, None)
+    line = len(('Dienst gestoppt — 日本語のログ' + os.linesep).encode('utf-8'))
+    for _ in range(60):
+        handler.emit(record)
+    handler.close()
+    sizes = [os.path.getsize(path) for path in glob.glob(str(tmp_path / '*.log'))]
+    assert sum(sizes) == 60 * line
+    assert len(sizes) > 1 and max(sizes) < 1000 + line
\ No newline at end of file
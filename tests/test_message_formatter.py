@@ -0,0 +1,47 @@
+from src.event_viewer.message_formatter import DictTemplateResolver, MessageFormatter, substitute
+
+TEMPLATES = {
+    ('Security', 'Security', 4625): 'An account failed to log on.%n%nAccount Name:%t%1',
+    ('Service Control Manager', 7036): 'The %1 service entered the %2 state.',
+}
+
+
+class CountingResolver(DictTemplateResolver):
+    def __init__(self, templates):
+        super().__init__(templates)
+        self.calls = []
+
+    def __call__(self, log_type, source, event_id):
+        self.calls.append((source, event_id))
+        return super().__call__(log_type, source, event_id)
+
+
+def test_substitute_fills_inserts_and_escapes():
+    assert substitute(TEMPLATES[('Security', 'Security', 4625)], ('bob',)) == \
+        'An account failed to log on.\r\n\r\nAccount Name:\tbob'
+    assert substitute('%1 of %3%!s!%%', ['one']) == 'one of %3!s!%'
+
+
+def test_templates_are_cached_with_misses_in_lru_order():
+    resolver = CountingResolver(TEMPLATES)
+    formatter = MessageFormatter(resolver, cache_size=2)
+    assert formatter.format('System', 'Service Control Manager', 7036, ('Spooler', 'running')) == \
+        'The Spooler service entered the running state.'
+    assert formatter.format('System', 'Unknown', 1, ('a', 'b')) == 'a b'
+    assert formatter.format('System', 'Unknown', 1, None) == ''
+    assert formatter.format('System', 'Service Control Manager', 7036, ('Spooler', 'stopped')) == \
+        'The Spooler service entered the stopped state.'
+    assert resolver.calls == [('Service Control Manager', 7036), ('Unknown', 1)]
+    # The least recently used template, for Unknown, makes room
+    formatter.format('Security', 'Security', 4625, ('bob',))
+    formatter.format('System', 'Service Control Manager', 7036, ('Spooler', 'running'))
+    formatter.format('System', 'Unknown', 1, None)
+    assert resolver.calls[2:] == [('Security', 4625), ('Unknown', 1)]
+    assert formatter.stats() == {'hits': 3, 'misses': 4, 'evictions': 2, 'size': 2}
+
+
+def test_resolver_errors_fall_back_to_the_inserts():
+    def resolver(log_type, source, event_id):
+        raise OSError('registry unavailable')
+    formatter = MessageFormatter(resolver)
+    assert formatter.format('System', 'Svc', 1, ('a', 2)) == 'a 2'
\ No newline at end of file
@@ -0,0 +1,41 @@
+from src.event_manager.occurrence import OccurrenceTracker
+
+
+def test_single_key_over_cap_keeps_newest_with_repeated_timestamps():
+    tracker = OccurrenceTracker(retention=60, max_entries=10)
+    tracker.record('key', now=1.0, count=8)
+    tracker.record('key', now=2.0, count=8)
+    assert tracker.total == 10
+    assert tracker.count('key', 60, now=2.0) == 10
+    assert tracker.count('key', 0.5, now=2.0) == 8
+
+def test_counts_only_occurrences_inside_the_window():
+    tracker = OccurrenceTracker(retention=600)
+    for now in (0.0, 100.0, 250.0, 300.0):
+        tracker.record('key', now=now)
+    assert tracker.count('key', 60, now=300.0) == 2
+    assert tracker.count('key', 300, now=300.0) == 4
+    assert tracker.count('other', 300, now=300.0) == 0
+
+
+def test_occurrences_past_retention_expire_and_idle_keys_are_dropped():
+    tracker = OccurrenceTracker(retention=100)
+    tracker.record('idle', now=0.0)
+    tracker.record('busy', now=0.0)
+    tracker.record('busy', now=90.0)
+    tracker.record('busy', now=150.0)
+    assert 'idle' not in tracker
+    assert tracker.count('busy', 1000, now=150.0) == 2
+    assert tracker.total == 2
+
+
+def test_least_recently_seen_keys_are_evicted_over_the_cap():
+    tracker = OccurrenceTracker(retention=3600, max_entries=4)
+    tracker.record('a', now=1.0, count=2)
+    tracker.record('b', now=2.0)
+    tracker.record('a', now=3.0)
+    tracker.record('c', now=4.0)
+    assert list(tracker.windows) == ['a', 'c']
+    assert tracker.evicted_keys == 1
+    assert tracker.count('a', 3600, now=4.0) == 3
+    assert tracker.total == 4
\ No newline at end of file
@@ -0,0 +1,71 @@
+import pytest
+
+from src.event_manager.rule_compiler import RuleCompiler, RuleSyntaxError, parse_condition, parse_id_spec
+from src.event_viewer.event_source import EventRecord
+
+
+def event(inserts, event_id=4625):
+    return EventRecord('Microsoft-Windows-Security-Auditing', event_id, 16, inserts)
+
+
+@pytest.mark.parametrize('literal', ['10.0.0.1', '192.168.100.25', '10.0.19045', '1.2', 'v1.2.3'])
+def test_dotted_literals_are_words(literal):
+    assert parse_condition(f'message contains {literal}') == ('cmp', 'message', 'contains', literal)
+
+
+def test_ip_condition_matches_inserts():
+    predicate = RuleCompiler().compile(parse_condition('message contains 10.0.0.1 and id = 4625'))
+    assert predicate(event(('user', '10.0.0.1')))
+    assert not predicate(event(('user', '10.0.0.2')))
+    assert not predicate(event(('user', '10.0.0.1'), 4624))
+
+
+def test_id_ranges_still_parse_next_to_dotted_words():
+    assert parse_condition('id in [1..3, 4624-4634, 4740]') == (
+        'cmp', 'id', 'in', [(1, 3), (4624, 4634), 4740])
+
+
+def test_number_field_rejects_dotted_value():
+    with pytest.raises(RuleSyntaxError):
+        parse_condition('id = 10.0.0.1')
+
+def matches(condition, record):
+    return RuleCompiler().compile(parse_condition(condition))(record)
+
+
+def test_and_binds_tighter_than_or_and_not_tighter_than_both():
+    assert parse_condition('id = 1 or id = 2 and not type = Error') == (
+        'or', [('cmp', 'id', '=', 1),
+               ('and', [('cmp', 'id', '=', 2), ('not', ('cmp', 'type', '=', 1))])])
+
+
+def test_text_fields_ignore_case_and_bare_words_run_across_spaces():
+    record = EventRecord('Service Control Manager', 7036, 4, ('DNS Client', 'Stopped'))
+    assert matches('source = service control manager and message contains stopped', record)
+    assert matches('source in ["Other", Service Control Manager]', record)
+    assert matches('message ~ /dns\\s+client/i', record)
+    assert not matches('message ~ /^stopped/', record)
+
+
+def test_types_by_name_and_number_and_id_ranges():
+    record = event(('user',))
+    assert matches('type = Failure Audit', record)
+    assert matches('type in [16, Error]', record)
+    assert matches('id in [4620..4630] and not id in [4624]', record)
+    assert not matches('id in [4700-4800, 1]', record)
+
+
+@pytest.mark.parametrize('condition', [
+    'and', 'id =', 'size = 1', '(id = 1', 'id = 1-5', 'message > 3', 'id ~ /1/', 'type = Fatal',
+    'message ~ /(/',
+])
+def test_bad_conditions_raise_rule_syntax_error(condition):
+    with pytest.raises(RuleSyntaxError):
+        RuleCompiler().compile_rule({'event_id': 1, 'condition': condition})
+
+
+def test_event_id_field_validation():
+    assert parse_id_spec('*') is None
+    assert parse_id_spec('4624-4634, 4740') == (frozenset({'4740'}), ((4624, 4634),))
+    with pytest.raises(RuleSyntaxError):
+        parse_id_spec('10-5')
\ No newline at end of file
@@ -0,0 +1,65 @@
+import pytest
+
+from src.event_manager.rule_engine import RuleEngine
+from src.event_viewer.event_source import EventRecord
+from src.utils.config import ConfigManager
+
+RULE = {'time_window': 5, 'occurrence_count': 5, 'action': 'Log', 'action_params': ''}
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = RuleEngine(None, ConfigManager('config.yaml'), 'rules.yaml')
+    engine.fired = []
+    engine.execute_action = lambda rule, event: engine.fired.append((rule['name'], event.EventID))
+    yield engine
+    engine.shutdown()
+
+
+def check(engine, event_ids):
+    for event_id in event_ids:
+        engine.check_event(EventRecord('Security', event_id))
+
+
+def test_range_rule_counts_mixed_ids_together(engine):
+    engine.add_rule(dict(RULE, name='logons', source='Security', event_id='4624-4634'))
+    check(engine, [4624, 4625, 4626, 4634])
+    assert engine.fired == []
+    check(engine, [4630])
+    assert engine.fired == [('logons', 4630)]
+
+
+def test_exact_rule_counts_its_own_pair(engine):
+    engine.add_rule(dict(RULE, name='failures', source='Security', event_id='4625'))
+    check(engine, [4625, 4624, 4625, 4625, 4625])
+    assert engine.fired == []
+    check(engine, [4625])
+    assert engine.fired == [('failures', 4625)]
+
+def test_conditioned_rule_counts_only_matching_events(engine):
+    engine.add_rule(dict(RULE, name='admin failures', source='Security', event_id='4625',
+                         condition='message contains admin', occurrence_count=3))
+    for user in ('bob', 'carol', 'admin'):
+        engine.check_event(EventRecord('Security', 4625, StringInserts=(user,)))
+    assert engine.fired == []
+    for user in ('admin', 'dave', 'admin'):
+        engine.check_event(EventRecord('Security', 4625, StringInserts=(user,)))
+    assert engine.fired == [('admin failures', 4625)]
+
+def test_duplicate_rule_names_are_rejected(engine):
+    engine.add_rule(dict(RULE, name='failures', source='Security', event_id='4625'))
+    with pytest.raises(ValueError):
+        engine.add_rule(dict(RULE, name='failures', source='Security', event_id='*'))
+    assert len(engine.rules) == 1
+
+
+def test_duplicate_rule_name_is_disabled_on_load(engine):
+    with open('rules.yaml', 'w') as f:
+        f.write("- {name: fails, source: Security, event_id: '4625', time_window: 5,\n"
+                "   occurrence_count: 1, action: Log, action_params: ''}\n"
+                "- {name: fails, source: Security, event_id: '*', time_window: 5,\n"
+                "   occurrence_count: 1, action: Log, action_params: ''}\n")
+    assert len(engine.load_rules()) == 2
+    check(engine, [4624, 4625])
+    assert engine.fired == [('fails', 4625)]
\ No newline at end of file
@@ -0,0 +1,48 @@
+from src.event_manager.rule_index import RuleIndex
+
+
+def rule(name, source, event_id):
+    return {'name': name, 'source': source, 'event_id': event_id}
+
+
+def names(index, source, event_id):
+    return [found['name'] for found in index.match(source, event_id)]
+
+
+def test_exact_wildcard_list_and_range_rules_match_in_added_order():
+    index = RuleIndex([
+        rule('exact', 'Security', 4625),
+        rule('any id', 'Security', '*'),
+        rule('any source', '', '4625'),
+        rule('list', 'Security', '4624, 4740'),
+        rule('range', 'Security', '4620-4630'),
+        rule('other', 'System', 7036),
+    ])
+    assert names(index, 'Security', 4625) == ['exact', 'any id', 'any source', 'range']
+    assert names(index, 'Security', 4624) == ['any id', 'list', 'range']
+    assert names(index, 'Security', 4740) == ['any id', 'list']
+    assert names(index, 'Security', 4631) == ['any id']
+    assert names(index, 'System', 4625) == ['any source']
+    assert names(index, 'System', 7036) == ['other']
+    assert names(index, 'Application', 1) == []
+
+
+def test_overlapping_ranges_and_a_listed_id_inside_a_range():
+    index = RuleIndex([
+        rule('wide', 'Security', '4600-4700'),
+        rule('narrow', 'Security', '4624..4634, 4625'),
+    ])
+    assert names(index, 'Security', 4625) == ['wide', 'narrow']
+    assert names(index, 'Security', 4640) == ['wide']
+    assert names(index, 'Security', 4599) == []
+
+
+def test_removed_and_added_rules_invalidate_cached_matches():
+    ranged = rule('range', 'Security', '4624-4634')
+    index = RuleIndex([rule('exact', 'Security', 4625), ranged])
+    assert names(index, 'Security', 4625) == ['exact', 'range']
+    index.remove(ranged)
+    assert names(index, 'Security', 4625) == ['exact']
+    index.add(rule('late', None, None))
+    assert names(index, 'Security', 4625) == ['exact', 'late']
+    assert len(index) == 2
\ No newline at end of file
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from src.event_viewer.event_source import EventRecord
+from src.event_viewer.search_index import SearchIndex, SearchQuery, message_text
+
+START = datetime(2026, 10, 17, 12, 0, 0)
+
+MESSAGES = [
+    ('alice', 'logon failed'), ('bob', 'logon failed'), ('admin', 'logon ok'),
+    ('carol', 'service stopped'), ('admin', 'service started'), ('dave', 'logon failed'),
+    ('adm-backup', 'logon ok'), ('erin', 'service stopped'),
+]
+
+
+def event(i, inserts):
+    return EventRecord('Security' if 'logon' in inserts[1] else 'SCM', 4624 + i % 2,
+                       StringInserts=inserts, TimeGenerated=START + timedelta(minutes=i))
+
+
+def build(messages=MESSAGES):
+    events = [event(i, inserts) for i, inserts in enumerate(messages)]
+    index = SearchIndex(lambda i: message_text(events[i].StringInserts))
+    index.add_events(0, events)
+    return index, events
+
+
+def test_terms_phrases_prefixes_and_fields_intersect():
+    index, _ = build()
+    assert index.search('logon failed') == [0, 1, 5]
+    assert index.search('"service stopped"') == [3, 7]
+    assert index.search('adm*') == [2, 4, 6]
+    assert index.search('source:scm id:4625') == [3, 7]
+    assert index.search('logon after:"2026-10-17 12:02"') == [2, 5, 6]
+
+
+def test_prefix_vocabulary_picks_up_tokens_added_later():
+    index, events = build()
+    assert index.search('adm*') == [2, 4, 6]
+    events.append(event(8, ('administrator', 'logon ok')))
+    index.add(8, events[8])
+    assert index.search('adm*') == [2, 4, 6, 8]
+    assert index.search('administrator') == [8]
+
+
+def test_eviction_hides_rows_then_compacts_postings():
+    index, _ = build()
+    index.evict_before(1)
+    assert index._first_id == 0
+    assert index.search('logon failed') == [1, 5]
+    index.evict_before(3)
+    # A quarter of the rows gone: postings and times are cut down
+    assert index._first_id == 3
+    assert 'alice' not in index._postings and 'bob' not in index._postings
+    assert len(index) == 5
+    assert index.search('logon failed') == [5]
+    assert index.search('adm*') == [4, 6]
+    assert index.search('logon before:"2026-10-17 12:06"') == [5]
+
+
+def test_query_matches_like_the_index():
+    index, events = build()
+    for text in ('logon failed', '"service stopped"', 'adm*', 'source:scm id:4625'):
+        query = SearchQuery(text)
+        expected = [i for i, e in enumerate(events)
+                    if query.matches(e.TimeGenerated, e.SourceName, e.EventID, e.StringInserts)]
+        assert index.search(query) == expected
\ No newline at end of file
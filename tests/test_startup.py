@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_startup import FORBIDDEN, HEADLESS_BUDGET_MS, time_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUN_HEADLESS = '''
+import runpy, sys
+sys.argv = ['run.py', '--headless', '--duration', '0', '--config', 'config.yaml', '--rules', 'rules.yaml']
+try:
+    runpy.run_path({run!r}, run_name='__main__')
+except SystemExit as e:
+    assert not e.code, e.code
+print('Qt modules:', *sorted(name for name in sys.modules if name.split('.')[0] == 'PyQt5'))
+'''
+
+
+def test_headless_import_stays_free_of_qt_and_pywin32_and_within_budget():
+    elapsed, modules = time_import('src.headless', 3)
+    assert [name for name in modules if name.split('.')[0] in FORBIDDEN] == []
+    assert elapsed * 1000 <= HEADLESS_BUDGET_MS
+
+
+def test_run_headless_never_loads_qt(tmp_path):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.run(
+        [sys.executable, '-c', RUN_HEADLESS.format(run=os.path.join(ROOT, 'run.py'))],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60, check=True
+    ).stdout
+    assert output.splitlines()[-1] == 'Qt modules:'
\ No newline at end of file
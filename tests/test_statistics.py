@@ -0,0 +1,78 @@
+import socket
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.event_store.statistics import EventStatistics
+from src.event_viewer.event_source import EventRecord
+
+# A whole local day's start, so the minute and hour buckets line up with it
+START = datetime(2026, 10, 17, 0, 0, 0)
+
+
+@pytest.fixture
+def statistics(tmp_path):
+    return EventStatistics(str(tmp_path / 'statistics.dat'), minutes=5, hours=3, days=2,
+                           save_interval=float('inf'))
+
+
+def at(minutes, record, source='Svc', event_id=1):
+    return EventRecord(source, event_id, 4, None, START + timedelta(minutes=minutes), record)
+
+
+def now(minutes):
+    return (START + timedelta(minutes=minutes)).timestamp()
+
+
+def test_minute_buckets_roll_over_while_coarser_ones_keep_the_count(statistics):
+    statistics.add('host', 'System', [at(0, 1), at(0, 2), at(3, 3)])
+    assert statistics.counts('minute', 5, now(3)) == [0, 2, 0, 0, 1]
+    statistics.add('host', 'System', [at(6, 4)])
+    assert statistics.counts('minute', 5, now(6)) == [0, 1, 0, 0, 1]
+    statistics.add('host', 'System', [at(20, 5)])
+    assert statistics.counts('minute', 5, now(20)) == [0, 0, 0, 0, 1]
+    assert statistics.counts('hour', 1, now(20)) == [5]
+    assert statistics.counts('day', 2, now(20)) == [0, 5]
+
+
+def test_late_events_older_than_a_ring_only_count_in_coarser_ones(statistics):
+    statistics.add('host', 'System', [at(120, 1)])
+    statistics.add('host', 'Application', [at(100, 1)])
+    assert statistics.counts('minute', 5, now(120)) == [0, 0, 0, 0, 1]
+    assert statistics.counts('hour', 3, now(120)) == [0, 1, 1]
+
+
+def test_rereads_are_not_counted_twice(statistics):
+    events = [at(0, 1), at(1, 2), at(2, 3)]
+    statistics.add('host', 'System', events)
+    statistics.add('host', 'System', events + [at(3, 4)])
+    statistics.add('other', 'System', events)
+    assert sum(statistics.counts('hour', 1, now(3))) == 7
+
+
+def test_top_and_grouped_by_field(statistics):
+    statistics.add('host', 'System', [at(0, 1, 'A'), at(0, 2, 'A'), at(1, 3, 'B', 7)])
+    assert statistics.top('source', 'minute', 5, 10, now(1)) == [('A', 2), ('B', 1)]
+    assert statistics.grouped('event_id', 'minute', 2, now(1)) == {1: [2, 0], 7: [0, 1]}
+
+
+def test_counts_survive_save_and_load(statistics, tmp_path):
+    # Saving drops rings aged out by the real clock, so these are recent
+    first = datetime.fromtimestamp((time.time() // 60 - 4) * 60)
+    events = [EventRecord('Svc', 1, 4, None, first, 1),
+              EventRecord('Svc', 1, 4, None, first + timedelta(minutes=4), 2)]
+    end = events[-1].TimeGenerated.timestamp()
+    statistics.add('host', 'System', events)
+    statistics.close()
+    loaded = EventStatistics(str(tmp_path / 'statistics.dat'), minutes=5, hours=3, days=2,
+                             save_interval=float('inf'))
+    assert loaded.counts('minute', 5, end) == [1, 0, 0, 0, 1]
+    loaded.add('host', 'System', events)
+    assert sum(loaded.counts('minute', 5, end)) == 2
+
+def test_local_host_aliases_share_one_cursor(statistics):
+    statistics.add('localhost', 'System', [at(0, 1), at(0, 2)])
+    statistics.add(socket.gethostname(), 'System', [at(0, 1), at(0, 2), at(1, 3)])
+    assert statistics.counts('minute', 2, now(1)) == [2, 1]
+    assert list(statistics.cursors) == [(socket.gethostname(), 'System')]
\ No newline at end of file